@@ -0,0 +1,9 @@
+-- Genormaliseerde naam kolommen en de unieke index waar sync-riders.sql nieuwe renners op matcht,
+-- zie prisma/schema.prisma (riders) en imports/sync-roster.py
+-- Eén keer uitvoeren, vóór de eerste sync-riders.sql met nieuwe renners:
+--   node imports/run-sql-script.js imports/add-riders-normalized-name-key.sql
+
+ALTER TABLE riders ADD COLUMN IF NOT EXISTS first_name_normalized VARCHAR(100);
+ALTER TABLE riders ADD COLUMN IF NOT EXISTS last_name_normalized VARCHAR(100);
+
+CREATE UNIQUE INDEX IF NOT EXISTS riders_normalized_name_key ON riders (first_name_normalized, last_name_normalized);
@@ -0,0 +1,25 @@
+-- Tabellen voor de statistieken cube (imports/update-stats-rollup.py), zie prisma/schema.prisma
+-- Eén keer uitvoeren, vóór de eerste update-stats-rollup.sql:
+--   node imports/run-sql-script.js imports/add-stat-rollup-tables.sql
+
+CREATE TABLE IF NOT EXISTS stat_rollup_stages (
+  stage_id INTEGER PRIMARY KEY REFERENCES stages(id) ON DELETE CASCADE,
+  distance_km NUMERIC(5, 1),
+  bucket VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS stat_rollup (
+  stage_id INTEGER NOT NULL REFERENCES stages(id) ON DELETE CASCADE,
+  rider_id INTEGER NOT NULL,
+  team_pro_id INTEGER,
+  bucket VARCHAR(20),
+  results INTEGER NOT NULL,
+  points INTEGER NOT NULL,
+  wins INTEGER NOT NULL,
+  top10 INTEGER NOT NULL,
+  PRIMARY KEY (stage_id, rider_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stat_rollup_rider ON stat_rollup (rider_id);
+CREATE INDEX IF NOT EXISTS idx_stat_rollup_team ON stat_rollup (team_pro_id);
+CREATE INDEX IF NOT EXISTS idx_stat_rollup_bucket ON stat_rollup (bucket);
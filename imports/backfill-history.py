@@ -0,0 +1,69 @@
+"""
+Backfill van uitslagen uit eerdere Tours, parallel per seizoen en etappe
+
+Invoer:  imports/history/<seizoen>/etappe-<n>-uitslag.csv (+ optioneel riders.csv per seizoen)
+Uitvoer: imports/history-out/<seizoen>/stage-<n>.csv en rider-ids.csv, voortgang in progress.jsonl
+
+Gebruik:
+  python imports/backfill-history.py                  # alle seizoenen, verder waar het gebleven was
+  python imports/backfill-history.py 2023 2024        # alleen deze seizoenen
+  python imports/backfill-history.py --workers=4
+  python imports/backfill-history.py --restart        # journal negeren, alles opnieuw
+"""
+
+import os
+import sys
+import time
+
+from tourpoule.backfill import HISTORY_DIR, OUTPUT_DIR, discover_tasks, run_backfill
+
+
+def report(entry, finished, total):
+    if isinstance(entry, Exception):
+        print(f"   [{finished}/{total}] ❌ {entry}")
+        return
+    unresolved = f", {entry['unresolved']} zonder rider_id" if entry['unresolved'] else ''
+    print(f"   [{finished}/{total}] ✓ {entry['key']}: {entry['rows']} renners{unresolved}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    seasons = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    workers = int(options['workers']) if 'workers' in options else None
+    history_dir = options.get('history', HISTORY_DIR)
+    output_dir = options.get('out', OUTPUT_DIR)
+
+    if not os.path.isdir(history_dir):
+        print(f"❌ Map {history_dir} niet gevonden")
+        exit(1)
+
+    tasks = discover_tasks(history_dir, seasons or None)
+    if not tasks:
+        print(f"❌ Geen etappe-<n>-uitslag.csv bestanden gevonden in {history_dir}")
+        exit(1)
+
+    print(f"✓ {len(tasks)} etappes in {len({t.season for t in tasks})} seizoen(en)")
+
+    started = time.time()
+
+    done, skipped, failed = run_backfill(
+        tasks, output_dir, workers=workers, resume='--restart' not in argv, progress=report,
+    )
+
+    print(f"\n{'='*80}")
+    print("BACKFILL KLAAR:")
+    print(f"{'='*80}")
+    print(f"✓ {len(done)} etappe(s) verwerkt in {time.time() - started:.1f}s")
+    if skipped:
+        print(f"⏭️  {skipped} etappe(s) al klaar volgens {os.path.join(output_dir, 'progress.jsonl')}")
+    if failed:
+        print(f"❌ {len(failed)} etappe(s) mislukt (opnieuw draaien gaat verder met deze):")
+        for task, error in failed:
+            print(f"   - {task.key}: {error}")
+        exit(1)
+
+
+# De workers importeren dit script opnieuw bij de spawn start methode (Windows, macOS)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: dict pipeline vs ResultRecord (__slots__) vs ResultColumns (arrays)
+
+Simuleert de import van een grote uitslag: CSV regels inlezen, tijd omzetten en
+rider_id corrigeren. De dict variant doet dat zoals de oude scripts (DictReader,
+{**rider, ...}, rider.copy()); de record varianten werken in place.
+
+Gebruik:
+  python imports/benchmark-rider-records.py            # 1.000.000 rijen
+  python imports/benchmark-rider-records.py 200000
+"""
+
+import csv
+import gc
+import sys
+import time
+import tracemalloc
+
+from tourpoule.records import ResultColumns, ResultRecord, Status
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+FIELDS = ['position', 'first_name', 'last_name', 'rider_id', 'team_name', 'time_seconds']
+
+
+def synthetic_lines(n):
+    """CSV regels zoals etappe-1-uitslag.csv, met af en toe een DNF"""
+    yield ','.join(FIELDS)
+    for i in range(1, n + 1):
+        time_seconds = '' if i % 97 == 0 else str(13991 + i % 600)
+        rider_id = '' if i % 5 == 0 else str(i % 184 + 1)
+        yield f"{i},First{i % 500},Last{i % 1000},{rider_id},Team {i % 23},{time_seconds}"
+
+
+def dict_pipeline(lines):
+    riders = []
+    for row in csv.DictReader(lines):
+        time_str = row['time_seconds'].strip()
+        riders.append({**row, 'time_seconds': int(time_str) if time_str else None})
+    fixed = []
+    for rider in riders:
+        fixed_rider = rider.copy()
+        fixed_rider['rider_id'] = rider['rider_id'] or str(int(rider['position']) % 184 + 1)
+        fixed_rider['status'] = 'DNF' if rider['time_seconds'] is None else None
+        fixed.append(fixed_rider)
+    return fixed
+
+
+def record_rows(lines):
+    reader = csv.reader(lines)
+    next(reader)
+    for position, first_name, last_name, rider_id, team_name, time_str in reader:
+        time_seconds = int(time_str) if time_str else None
+        yield ResultRecord(
+            position=int(position),
+            first_name=first_name,
+            last_name=last_name,
+            rider_id=int(rider_id) if rider_id else None,
+            team_name=team_name,
+            time_seconds=time_seconds,
+            status=Status.FINISHED if time_seconds is not None else Status.DNF,
+        )
+
+
+def record_pipeline(lines):
+    riders = list(record_rows(lines))
+    for rider in riders:
+        if rider.rider_id is None:
+            rider.rider_id = rider.position % 184 + 1
+    return riders
+
+
+def columns_pipeline(lines):
+    columns = ResultColumns()
+    for rider in record_rows(lines):
+        if rider.rider_id is None:
+            rider.rider_id = rider.position % 184 + 1
+        columns.append(rider)
+    return columns
+
+
+def measure(name, pipeline, lines):
+    gc.collect()
+    start = time.perf_counter()
+    result = pipeline(lines)
+    elapsed = time.perf_counter() - start
+    assert len(result) == ROWS
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = pipeline(lines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"  {name:<26} {elapsed:7.2f} s  {ROWS / elapsed:>12,.0f} rijen/s  {peak / 1024 / 1024:8.1f} MB piek")
+    return elapsed, peak
+
+
+lines = list(synthetic_lines(ROWS))
+
+print(f"{'='*80}")
+print(f"BENCHMARK: {ROWS:,} rijen")
+print(f"{'='*80}")
+base_time, base_peak = measure('dict (huidige scripts)', dict_pipeline, lines)
+rec_time, rec_peak = measure('ResultRecord (__slots__)', record_pipeline, lines)
+col_time, col_peak = measure('ResultColumns (arrays)', columns_pipeline, lines)
+
+print(f"\n📊 t.o.v. dict pipeline:")
+print(f"   - ResultRecord:  {base_time / rec_time:.2f}x sneller, {base_peak / rec_peak:.2f}x minder geheugen")
+print(f"   - ResultColumns: {base_time / col_time:.2f}x sneller, {base_peak / col_peak:.2f}x minder geheugen")
@@ -0,0 +1,122 @@
+"""
+Werk de kolomgewijze puntenhistorie bij (imports/history-store/) uit fantasy_stage_points
+
+Alleen etappes die nog niet in de store staan worden toegevoegd; de laatste etappe wordt altijd
+opnieuw geschreven (herberekening na een correctie). Een nieuwe deelnemer of een etappe vóór de
+laatste geeft een volledige rebuild.
+
+Gebruik:
+  python imports/build-history-store.py                       # uit de database
+  python imports/build-history-store.py --source=database_csv/backup_2025-12-16_10-32-55
+  python imports/build-history-store.py --rebuild             # alles opnieuw
+  python imports/build-history-store.py --team=12             # historie en beste 5 etappes van participant 12
+
+Zonder --source is psycopg2 nodig (pip install psycopg2-binary) en NEON_DATABASE_URL of DATABASE_URL
+"""
+
+import os
+import sys
+
+from tourpoule import snapshots
+from tourpoule.history_store import DEFAULT_DIR, HistoryStore, stage_points_from_rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    output_dir = options.get('out', DEFAULT_DIR)
+    rebuild = '--rebuild' in argv
+
+    if 'team' in options and 'source' not in options and os.path.exists(os.path.join(output_dir, 'index.json')):
+        # Alleen opvragen: geen database nodig
+        tables = None
+    else:
+        if 'source' in options:
+            tables = snapshots.load_tables_from_csv(options['source'])
+            print(f"✓ Tabellen gelezen uit {options['source']}")
+        else:
+            database_url = os.getenv('NEON_DATABASE_URL') or os.getenv('DATABASE_URL')
+            if not database_url:
+                print("❌ Database configuration missing!")
+                print("   Set NEON_DATABASE_URL or DATABASE_URL environment variable, or use --source=<backup map>")
+                exit(1)
+            try:
+                import psycopg2
+            except ImportError:
+                print("❌ psycopg2 is niet geïnstalleerd: pip install psycopg2-binary")
+                exit(1)
+            conn = psycopg2.connect(database_url)
+            try:
+                tables = snapshots.load_tables_from_db(conn)
+            finally:
+                conn.close()
+            print("✓ Tabellen gelezen uit de database")
+
+    if tables is not None:
+        stage_points = stage_points_from_rows(tables['fantasy_stage_points'], tables['stages'])
+        stage_ids = {s['stage_number']: s['id'] for s in tables['stages']}
+        teams = sorted({p['id'] for p in tables['participants']})
+        if not stage_points:
+            print("❌ Nog geen punten in fantasy_stage_points")
+            exit(1)
+
+        store = None
+        if not rebuild and os.path.exists(os.path.join(output_dir, 'index.json')):
+            try:
+                store = HistoryStore.open(output_dir)
+                last = store.stage_numbers[-1] if store.stages else None
+                pending = [n for n in sorted(stage_points) if n not in store.blocks or n == last]
+                for stage_number in pending:
+                    store.append_stage(stage_number, stage_points[stage_number], stage_ids.get(stage_number))
+                    print(f"✓ Etappe {stage_number} bijgewerkt")
+            except ValueError as e:
+                print(f"⚠️  {e}")
+                store = None
+
+        if store is None:
+            store = HistoryStore.build(output_dir, stage_points, stage_ids, teams)
+            print(f"✓ Store opgebouwd: {len(store.stages)} etappe(s)")
+
+        # Controle: de som van de etappe punten moet gelijk zijn aan fantasy_cumulative_points
+        stage_numbers = {s['id']: s['stage_number'] for s in tables['stages']}
+        totals = {}
+        mismatches = 0
+        for row in tables['fantasy_cumulative_points']:
+            stage_number = stage_numbers.get(row['after_stage_id'])
+            if stage_number not in store.blocks or row['participant_id'] not in store.columns:
+                continue
+            if stage_number not in totals:
+                totals[stage_number] = store.totals_after(stage_number)
+            if totals[stage_number][row['participant_id']] != row['total_points']:
+                mismatches += 1
+        if mismatches:
+            print(f"⚠️  {mismatches} rij(en) in fantasy_cumulative_points wijken af van de som van de "
+                  "etappe punten")
+
+        size = os.path.getsize(store.data_path)
+        print(f"\n✅ {output_dir}: {len(store.teams)} teams x {len(store.stages)} etappes, "
+              f"{size} bytes ({store.typecode}, {store.data.itemsize} byte per waarde)")
+    else:
+        try:
+            store = HistoryStore.open(output_dir)
+        except ValueError as e:
+            print(f"❌ {e}: draai met --rebuild (en --source of een database)")
+            exit(1)
+
+    if 'team' in options:
+        participant_id = int(options['team'])
+        if participant_id not in store.columns:
+            print(f"❌ Participant {participant_id} staat niet in de store")
+            exit(1)
+        print(f"\n{'='*80}")
+        print(f"PARTICIPANT {participant_id}:")
+        print(f"{'='*80}")
+        for stage_number, points, total in zip(store.stage_numbers, store.team_points(participant_id),
+                                               store.team_cumulative(participant_id)):
+            print(f"  Etappe {stage_number:>2}: {points:>4} pnt  (totaal {total})")
+        best = ', '.join(f"etappe {n} ({p})" for n, p in store.best_stages(participant_id))
+        print(f"  Beste etappes: {best}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,200 +1,143 @@
 """
-Generate SQL script to import stage 1 results from etappe-1-uitslag.csv
+Generate SQL script to import stage results from etappe-<n>-uitslag.csv
+
+Gebruik:
+  python imports/generate-etappe-1-sql.py              # etappe 1, SQL script met VALUES literals
+  python imports/generate-etappe-1-sql.py 1 2 3        # meerdere etappes
+  python imports/generate-etappe-1-sql.py --batch      # prepared statement + parameter batches
+  python imports/generate-etappe-1-sql.py --chunk=200  # batch output, elke 200 rijen een eigen transactie
+  python imports/generate-etappe-1-sql.py --no-cache   # alles opnieuw genereren
+  python imports/generate-etappe-1-sql.py --strict     # geen SQL bij integriteitsfouten
+  python imports/generate-etappe-1-sql.py --profile    # profiel per etappe in imports/profiles/
+
+Ongewijzigde etappes (zelfde input CSV en zelfde versie van dit script) worden
+uit imports/.build-cache/ gehaald en overgeslagen. Vóór het genereren wordt de
+etappe gecontroleerd (tourpoule/integrity.py, zie ook validate-stage.py).
 """
 
-import csv
 import os
-from collections import defaultdict
-
-# Known typos to fix
-TYPO_CORRECTIONS = {
-    'Mathieu': {'van der Po&': 'van der Poel'},
-    'Rem++': {'Evenepoel': 'Evenepoel'},  # Remco
-    'Primo+': {'Roglic': 'Roglic'},  # Primoz
-    'Staff': {'Cras': 'Cras'},  # Steff
-    'Bastion': {'Tronchon': 'Tronchon'},  # Bastien
-    'Vito': {'Brant': 'Braet'},
-    'Anders': {'Johannessen': 'Halland Johannessen'},
-    'Thyme+': {'Arensman': 'Arensman'},  # Thymen
-    'Gregor': {'Muehlberger': 'Muhlberger'},
-    'Einar': {'Rubio': 'Rubio'},  # Einer
-    'Frank': {'van den Brook': 'Van Den Broek'},
-    'Ro&': {'van Sintmaartensdijk': 'van Sintmaartensdijk'},  # Roel
-    'William': {'Barta': 'Barta'},  # Will
-}
-
-# Read CSV (use fixed version if available)
-csv_file = 'imports/etappe-1-uitslag-fixed.csv'
-if not os.path.exists(csv_file):
-    csv_file = 'imports/etappe-1-uitslag.csv'
-
-riders = []
-with open(csv_file, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        # Fix known typos
-        first_name = row['first_name'].strip()
-        last_name = row['last_name'].strip()
-        
-        if first_name in TYPO_CORRECTIONS:
-            if last_name in TYPO_CORRECTIONS[first_name]:
-                last_name = TYPO_CORRECTIONS[first_name][last_name]
-        
-        # Specific corrections
-        if first_name == 'Rem++':
-            first_name = 'Remco'
-        elif first_name == 'Primo+':
-            first_name = 'Primoz'
-        elif first_name == 'Staff':
-            first_name = 'Steff'
-        elif first_name == 'Bastion':
-            first_name = 'Bastien'
-        elif first_name == 'Thyme+':
-            first_name = 'Thymen'
-        elif first_name == 'Einar':
-            first_name = 'Einer'
-        elif first_name == 'Ro&':
-            first_name = 'Roel'
-        elif first_name == 'William' and last_name == 'Barta':
-            first_name = 'Will'
-        
-        row['first_name'] = first_name
-        row['last_name'] = last_name
-        riders.append(row)
-
-print(f"✓ {len(riders)} renners gelezen")
-
-# Group by time_seconds to calculate same_time_group
-time_groups = defaultdict(list)
-for i, rider in enumerate(riders, 1):
-    time_seconds = rider.get('time_seconds', '').strip()
-    if time_seconds:
-        time_groups[int(time_seconds)].append(i)
-    else:
-        time_groups[None].append(i)
-
-# Assign group numbers
-group_number = 1
-time_to_group = {}
-for time_seconds in sorted(time_groups.keys(), key=lambda x: x if x is not None else float('inf')):
-    time_to_group[time_seconds] = group_number
-    group_number += 1
-
-# Generate SQL
-sql_lines = [
-    "-- SQL Script to import Stage 1 results from etappe-1-uitslag.csv",
-    "-- Generated automatically",
-    f"-- Total riders: {len(riders)}",
-    "",
-    "-- First, verify that Stage 1 exists",
-    "DO $$",
-    "BEGIN",
-    "  IF NOT EXISTS (SELECT 1 FROM stages WHERE stage_number = 1) THEN",
-    "    RAISE EXCEPTION 'Stage 1 does not exist. Please run full-reset-and-import.sql first.';",
-    "  END IF;",
-    "END $$;",
-    "",
-    "-- Clear existing Stage 1 results",
-    "DELETE FROM stage_results WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);",
-    "",
-    "-- Insert Stage 1 results",
-    "-- Uses rider_id from CSV if provided, otherwise looks up by name",
-    "-- Calculates same_time_group based on time_seconds",
-    "INSERT INTO stage_results (stage_id, rider_id, position, time_seconds, same_time_group)",
-    "WITH stage_data AS (",
-    "  SELECT ",
-    "    s.id as stage_id,",
-    "    v.position,",
-    "    v.first_name,",
-    "    v.last_name,",
-    "    v.rider_id_provided,",
-    "    v.time_seconds,",
-    "    -- Calculate same_time_group: assign group number based on time_seconds",
-    "    DENSE_RANK() OVER (ORDER BY v.time_seconds NULLS LAST) as time_group",
-    "  FROM stages s",
-    "  CROSS JOIN (VALUES",
-]
-
-    # Add VALUES
-values = []
-for rider in riders:
-    position = rider['position']
-    # Escape single quotes for SQL (double them)
-    first_name = rider['first_name'].replace("'", "''")
-    last_name = rider['last_name'].replace("'", "''")
-    rider_id = rider.get('rider_id', '').strip()
-    time_seconds = rider.get('time_seconds', '').strip()
-    
-    # Handle empty rider_id
-    if rider_id:
-        rider_id_sql = f"NULLIF('{rider_id}', '')"
-    else:
-        rider_id_sql = "NULL"
-    
-    # Handle time_seconds
-    if time_seconds:
-        try:
-            time_seconds_sql = int(time_seconds)
-        except ValueError:
-            time_seconds_sql = "NULL"
+import sys
+
+from tourpoule import names, stage_sql, tables
+from tourpoule.build_cache import BuildCache, file_hash, records_to_rows, rows_to_records, text_hash
+from tourpoule.integrity import available_rider_index, fill_rider_ids, previous_out_of_race, validate_stage
+from tourpoule.profiling import Profiler
+
+
+def output_path(stage_number, output_mode):
+    if output_mode == 'batch':
+        return f'imports/import-etappe-{stage_number}-uitslag.batch.jsonl'
+    return f'imports/import-etappe-{stage_number}-uitslag.sql'
+
+
+def write_output(stage_number, riders, output_file, output_mode, chunk_size=None):
+    """Schrijf het SQL of batch bestand"""
+    if output_mode == 'batch':
+        from tourpoule import sql_batch
+
+        rows = sql_batch.stage_results_rows(riders)
+        if chunk_size:
+            header = sql_batch.stage_results_header(stage_number, len(rows), chunk_size, chunked=True)
+        else:
+            header = sql_batch.stage_results_header(stage_number, len(rows))
+        sql_batch.write_batch_file(output_file, header, rows)
     else:
-        time_seconds_sql = "NULL"
-    
-    values.append(f"    ({position}, '{first_name}', '{last_name}', {rider_id_sql}, {time_seconds_sql})")
-
-sql_lines.append(',\n'.join(values))
-sql_lines.extend([
-    "  ) AS v(position, first_name, last_name, rider_id_provided, time_seconds)",
-    "  WHERE s.stage_number = 1",
-    "),",
-    "rider_lookup AS (",
-    "  SELECT ",
-    "    sd.*,",
-    "    CASE",
-    "      WHEN sd.rider_id_provided IS NOT NULL AND sd.rider_id_provided != '' THEN sd.rider_id_provided::INTEGER",
-    "      ELSE (",
-    "        SELECT r.id",
-    "        FROM riders r",
-    "        WHERE LOWER(TRIM(r.first_name)) = LOWER(TRIM(sd.first_name))",
-    "          AND LOWER(TRIM(r.last_name)) = LOWER(TRIM(sd.last_name))",
-    "        LIMIT 1",
-    "      )",
-    "    END as rider_id",
-    "  FROM stage_data sd",
-    ")",
-    "SELECT DISTINCT ON (stage_id, rider_id)",
-    "  stage_id,",
-    "  rider_id,",
-    "  position,",
-    "  time_seconds,",
-    "  time_group as same_time_group",
-    "FROM rider_lookup",
-    "WHERE rider_id IS NOT NULL",
-    "ORDER BY stage_id, rider_id, position",
-    "ON CONFLICT (stage_id, rider_id)",
-    "DO UPDATE SET",
-    "  position = EXCLUDED.position,",
-    "  time_seconds = EXCLUDED.time_seconds,",
-    "  same_time_group = EXCLUDED.same_time_group;",
-    "",
-    "-- Verify the import",
-    "SELECT ",
-    "  COUNT(*) as total_results,",
-    "  COUNT(DISTINCT rider_id) as unique_riders,",
-    "  COUNT(DISTINCT same_time_group) as time_groups,",
-    "  COUNT(*) FILTER (WHERE time_seconds IS NULL) as dnf_count",
-    "FROM stage_results",
-    "WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);",
-])
-
-# Write SQL file
-output_file = 'imports/import-etappe-1-uitslag.sql'
-with open(output_file, 'w', encoding='utf-8', newline='\n') as f:
-    # Write each line separately to avoid any encoding issues
-    for line in sql_lines:
-        f.write(line + '\n')
-
-print(f"✓ SQL script gegenereerd: {output_file}")
-print(f"  - {len(riders)} renners")
-print(f"  - {len(time_to_group)} verschillende tijd groepen")
+        sql_content = stage_sql.generate_sql(stage_number, f'etappe-{stage_number}-uitslag.csv', riders)
+        with open(output_file, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(sql_content)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    # Chunks worden per transactie gecommit en kunnen hervat worden; dat kan alleen via run-batch-import.py
+    chunk_size = int(options['chunk']) if 'chunk' in options else None
+    output_mode = 'batch' if '--batch' in argv or chunk_size else 'sql'
+    strict = '--strict' in argv
+    cache_tool = f'generate-sql-{output_mode}'
+
+    args = [a for a in argv if not a.startswith('--')]
+    stage_numbers = [int(a) for a in args] or [1]
+    cache = BuildCache(enabled='--no-cache' not in argv)
+    profiler = Profiler.from_args(argv, 'generate-etappe-sql')
+    # De SQL komt uit tourpoule/stage_sql.py en de typo correcties uit names.py, dus die tellen mee in de versie
+    generator_version = text_hash(file_hash(__file__) + file_hash(stage_sql.__file__) + file_hash(names.__file__))[:16]
+
+    # De controle zoekt namen zonder rider_id op via de RiderIndex (typo's, speciale namen, diakrieten);
+    # de gevonden rider_id gaat mee de SQL in, want de SQL zelf matcht alleen exact
+    rider_index = available_rider_index()
+    riders_hash = file_hash(tables.RIDERS_FILE) if rider_index is not None else None
+
+    skipped = 0
+    for stage_number in stage_numbers:
+        # Read CSV (use fixed version if available)
+        csv_file = f'imports/etappe-{stage_number}-uitslag-fixed.csv'
+        if not os.path.exists(csv_file):
+            csv_file = f'imports/etappe-{stage_number}-uitslag.csv'
+        if not os.path.exists(csv_file):
+            print(f"❌ Etappe {stage_number}: {csv_file} niet gevonden")
+            continue
+
+        input_hash = file_hash(csv_file)
+        output_file = output_path(stage_number, output_mode)
+        entry = cache.load(cache_tool, stage_number)
+        fresh = (entry is not None and entry.get('input_file') == csv_file
+                 and entry.get('input_hash') == input_hash and entry.get('version') == generator_version
+                 and entry.get('chunk_size') == chunk_size and entry.get('riders_hash') == riders_hash)
+
+        if fresh and cache.output_is_current(entry, output_file):
+            print(f"⏭️  Etappe {stage_number}: ongewijzigd, overgeslagen")
+            skipped += 1
+            continue
+
+        if fresh:
+            riders = rows_to_records(entry['records'])
+        else:
+            with profiler.phase(f'etappe-{stage_number}-parse', allocations=True):
+                riders = stage_sql.read_stage(csv_file)
+            print(f"✓ {len(riders)} renners gelezen")
+
+        # Integriteitscontrole vóór het genereren: dubbele renners en onbekende namen verdwijnen anders stil in de SQL
+        with profiler.phase(f'etappe-{stage_number}-validate'):
+            report = validate_stage(riders, previous_out_of_race(stage_number), stage_number, rider_index)
+        if report.issues:
+            counts = ', '.join(f"{code}: {count}" for code, count in sorted(report.counts().items()))
+            print(f"{'❌' if report.errors else '⚠️ '} Etappe {stage_number}: {counts} (details: python imports/validate-stage.py {stage_number})")
+        if strict and not report.ok:
+            print(f"❌ Etappe {stage_number}: geen SQL gegenereerd (--strict)")
+            continue
+        if rider_index is not None:
+            filled = fill_rider_ids(riders, rider_index)
+            if filled:
+                print(f"✓ {filled} rider_id('s) op naam gevonden")
+
+        with profiler.phase(f'etappe-{stage_number}-{output_mode}'):
+            write_output(stage_number, riders, output_file, output_mode, chunk_size)
+        cache.store(cache_tool, stage_number, {
+            'input_file': csv_file,
+            'input_hash': input_hash,
+            'version': generator_version,
+            'chunk_size': chunk_size,
+            'riders_hash': riders_hash,
+            'records': records_to_rows(riders),
+            'output_hash': file_hash(output_file),
+        })
+
+        if output_mode == 'batch':
+            print(f"✓ Batch bestand gegenereerd: {output_file}")
+            if chunk_size:
+                print(f"  - Chunks van {chunk_size} rijen, elk een eigen transactie")
+            print(f"  Uitvoeren: python imports/run-batch-import.py {output_file}")
+        else:
+            print(f"✓ SQL script gegenereerd: {output_file}")
+        print(f"  - {len(riders)} renners")
+        print(f"  - {stage_sql.count_time_groups(riders)} verschillende tijd groepen")
+
+    if skipped:
+        print(f"\n⏭️  {skipped} van {len(stage_numbers)} etappe(s) ongewijzigd")
+    if profiler.enabled:
+        print(f"\n✓ Profiel geschreven: {profiler.write()}")
+
 
+if __name__ == '__main__':
+    main()
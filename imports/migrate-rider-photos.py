@@ -0,0 +1,105 @@
+"""
+Verplaats renner foto's van data URLs in riders.photo_url naar een statische cache (public/photos/)
+
+Gebruik:
+  python imports/migrate-rider-photos.py                          # data URLs uit de database
+  python imports/migrate-rider-photos.py --source=database_csv/riders.csv
+  python imports/migrate-rider-photos.py --images=imports/photos  # losse bestanden <rider_id>.jpg/.png/.webp
+  python imports/migrate-rider-photos.py --workers=4 --out=public/photos
+
+Dubbele foto's worden één keer opgeslagen (content hash). Thumbnails (40 en 80 px, WebP) vereisen
+Pillow (pip install pillow); zonder Pillow wordt het origineel in de cache gezet, net als voor een foto die
+Pillow niet kan lezen (die renners worden gemeld).
+Uitvoer: de cache map en imports/update-rider-photos.sql (photo_url -> /photos/...)
+
+Zonder --source/--images is psycopg2 nodig (pip install psycopg2-binary) en NEON_DATABASE_URL of DATABASE_URL
+"""
+
+import os
+import sys
+import time
+
+from tourpoule import photos
+
+OUTPUT_FILE = 'imports/update-rider-photos.sql'
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    output_dir = options.get('out', photos.DEFAULT_DIR)
+    workers = int(options['workers']) if 'workers' in options else None
+
+    if 'images' in options:
+        images, rider_keys = photos.collect_from_directory(options['images'])
+        source_bytes = sum(len(image.data) for image in images.values())
+        print(f"✓ Bestanden gelezen uit {options['images']}")
+    else:
+        if 'source' in options:
+            rows = photos.read_riders_photo_rows(options['source'])
+            print(f"✓ {len(rows)} renners gelezen uit {options['source']}")
+        else:
+            database_url = os.getenv('NEON_DATABASE_URL') or os.getenv('DATABASE_URL')
+            if not database_url:
+                print("❌ Database configuration missing!")
+                print("   Set NEON_DATABASE_URL or DATABASE_URL environment variable, or use --source=<riders.csv>")
+                exit(1)
+            try:
+                import psycopg2
+            except ImportError:
+                print("❌ psycopg2 is niet geïnstalleerd: pip install psycopg2-binary")
+                exit(1)
+            conn = psycopg2.connect(database_url)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT id, photo_url FROM riders WHERE photo_url LIKE 'data:%'")
+                    rows = [{'id': rider_id, 'photo_url': url} for rider_id, url in cur.fetchall()]
+            finally:
+                conn.close()
+            print(f"✓ {len(rows)} renners met een data URL gelezen uit de database")
+        images, rider_keys = photos.collect_from_rows(rows)
+        source_bytes = sum(len(row['photo_url']) for row in rows if int(row['id']) in rider_keys)
+
+    if not rider_keys:
+        print("✅ Geen foto's om te verplaatsen")
+        return
+
+    if photos.Image is None:
+        print("⚠️  Pillow is niet geïnstalleerd (pip install pillow): originelen worden zonder verkleinen opgeslagen")
+
+    started = time.perf_counter()
+    results = photos.build_cache(images, output_dir, workers)
+    elapsed = time.perf_counter() - started
+
+    failed = {key: error for key, (_, _, error) in results.items() if error is not None}
+    mimes = {key: image.mime for key, image in images.items()}
+    urls = {rider_id: photos.photo_url(key, mimes[key], rendered=key not in failed)
+            for rider_id, key in rider_keys.items()}
+    with open(OUTPUT_FILE, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(photos.update_sql(urls))
+
+    written = sum(w for w, _, _ in results.values())
+    skipped = sum(s for _, s, _ in results.values())
+    url_bytes = sum(len(url) for url in urls.values())
+
+    print(f"\n{'='*80}")
+    print("FOTO CACHE:")
+    print(f"{'='*80}")
+    print(f"  Renners met foto:    {len(rider_keys)}")
+    print(f"  Unieke foto's:       {len(images)}")
+    print(f"  Bestanden:           {len(images) * len(photos.SIZES) - skipped} geschreven, {skipped} al aanwezig "
+          f"({written / 1024:.1f} KB, {elapsed:.1f} s)")
+    print(f"  photo_url kolom:     {source_bytes / 1024:.1f} KB -> {url_bytes / 1024:.1f} KB")
+    if failed:
+        print(f"\n⚠️  {len(failed)} foto('s) niet te verkleinen, origineel opgeslagen:")
+        for key, error in failed.items():
+            riders = ', '.join(str(rider_id) for rider_id, k in sorted(rider_keys.items()) if k == key)
+            print(f"   Renner(s) {riders}: {error}")
+    print(f"\n✅ Cache: {output_dir}")
+    print(f"✅ SQL gegenereerd: {OUTPUT_FILE}")
+    print(f"   Uitvoeren: node imports/run-sql-script.js {OUTPUT_FILE}")
+
+
+# build_cache draait een process pool; bij spawn (Windows, macOS) importeren de workers dit script opnieuw
+if __name__ == '__main__':
+    main()
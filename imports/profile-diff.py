@@ -0,0 +1,61 @@
+"""
+Vergelijk twee profiel runs (--profile van fix-rider-ids.py, generate-etappe-1-sql.py,
+import-etappe-uitslag.py) per fase: wall time en de functies met het grootste verschil in self tijd
+
+Gebruik:
+  python imports/profile-diff.py imports/profiles/voor imports/profiles/na
+  python imports/profile-diff.py imports/profiles/voor imports/profiles/na --top=20
+
+Een run maken met een vaste naam: --profile --profile-name=voor
+Flame graph van één fase: flamegraph.pl imports/profiles/na/etappe-1-parse.collapsed > parse.svg
+Verschil als flame graph: difffolded.pl voor/etappe-1-parse.collapsed na/etappe-1-parse.collapsed | flamegraph.pl
+"""
+
+import os
+import sys
+
+from tourpoule.profiling import SUMMARY_NAME, diff_runs, load_run
+
+
+def format_ms(value):
+    return '-' if value is None else f"{value:.1f} ms"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    top = int(options.get('top', 10))
+
+    if len(args) != 2:
+        print("❌ Gebruik: python imports/profile-diff.py <run voor> <run na>")
+        exit(1)
+    for path in args:
+        if not os.path.exists(os.path.join(path, SUMMARY_NAME)):
+            print(f"❌ {path} is geen profiel run (geen {SUMMARY_NAME})")
+            exit(1)
+
+    before, after = load_run(args[0]), load_run(args[1])
+    if before['mode'] != after['mode']:
+        print(f"⚠️  Verschillende modes ({before['mode']} / {after['mode']}): "
+              "alleen de wall times zijn goed te vergelijken")
+
+    for name, phase in diff_runs(before, after, top).items():
+        wall_before, wall_after = phase['wall_ms']
+        print(f"\n{'='*80}")
+        if wall_before and wall_after:
+            change = (wall_after - wall_before) * 100 / wall_before
+            print(f"{name}: {format_ms(wall_before)} -> {format_ms(wall_after)} ({change:+.1f}%)")
+        else:
+            print(f"{name}: {format_ms(wall_before)} -> {format_ms(wall_after)}")
+        print(f"{'='*80}")
+        for function, self_before, self_after in phase['functions']:
+            print(f"  {self_after - self_before:+9.2f} ms  {self_before:9.2f} -> {self_after:9.2f}  {function}")
+
+        allocations = [run['phases'].get(name, {}).get('allocations') for run in (before, after)]
+        if all(allocations):
+            print(f"  Geheugen piek: {allocations[0]['peak_kb']} KB -> {allocations[1]['peak_kb']} KB")
+
+
+if __name__ == '__main__':
+    main()
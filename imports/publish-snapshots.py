@@ -0,0 +1,73 @@
+"""
+Publiceer statische JSON snapshots van standings, uitslagen, teampunten en statistieken
+
+Draai dit na de import en puntenberekening van een etappe. Per etappe komt in
+public/data/stage-<n>/ één bestand per endpoint met een content hash in de naam,
+public/data/manifest.json verwijst naar de actuele bestanden. De frontend (src/utils/api.js) leest ze
+via het manifest en valt terug op de functions voor etappes zonder snapshot.
+
+Gebruik:
+  python imports/publish-snapshots.py                 # laatste etappe met uitslag, uit de database
+  python imports/publish-snapshots.py 1 2 3           # specifieke etappes
+  python imports/publish-snapshots.py --source=database_csv/backup_2025-12-16_10-32-55
+
+Zonder --source is psycopg2 nodig (pip install psycopg2-binary) en NEON_DATABASE_URL of DATABASE_URL
+"""
+
+import os
+import sys
+
+from tourpoule import snapshots
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    output_dir = options.get('out', snapshots.DEFAULT_DIR)
+
+    if 'source' in options:
+        tables = snapshots.load_tables_from_csv(options['source'])
+        print(f"✓ Tabellen gelezen uit {options['source']}")
+    else:
+        database_url = os.getenv('NEON_DATABASE_URL') or os.getenv('DATABASE_URL')
+        if not database_url:
+            print("❌ Database configuration missing!")
+            print("   Set NEON_DATABASE_URL or DATABASE_URL environment variable, or use --source=<backup map>")
+            exit(1)
+        try:
+            import psycopg2
+        except ImportError:
+            print("❌ psycopg2 is niet geïnstalleerd: pip install psycopg2-binary")
+            exit(1)
+        conn = psycopg2.connect(database_url)
+        try:
+            tables = snapshots.load_tables_from_db(conn)
+        finally:
+            conn.close()
+        print("✓ Tabellen gelezen uit de database")
+
+    stage_numbers = [int(a) for a in args]
+    if not stage_numbers:
+        with_results = {r['stage_id'] for r in tables['stage_results']}
+        numbers = [s['stage_number'] for s in tables['stages'] if s['id'] in with_results]
+        if not numbers:
+            print("❌ Nog geen etappes met uitslag")
+            exit(1)
+        stage_numbers = [max(numbers)]
+
+    stage_urls = {}
+    for stage_number in stage_numbers:
+        bodies = snapshots.StageSnapshot(tables, stage_number).render()
+        stage_urls[stage_number] = snapshots.publish(bodies, stage_number, output_dir)
+        print(f"✓ Etappe {stage_number}: {len(bodies)} snapshots")
+        for endpoint, url in stage_urls[stage_number].items():
+            print(f"   - {endpoint:<20} {url}")
+
+    manifest = snapshots.update_manifest(stage_urls, output_dir)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    print(f"\n✅ Manifest bijgewerkt: {manifest_path} (laatste etappe {manifest['latestStageNumber']})")
+
+
+if __name__ == '__main__':
+    main()
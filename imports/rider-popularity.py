@@ -0,0 +1,47 @@
+"""
+Toon de populariteit van renners en de underdog exposure per team uit een database backup
+
+Gebruik:
+  python imports/rider-popularity.py
+  python imports/rider-popularity.py 0.1    # underdog = in hooguit 10% van de teams
+"""
+
+import sys
+
+from tourpoule.names import normalize_name
+from tourpoule.popularity import UNDERDOG_MAX_SHARE, PopularityIndex
+from tourpoule.records import read_riders_csv
+from tourpoule.reserves import TeamRiders
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    max_share = float(argv[0]) if argv else UNDERDOG_MAX_SHARE
+
+    riders = {r.id: r for r in read_riders_csv('database_csv/riders.csv', normalize_name)}
+    index = PopularityIndex.from_team_riders(TeamRiders.from_csv('database_csv/fantasy_team_riders.csv'))
+
+    print(f"✓ {index.team_count} teams, {len(riders)} renners")
+
+    print(f"\n{'='*80}")
+    print("MEEST GESELECTEERDE RENNERS:")
+    print(f"{'='*80}")
+    for rider_id, count, main, reserve in index.most_selected(10):
+        rider = riders.get(rider_id)
+        name = f"{rider.first_name} {rider.last_name}" if rider else f"Rider {rider_id}"
+        print(f"  {name:<35} {count:>4} teams ({main} main, {reserve} reserve)")
+
+    underdogs = index.underdogs(max_share)
+    print(f"\n{'='*80}")
+    print(f"UNDERDOG EXPOSURE (renners in ≤ {max_share:.0%} van de teams: {len(underdogs)}):")
+    print(f"{'='*80}")
+    exposure = sorted(
+        ((index.underdog_exposure(team_id, underdogs=underdogs), team_id) for team_id in index.team_ids()),
+        reverse=True,
+    )
+    for count, team_id in exposure[:10]:
+        print(f"  Team {team_id:<6} {count} underdog(s)")
+
+
+if __name__ == '__main__':
+    main()
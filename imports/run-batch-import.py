@@ -0,0 +1,84 @@
+"""
+Voer een batch bestand (prepared statement + parameter batches) uit tegen de database
+
+Gebruik:
+  python imports/run-batch-import.py imports/import-etappe-1-uitslag.batch.jsonl
+  python imports/run-batch-import.py imports/import-etappe-*-uitslag.batch.jsonl --workers=4
+  python imports/run-batch-import.py imports/import-etappe-1-uitslag.batch.jsonl --restart
+
+Bestanden met --chunk gegenereerd committen per chunk en gaan bij een nieuwe run verder na de
+laatste gecommitte chunk (--restart begint vooraan). Verschillende etappes kunnen met --workers
+tegelijk draaien, elk met een eigen verbinding.
+
+Vereist psycopg2 (pip install psycopg2-binary) en NEON_DATABASE_URL of DATABASE_URL
+"""
+
+import os
+import sys
+
+from tourpoule import sql_batch
+
+
+def progress(path, chunk, chunks, rows):
+    if chunk:
+        print(f"  [{os.path.basename(path)}] chunk {chunk}/{chunks} gecommit ({rows} rijen)")
+    else:
+        print(f"  [{os.path.basename(path)}] setup gecommit")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    batch_files = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    resume = '--restart' not in argv
+    workers = int(options.get('workers', 1))
+
+    if not batch_files:
+        print("❌ Geef een batch bestand op")
+        print("Gebruik: python imports/run-batch-import.py imports/import-etappe-1-uitslag.batch.jsonl")
+        exit(1)
+
+    database_url = os.getenv('NEON_DATABASE_URL') or os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ Database configuration missing!")
+        print("   Set NEON_DATABASE_URL or DATABASE_URL environment variable")
+        exit(1)
+
+    try:
+        import psycopg2
+    except ImportError:
+        print("❌ psycopg2 is niet geïnstalleerd: pip install psycopg2-binary")
+        exit(1)
+
+    for batch_file in batch_files:
+        header = sql_batch.read_batch_header(batch_file)
+        chunked = header.get('transaction') == sql_batch.CHUNK
+        print(f"✓ Batch bestand gelezen: {batch_file}")
+        print(f"  - Statement: {header['name']} ({header['total_rows']} rijen)")
+        if chunked:
+            chunks = sql_batch.chunk_count(header)
+            print(f"  - {chunks} chunk(s) van max {header['batch_size']} rijen, elk een eigen transactie")
+            if resume and os.path.exists(sql_batch.progress_path(batch_file)):
+                print("  - Hervat na de laatste gecommitte chunk")
+
+    results = sql_batch.execute_batch_files(lambda: psycopg2.connect(database_url), batch_files,
+                                            workers=workers, resume=resume, progress=progress)
+
+    failed = 0
+    for batch_file, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"❌ {batch_file}: import mislukt: {result}")
+            if os.path.exists(sql_batch.progress_path(batch_file)):
+                print("   Gecommitte chunks blijven staan; nogmaals uitvoeren gaat verder waar het stopte")
+            else:
+                print("   Niets opgeslagen")
+        else:
+            print(f"✅ {batch_file}: {result} rijen verstuurd")
+
+    if failed:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Scoor alle fantasy teams voor een of meer etappes, verdeeld over meerdere processen
+
+Gebruik:
+  python imports/score-league.py                       # etappe 1, één worker per core
+  python imports/score-league.py 1 2 3 --workers=4
+  python imports/score-league.py 1 --synthetic=100000  # doorvoer meten met een gegenereerde league
+  python imports/score-league.py 1 --source=database_csv/backup_2025-12-16_10-32-55
+
+Invoer: imports/etappe-<n>-uitslag-fixed.csv, fantasy_team_riders.csv (de opstelling vóór de eerste
+etappe; reserve activaties worden per etappe opnieuw uitgerekend, zoals in team-comparison.py),
+fantasy_teams.csv, de scoring rules en de truidragers, uit --source of database_csv/ (met de backup in
+de repo als fallback). De punten per renner en de team samenstelling staan één keer per
+opstelling in shared memory (tourpoule/shared_scoring.py); workers scoren elk een shard van de teams.
+Uitvoer: imports/league-points.csv (participant_id, stage_number, points_stage)
+"""
+
+import csv
+import os
+import random
+import sys
+import time
+
+from tourpoule import tables
+from tourpoule.records import read_stage_results_csv
+from tourpoule.reserves import TeamRiders, stage_rosters
+from tourpoule.scoring import read_stage_scoring, stage_rider_points
+from tourpoule.shared_scoring import (
+    DEFAULT_SHARD_SIZE, ScoringInput, score_parallel, score_serial, score_stage_rosters,
+)
+
+OUTPUT_FILE = 'imports/league-points.csv'
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    stage_numbers = [int(a) for a in args] or [1]
+    workers = int(options.get('workers', os.cpu_count() or 1))
+    shard_size = int(options.get('shard', DEFAULT_SHARD_SIZE))
+    synthetic = int(options.get('synthetic', 0))
+    source = options.get('source')
+    teams_file = tables.data_file('fantasy_teams.csv', source)
+
+    position_points, jersey_points, jersey_wearers = read_stage_scoring(source)
+    stage_records = {}
+    stage_points = {}
+    for stage_number in stage_numbers:
+        input_file = f'imports/etappe-{stage_number}-uitslag-fixed.csv'
+        if not os.path.exists(input_file):
+            print(f"❌ {input_file} niet gevonden (eerst fix-rider-ids.py draaien)")
+            exit(1)
+        stage_records[stage_number] = read_stage_results_csv(input_file)
+        stage_points[stage_number] = stage_rider_points(
+            stage_records[stage_number], position_points, jersey_wearers.get(stage_number, ()), jersey_points,
+        )
+        print(f"✓ Etappe {stage_number}: {len(stage_points[stage_number])} renners met punten")
+
+    team_riders = TeamRiders.from_csv(tables.data_file('fantasy_team_riders.csv', source))
+
+    if synthetic:
+        # Teams van 10 hoofdrenners uit de renners die in de echte teams voorkomen
+        random.seed(synthetic)
+        pool = sorted(set(team_riders.rider_id))
+        data = ScoringInput.from_members({team: random.sample(pool, 10) for team in range(1, synthetic + 1)}, stage_points)
+        print(f"✓ Synthetische league: {len(data)} teams")
+
+        started = time.perf_counter()
+        expected = score_serial(data)
+        serial_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        result = score_parallel(data, workers, shard_size)
+        parallel_seconds = time.perf_counter() - started
+        if result != expected:
+            print("❌ Parallelle uitkomst wijkt af van de seriële")
+            exit(1)
+
+        print(f"\n{'='*80}")
+        print(f"DOORVOER ({len(data)} teams x {len(stage_numbers)} etappe(s)):")
+        print(f"{'='*80}")
+        print(f"  1 proces:     {serial_seconds:7.2f} s  ({len(data) / serial_seconds:,.0f} teams/s)")
+        print(f"  {workers} worker(s):  {parallel_seconds:7.2f} s  ({len(data) / parallel_seconds:,.0f} teams/s)")
+        print(f"  Versnelling:  {serial_seconds / parallel_seconds:.2f}x")
+        return
+
+    # fantasy_team_id -> participant_id
+    team_keys = None
+    if os.path.exists(teams_file):
+        with open(teams_file, 'r', encoding='utf-8') as f:
+            team_keys = {int(row['id']): int(row['participant_id']) for row in csv.DictReader(f)}
+    else:
+        print(f"⚠️  {teams_file} niet gevonden, keys zijn fantasy_team_id's")
+
+    # De opstelling per etappe: reserves die na een etappe geactiveerd zijn scoren vanaf die etappe mee
+    rosters = stage_rosters(team_riders, stage_records)
+    started = time.perf_counter()
+    stage_numbers, result = score_stage_rosters(rosters, stage_points, team_keys, workers, shard_size)
+    elapsed = time.perf_counter() - started
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['participant_id', 'stage_number', 'points_stage'])
+        for key in result:
+            for stage_number, points in zip(stage_numbers, result[key]):
+                writer.writerow([key, stage_number, points])
+
+    print(f"\n{'='*80}")
+    roster_count = len({id(roster) for roster in rosters.values()})
+    print(f"PUNTEN ({len(result)} teams, {roster_count} opstelling(en), {elapsed * 1000:.0f} ms):")
+    print(f"{'='*80}")
+    for key in sorted(result, key=lambda k: -sum(result[k]))[:10]:
+        print(f"  {key:<6} {sum(result[key]):>4} pnt  {result[key]}")
+    print(f"\n✓ Punten geschreven: {OUTPUT_FILE}")
+
+
+# De workers importeren dit script opnieuw bij de spawn start methode (Windows, macOS)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Synchroniseer de riders tabel met de start lijst uit de PDF (imports/riders-from-pdf.csv)
+
+Gebruik:
+  python imports/sync-roster.py                # inserts, updates en retirements
+  python imports/sync-roster.py --no-retire    # renners die niet op de lijst staan met rust laten
+  python imports/sync-roster.py --source=database_csv/backup_2025-12-16_10-32-55
+
+Invoer: imports/riders-from-pdf.csv, riders.csv en teams_pro.csv uit --source (anders database_csv/ of de
+backup), imports/teams_pro.csv voor de teamcodes.
+Uitvoer: imports/sync-riders.sql met één INSERT ... ON CONFLICT (id) DO UPDATE voor alleen de wijzigingen.
+"""
+
+import csv
+import os
+import sys
+
+from tourpoule import tables
+from tourpoule.names import normalize_name
+from tourpoule.records import read_riders_csv
+from tourpoule.roster import INSERT, RETIRE, UPDATE, TeamLookup, diff_roster, read_start_list, upsert_sql
+
+START_LIST_FILE = 'imports/riders-from-pdf.csv'
+TEAM_CODES_FILE = 'imports/teams_pro.csv'
+OUTPUT_FILE = 'imports/sync-riders.sql'
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    riders_file = tables.data_file('riders.csv', options.get('source'))
+    teams_file = tables.data_file('teams_pro.csv', options.get('source'))
+    for path in (riders_file, teams_file):
+        if not os.path.exists(path):
+            print(f"❌ {path} niet gevonden")
+            exit(1)
+
+    codes = {row['name']: row['code'] for row in read_csv(TEAM_CODES_FILE)}
+    teams = TeamLookup(read_csv(teams_file), codes)
+    start_list = read_start_list(START_LIST_FILE, teams)
+    db_riders = read_riders_csv(riders_file, normalize_name)
+
+    print(f"✓ {len(start_list)} renners op de start lijst, {len(db_riders)} in de database")
+
+    unknown_teams = sorted({r.team_name for r in start_list if r.team_pro_id is None})
+    if unknown_teams:
+        print(f"⚠️  {len(unknown_teams)} onbekende team(s), deze renners krijgen geen team_pro_id:")
+        for name in unknown_teams:
+            print(f"   - {name}")
+
+    changes = diff_roster(db_riders, start_list, retire='--no-retire' not in argv)
+
+    print(f"\n{'='*80}")
+    print("WIJZIGINGEN:")
+    print(f"{'='*80}")
+    for kind, label in ((UPDATE, 'Updates'), (INSERT, 'Nieuwe renners'), (RETIRE, 'Retirements')):
+        selected = [c for c in changes if c.kind == kind]
+        print(f"  {label}: {len(selected)}")
+        for c in selected[:20]:
+            rider = f"{c.rider_id}" if c.rider_id is not None else 'nieuw'
+            print(f"     [{rider}] {c.first_name} {c.last_name}: {c.reason}")
+        if len(selected) > 20:
+            print(f"     ... en {len(selected) - 20} meer")
+
+    if not changes:
+        print("\n✅ Riders tabel is al gelijk aan de start lijst, geen SQL nodig")
+        if os.path.exists(OUTPUT_FILE):
+            os.remove(OUTPUT_FILE)
+        return
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(upsert_sql(changes))
+    print(f"\n✅ SQL gegenereerd: {OUTPUT_FILE} ({len(changes)} rij(en))")
+
+
+if __name__ == '__main__':
+    main()
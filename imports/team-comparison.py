@@ -0,0 +1,82 @@
+"""
+Bereken de team vergelijking (overlap en puntenverschil) voor alle teams na een etappe
+
+Gebruik:
+  python imports/team-comparison.py              # etappe 1
+  python imports/team-comparison.py 1 2 3        # punten over meerdere etappes
+  python imports/team-comparison.py 1 --top=10   # 10 meest vergelijkbare teams per deelnemer
+  python imports/team-comparison.py 1 --source=database_csv/backup_2025-12-16_10-32-55
+
+Invoer: imports/etappe-<n>-uitslag-fixed.csv, fantasy_team_riders.csv (de opstelling vóór de eerste etappe;
+reserve activaties worden per etappe opnieuw uitgerekend), fantasy_teams.csv (voor de participant_id's),
+scoring_rules.csv, jerseys.csv en de truidragers (stage_jersey_wearers.csv, stages.csv). De tabellen komen
+uit --source, anders uit database_csv/ (met de backup in de repo als fallback).
+Uitvoer: imports/team-comparison-etappe-<laatste etappe>.json
+"""
+
+import csv
+import os
+import sys
+
+from tourpoule import tables
+from tourpoule.comparison import TOP_K, TeamComparison
+from tourpoule.records import read_stage_results_csv
+from tourpoule.reserves import TeamRiders, stage_rosters
+from tourpoule.scoring import read_stage_scoring, stage_rider_points
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    stage_numbers = [int(a) for a in args] or [1]
+    top_k = TOP_K
+    for arg in argv:
+        if arg.startswith('--top='):
+            top_k = int(arg.split('=', 1)[1])
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    source = options.get('source')
+    teams_file = tables.data_file('fantasy_teams.csv', source)
+
+    position_points, jersey_points, jersey_wearers = read_stage_scoring(source)
+    stage_records = {}
+    stage_points = {}
+    for stage_number in stage_numbers:
+        input_file = f'imports/etappe-{stage_number}-uitslag-fixed.csv'
+        if not os.path.exists(input_file):
+            print(f"❌ {input_file} niet gevonden (eerst fix-rider-ids.py draaien)")
+            exit(1)
+        stage_records[stage_number] = read_stage_results_csv(input_file)
+        stage_points[stage_number] = stage_rider_points(
+            stage_records[stage_number], position_points, jersey_wearers.get(stage_number, ()), jersey_points,
+        )
+        print(f"✓ Etappe {stage_number}: {len(stage_points[stage_number])} renners met punten")
+
+    # fantasy_team_id -> participant_id (de vergelijkingspagina werkt met participantId)
+    team_keys = None
+    if os.path.exists(teams_file):
+        with open(teams_file, 'r', encoding='utf-8') as f:
+            team_keys = {int(row['id']): int(row['participant_id']) for row in csv.DictReader(f)}
+    else:
+        print(f"⚠️  {teams_file} niet gevonden, keys zijn fantasy_team_id's")
+
+    # De opstelling per etappe: reserves die na een etappe geactiveerd zijn scoren vanaf die etappe mee
+    team_riders = TeamRiders.from_csv(tables.data_file('fantasy_team_riders.csv', source))
+    rosters = stage_rosters(team_riders, stage_records)
+    comparison = TeamComparison.from_team_riders(rosters[stage_numbers[-1]], stage_points, team_keys,
+                                                 stage_rosters=rosters)
+    comparison.compute_similar(top_k)
+
+    output_file = f'imports/team-comparison-etappe-{stage_numbers[-1]}.json'
+    comparison.save(output_file)
+
+    print(f"\n{'='*80}")
+    print(f"TEAM VERGELIJKING ({len(comparison)} teams, top {top_k}):")
+    print(f"{'='*80}")
+    for key in comparison.teams()[:10]:
+        similar = ', '.join(f"{other} ({overlap})" for other, overlap in comparison.similar[key])
+        print(f"  {key:<6} {comparison.total_points(key):>4} pnt  lijkt op: {similar}")
+    print(f"\n✓ Vergelijking geschreven: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Shared helpers for the Python import scripts in imports/
+
+The package can also be used as a library (notebook, other tooling): the
+names below are importable from `tourpoule` directly, but a submodule is only
+imported the first time one of its names is used. `import tourpoule` itself
+costs nothing, and the heavier parts (multiprocessing, shared memory, process
+pools) are only loaded by the tools that need them.
+
+    import tourpoule
+    riders, unreadable = tourpoule.parse_results(open('uitslag.txt').read())
+    tourpoule.resolve_stage(riders, tourpoule.rider_index())
+
+Data tables (riders.csv, scoring rules) are loaded on first use and cached,
+see tables.py.
+"""
+
+import importlib
+
+_EXPORTS = {
+    # records
+    'ResultRecord': 'records',
+    'RiderRecord': 'records',
+    'Status': 'records',
+    'read_riders_csv': 'records',
+    'read_stage_results_csv': 'records',
+    'write_stage_results_csv': 'records',
+    # namen en resolutie
+    'normalize_name': 'names',
+    'RiderIndex': 'resolve',
+    'resolve_stage': 'resolve',
+    # uitslag -> records -> SQL
+    'apply_stage_times': 'times',
+    'parse_results': 'result_import',
+    'read_stage': 'stage_sql',
+    'generate_sql': 'stage_sql',
+    'validate_stage': 'integrity',
+    # punten
+    'read_position_points': 'scoring',
+    'read_jersey_points': 'scoring',
+    'read_jersey_wearers': 'scoring',
+    'stage_rider_points': 'scoring',
+    # gecachte tabellen
+    'riders': 'tables',
+    'rider_index': 'tables',
+    'position_points': 'tables',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # Volgende keer gewoon een attribuut, zonder __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,173 @@
+"""
+Multi-season backfill of historical stage results.
+
+Input is one directory per season with the same CSV files as a normal import:
+
+    imports/history/<season>/etappe-<n>-uitslag.csv
+    imports/history/<season>/riders.csv          (optional, else database_csv/riders.csv)
+
+Every (season, stage) is an independent task for a process pool. A worker
+parses and resolves the stage and writes `<output>/<season>/stage-<n>.csv`
+atomically; the parent appends a line to `<output>/progress.jsonl` once the
+file is in place. A rerun skips every task whose input and output hashes
+match the journal, so an interrupted backfill continues where it stopped.
+When all stages of a season are done, `<output>/<season>/rider-ids.csv` gets
+the resolved name -> rider_id mapping of that season.
+"""
+
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from .build_cache import file_hash
+from .journal import Journal
+from .names import normalize_name
+from .records import read_riders_csv, read_stage_results_csv, write_stage_results_csv
+from .resolve import RiderIndex, resolve_stage
+
+HISTORY_DIR = os.path.join('imports', 'history')
+OUTPUT_DIR = os.path.join('imports', 'history-out')
+DEFAULT_RIDERS_FILE = os.path.join('database_csv', 'riders.csv')
+JOURNAL_NAME = 'progress.jsonl'
+
+STAGE_FILE_PATTERN = re.compile(r'^etappe-(\d+)-uitslag\.csv$')
+
+
+@dataclass(slots=True, frozen=True)
+class BackfillTask:
+    season: str
+    stage_number: int
+    input_path: str
+    riders_path: str
+
+    @property
+    def key(self):
+        return f'{self.season}/{self.stage_number}'
+
+    def output_path(self, output_dir):
+        return os.path.join(output_dir, self.season, f'stage-{self.stage_number}.csv')
+
+
+def discover_tasks(history_dir=HISTORY_DIR, seasons=None):
+    """Alle (seizoen, etappe) combinaties in de history map, gesorteerd"""
+    tasks = []
+    for season in sorted(os.listdir(history_dir)):
+        season_dir = os.path.join(history_dir, season)
+        if not os.path.isdir(season_dir) or (seasons and season not in seasons):
+            continue
+        riders_path = os.path.join(season_dir, 'riders.csv')
+        if not os.path.exists(riders_path):
+            riders_path = DEFAULT_RIDERS_FILE
+        for name in os.listdir(season_dir):
+            match = STAGE_FILE_PATTERN.match(name)
+            if match:
+                tasks.append(BackfillTask(season, int(match.group(1)), os.path.join(season_dir, name), riders_path))
+    tasks.sort(key=lambda t: (t.season, t.stage_number))
+    return tasks
+
+
+def is_done(task, entry, output_dir):
+    """Staat deze taak in het journal met dezelfde input en een ongewijzigde output?"""
+    return (
+        entry is not None
+        and entry['input_hash'] == file_hash(task.input_path)
+        and entry['riders_hash'] == file_hash(task.riders_path)
+        and entry['output_hash'] == file_hash(task.output_path(output_dir))
+    )
+
+
+# Per worker proces één RiderIndex per riders bestand
+_indexes = {}
+
+
+def _index(riders_path):
+    if riders_path not in _indexes:
+        _indexes[riders_path] = RiderIndex(read_riders_csv(riders_path, normalize_name))
+    return _indexes[riders_path]
+
+
+def run_task(task, output_dir):
+    """Parse + resolve één etappe en schrijf de output (draait in een worker)"""
+    records = read_stage_results_csv(task.input_path)
+    corrections, _ = resolve_stage(records, _index(task.riders_path))
+
+    output_path = task.output_path(output_dir)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    write_stage_results_csv(tmp_path, records)
+    os.replace(tmp_path, output_path)
+
+    return {
+        'key': task.key,
+        'season': task.season,
+        'stage_number': task.stage_number,
+        'input_hash': file_hash(task.input_path),
+        'riders_hash': file_hash(task.riders_path),
+        'output_hash': file_hash(output_path),
+        'rows': len(records),
+        'unresolved': sum(1 for r in records if r.rider_id is None),
+        'corrections': len(corrections),
+    }
+
+
+def write_season_rider_ids(season, tasks, output_dir):
+    """<output>/<season>/rider-ids.csv: elke opgeloste naam van het seizoen met zijn rider_id"""
+    rider_ids = {}
+    for task in tasks:
+        for r in read_stage_results_csv(task.output_path(output_dir)):
+            if r.rider_id is not None:
+                rider_ids.setdefault((r.first_name, r.last_name), r.rider_id)
+    path = os.path.join(output_dir, season, 'rider-ids.csv')
+    with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['first_name', 'last_name', 'rider_id'])
+        for (first_name, last_name), rider_id in sorted(rider_ids.items(), key=lambda item: item[1]):
+            writer.writerow([first_name, last_name, rider_id])
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def run_backfill(tasks, output_dir=OUTPUT_DIR, workers=None, resume=True, progress=None):
+    """Voer de taken uit over een process pool; geeft (done, skipped, failed) terug
+
+    progress(entry_or_error, finished, total) wordt na elke taak aangeroepen.
+    """
+    journal = Journal(os.path.join(output_dir, JOURNAL_NAME))
+    entries = journal.load() if resume else {}
+    pending = [t for t in tasks if not is_done(t, entries.get(t.key), output_dir)]
+    skipped = len(tasks) - len(pending)
+
+    done = []
+    failed = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_task, task, output_dir): task for task in pending}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failed.append((task, e))
+                    if progress:
+                        progress(e, skipped + len(done) + len(failed), len(tasks))
+                    continue
+                journal.append(entry)
+                done.append(entry)
+                if progress:
+                    progress(entry, skipped + len(done) + len(failed), len(tasks))
+
+    # Seizoenen waarvan alle etappes klaar zijn krijgen een (nieuwe) rider-ids.csv
+    failed_seasons = {task.season for task, _ in failed}
+    changed_seasons = {entry['season'] for entry in done}
+    by_season = {}
+    for task in tasks:
+        by_season.setdefault(task.season, []).append(task)
+    for season, season_tasks in by_season.items():
+        if season in failed_seasons:
+            continue
+        if season in changed_seasons or not os.path.exists(os.path.join(output_dir, season, 'rider-ids.csv')):
+            write_season_rider_ids(season, season_tasks, output_dir)
+
+    return done, skipped, failed
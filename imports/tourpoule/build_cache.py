@@ -0,0 +1,97 @@
+"""
+Content-hash build cache for the import scripts.
+
+Per tool and stage one JSON entry is kept in imports/.build-cache/ with the
+hash of every input file, the version of the code/tables that produced it and
+the results (parsed records, resolutions, generated SQL). A rerun with the
+same hashes reuses the entry; when only riders.csv changed, the recorded
+lookups are re-checked so only stages whose resolutions are affected rerun.
+"""
+
+import hashlib
+import json
+import os
+
+from .records import ResultRecord, Status
+
+DEFAULT_DIR = os.path.join('imports', '.build-cache')
+
+
+def file_hash(path):
+    """sha256 van de inhoud van een bestand (None als het niet bestaat)"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def records_to_rows(records):
+    return [
+        [r.position, r.first_name, r.last_name, r.rider_id, r.team_name, r.time_seconds, int(r.status), r.name_corrected]
+        for r in records
+    ]
+
+
+def rows_to_records(rows):
+    return [
+        ResultRecord(position, first_name, last_name, rider_id, team_name, time_seconds, Status(status), name_corrected)
+        for position, first_name, last_name, rider_id, team_name, time_seconds, status, name_corrected in rows
+    ]
+
+
+def changed_dependencies(deps, index):
+    """Lookups waarvan de riders tabel nu een ander antwoord geeft"""
+    return [dep for dep, expected in deps.items() if index.fingerprint(dep) != expected]
+
+
+class BuildCache:
+    """Eén JSON bestand per (tool, etappe)"""
+
+    def __init__(self, directory=DEFAULT_DIR, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    def _path(self, tool, stage_number):
+        return os.path.join(self.directory, tool, f'stage-{stage_number}.json')
+
+    def load(self, tool, stage_number):
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(tool, stage_number), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def store(self, tool, stage_number, entry):
+        if not self.enabled:
+            return
+        path = self._path(tool, stage_number)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def output_is_current(self, entry, output_file):
+        """Staat de eerder geschreven output nog ongewijzigd op schijf?"""
+        return entry is not None and file_hash(output_file) == entry.get('output_hash')
+
+
+def resolution_is_fresh(entry, input_hash, version, riders_hash, index):
+    """Kan een gecachte resolutie hergebruikt worden?
+
+    Geeft (fresh, changed_deps) terug. Bij een gewijzigde riders tabel blijft de
+    entry geldig zolang geen van de lookups van deze etappe een ander antwoord geeft.
+    """
+    if entry is None or entry.get('input_hash') != input_hash or entry.get('version') != version:
+        return False, []
+    if entry.get('riders_hash') == riders_hash:
+        return True, []
+    changed = changed_dependencies(entry.get('deps', {}), index)
+    return not changed, changed
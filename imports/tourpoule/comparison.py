@@ -0,0 +1,161 @@
+"""
+Pairwise team comparison, computed once per stage.
+
+Every team's riders are encoded as a bitset over rider_id (a Python int, bit n
+= rider n), so the overlap of two teams is `(a & b).bit_count()`. Points per
+stage (position and jersey points) are summed once per team, over the main
+riders that were active in that stage; the difference between two teams is
+then a subtraction. The result (bitsets, points per stage and the top-K most similar
+teams) is written to one JSON file, so a comparison page is a lookup instead
+of the queries in get-team-comparison.js.
+"""
+
+import heapq
+import json
+
+FORMAT = 'tourpoule-comparison/1'
+TOP_K = 5
+
+
+def rider_ids(mask):
+    """De rider_id's in een bitset, oplopend"""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+def mask_points(mask, rider_points):
+    """Som van de punten van de renners in een bitset (loopt over de renners met punten)"""
+    return sum(points for rider_id, points in rider_points.items() if mask >> rider_id & 1)
+
+
+def _team_masks(team_riders, team_keys, active_only):
+    """({key: bitset van de renners}, {key: bitset van de main renners})"""
+    riders = {}
+    mains = {}
+    for i in range(len(team_riders)):
+        if active_only and not team_riders.active[i]:
+            continue
+        team_id = team_riders.fantasy_team_id[i]
+        key = team_keys.get(team_id, team_id) if team_keys else team_id
+        bit = 1 << team_riders.rider_id[i]
+        riders[key] = riders.get(key, 0) | bit
+        if team_riders.is_main[i]:
+            mains[key] = mains.get(key, 0) | bit
+    return riders, mains
+
+
+class TeamComparison:
+    def __init__(self, stage_numbers=()):
+        self.stage_numbers = list(stage_numbers)
+        self.riders = {}   # team -> bitset van alle actieve renners
+        self.mains = {}    # team -> bitset van de actieve main renners (die scoren)
+        self.points = {}   # team -> punten per etappe, in de volgorde van stage_numbers
+        self.similar = {}  # team -> [(ander team, overlap)], na compute_similar()
+
+    @classmethod
+    def from_team_riders(cls, team_riders, stage_points, team_keys=None, active_only=True, stage_rosters=None):
+        """Bouw de bitsets uit een TeamRiders snapshot
+
+        stage_points = {stage_number: {rider_id: punten}}. team_keys mapt
+        fantasy_team_id naar de key in het resultaat (bv. participant_id).
+        stage_rosters = {stage_number: TeamRiders} (reserves.stage_rosters): de
+        punten van een etappe tellen dan voor de main renners die toen actief
+        waren; zonder geldt team_riders voor elke etappe.
+        """
+        comparison = cls(sorted(stage_points))
+        comparison.riders, comparison.mains = _team_masks(team_riders, team_keys, active_only)
+
+        # Eén set main bitsets per verschillende snapshot (ongewijzigde etappes delen er een)
+        stage_mains = {}
+        masks_by_roster = {id(team_riders): comparison.mains}
+        for n in comparison.stage_numbers:
+            roster = (stage_rosters or {}).get(n, team_riders)
+            if id(roster) not in masks_by_roster:
+                masks_by_roster[id(roster)] = _team_masks(roster, team_keys, active_only=True)[1]
+            stage_mains[n] = masks_by_roster[id(roster)]
+
+        for key in comparison.riders:
+            comparison.mains.setdefault(key, 0)
+            comparison.points[key] = [
+                mask_points(stage_mains[n].get(key, 0), stage_points[n]) for n in comparison.stage_numbers
+            ]
+        return comparison
+
+    def __len__(self):
+        return len(self.riders)
+
+    def teams(self):
+        return sorted(self.riders)
+
+    def overlap(self, a, b):
+        return (self.riders[a] & self.riders[b]).bit_count()
+
+    def common_riders(self, a, b):
+        return rider_ids(self.riders[a] & self.riders[b])
+
+    def total_points(self, team):
+        return sum(self.points[team])
+
+    def points_diff(self, a, b):
+        """Puntenverschil a - b per etappe"""
+        return [pa - pb for pa, pb in zip(self.points[a], self.points[b])]
+
+    def compute_similar(self, k=TOP_K):
+        """Top-k teams met de meeste gedeelde renners, voor elk team
+
+        Per team één rij popcounts tegen alle andere teams (n² AND + bit_count
+        op kleine ints) en een heap selectie; bij gelijke overlap wint de
+        laagste key.
+        """
+        keys = self.teams()
+        masks = [self.riders[key] for key in keys]
+        for i, mask in enumerate(masks):
+            row = [(mask & other).bit_count() for other in masks]
+            row[i] = -1
+            best = heapq.nlargest(k, range(len(keys)), key=row.__getitem__)
+            self.similar[keys[i]] = [(keys[j], row[j]) for j in best if row[j] >= 0]
+        return self.similar
+
+    def to_json(self):
+        return {
+            'format': FORMAT,
+            'stages': self.stage_numbers,
+            'teams': {
+                str(key): {
+                    'riders': format(self.riders[key], 'x'),
+                    'main': format(self.mains[key], 'x'),
+                    'points': self.points[key],
+                    'similar': [
+                        [other, overlap, self.total_points(key) - self.total_points(other)]
+                        for other, overlap in self.similar.get(key, ())
+                    ],
+                }
+                for key in self.teams()
+            },
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('format') != FORMAT:
+            raise ValueError(f"Onbekend formaat: {data.get('format')!r}")
+        comparison = cls(data['stages'])
+        for key, team in data['teams'].items():
+            key = int(key)
+            comparison.riders[key] = int(team['riders'], 16)
+            comparison.mains[key] = int(team['main'], 16)
+            comparison.points[key] = team['points']
+            comparison.similar[key] = [(other, overlap) for other, overlap, _ in team['similar']]
+        return comparison
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
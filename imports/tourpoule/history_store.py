@@ -0,0 +1,221 @@
+"""
+Columnar history of the per-stage team points.
+
+fantasy_stage_points has one row per participant per stage. The store keeps
+the same numbers as a matrix in one binary file, one block per stage:
+
+    points.bin   block s = points of every team in stage s, in team order
+    index.json   format, typecode, team order (participant_id's) and the
+                 stage blocks in order (stage_number, stage_id)
+
+Stage points are the deltas of the cumulative standing, so every team's
+series is a delta-encoded column: the team's history is one strided slice
+`data[column::n_teams]` and its running total the prefix sum of that slice. A
+whole stage across all teams is one contiguous slice. The width of an item
+('b', 'h' or 'i') is the smallest that fits, so a Tour of 21 stages costs
+21 * 2 bytes per team.
+
+Adding a stage only appends its block and rewrites the small index. A stage
+that is already in the store is overwritten in place (corrections); a stage
+before the last one or a new participant needs a rebuild (ValueError). The
+index is written last: after a crash in between, open() cuts points.bin back
+to the blocks the index knows.
+"""
+
+import heapq
+import json
+import os
+from array import array
+from itertools import accumulate
+
+FORMAT = 'tourpoule-history/1'
+DEFAULT_DIR = os.path.join('imports', 'history-store')
+DATA_NAME = 'points.bin'
+INDEX_NAME = 'index.json'
+
+# Van smal naar breed; de eerste waar alle waarden in passen wordt gebruikt
+TYPECODES = ('b', 'h', 'i')
+
+
+def typecode_for(values, current='b'):
+    """Kleinste typecode (minstens current) waar alle waarden in passen"""
+    low, high = min(values, default=0), max(values, default=0)
+    for code in TYPECODES[TYPECODES.index(current):]:
+        bits = array(code).itemsize * 8
+        if -(1 << (bits - 1)) <= low and high < (1 << (bits - 1)):
+            return code
+    raise ValueError(f"Punten buiten bereik: {low}..{high}")
+
+
+def stage_points_from_rows(rows, stages):
+    """fantasy_stage_points rijen -> {stage_number: {participant_id: punten}}
+
+    stages: rijen van de stages tabel (voor stage_id -> stage_number).
+    """
+    stage_numbers = {s['id']: s['stage_number'] for s in stages}
+    by_stage = {}
+    for row in rows:
+        stage_number = stage_numbers[row['stage_id']]
+        by_stage.setdefault(stage_number, {})[row['participant_id']] = row['total_points'] or 0
+    return by_stage
+
+
+class HistoryStore:
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.teams = []
+        self.stages = []
+        self.typecode = 'b'
+        self.data = array('b')
+        self.columns = {}
+        self.blocks = {}
+
+    @property
+    def data_path(self):
+        return os.path.join(self.directory, DATA_NAME)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_NAME)
+
+    def _reindex(self):
+        self.columns = {team: i for i, team in enumerate(self.teams)}
+        self.blocks = {stage['stage_number']: i for i, stage in enumerate(self.stages)}
+
+    @classmethod
+    def open(cls, directory=DEFAULT_DIR):
+        store = cls(directory)
+        with open(store.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('format') != FORMAT:
+            raise ValueError(f"Onbekend formaat in {store.index_path}: {index.get('format')!r}")
+        store.teams = index['teams']
+        store.stages = index['stages']
+        store.typecode = index['typecode']
+        store.data = array(store.typecode)
+        size = len(store.teams) * len(store.stages) * store.data.itemsize
+        with open(store.data_path, 'r+b') as f:
+            raw = f.read()
+            if len(raw) > size:
+                # Crash tussen het blok en de index: het blok staat er wel, de index nog niet
+                f.truncate(size)
+                raw = raw[:size]
+        if len(raw) != size:
+            raise ValueError(f"{store.data_path} past niet bij {store.index_path}")
+        store.data.frombytes(raw)
+        store._reindex()
+        return store
+
+    @classmethod
+    def build(cls, directory, stage_points, stage_ids=None, teams=None):
+        """Nieuwe store uit {stage_number: {participant_id: punten}}
+
+        teams: vaste volgorde van de participant_id's (standaard alle teams uit stage_points, gesorteerd).
+        """
+        store = cls(directory)
+        store.teams = sorted(teams if teams is not None else {t for p in stage_points.values() for t in p})
+        store.stages = [
+            {'stage_number': n, 'stage_id': (stage_ids or {}).get(n)} for n in sorted(stage_points)
+        ]
+        store._reindex()
+        columns = [store._column_values(stage_points[s['stage_number']]) for s in store.stages]
+        store.typecode = typecode_for([v for column in columns for v in column])
+        store.data = array(store.typecode, [v for column in columns for v in column])
+        store._write_all()
+        return store
+
+    def _column_values(self, points):
+        unknown = set(points) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Onbekende participant(s) {sorted(unknown)[:5]}: store opnieuw opbouwen")
+        return [points.get(team, 0) for team in self.teams]
+
+    def _write_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'format': FORMAT, 'typecode': self.typecode, 'teams': self.teams, 'stages': self.stages},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self.index_path)
+
+    def _write_all(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.data_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.data.tobytes())
+        os.replace(tmp, self.data_path)
+        self._write_index()
+
+    def append_stage(self, stage_number, points, stage_id=None):
+        """Voeg een etappe toe (of overschrijf een bestaande); alleen het nieuwe blok wordt geschreven"""
+        values = self._column_values(points)
+        block = self.blocks.get(stage_number)
+        if block is None and self.stages and stage_number < self.stages[-1]['stage_number']:
+            raise ValueError(f"Etappe {stage_number} ligt vóór de laatste etappe: store opnieuw opbouwen")
+
+        typecode = typecode_for(values, self.typecode)
+        if typecode != self.typecode:
+            # Breder type nodig: het hele bestand opnieuw (gebeurt hooguit twee keer)
+            self.typecode = typecode
+            self.data = array(typecode, self.data)
+            self._store_block(block, stage_number, stage_id, values)
+            self._write_all()
+            return
+
+        n = len(self.teams)
+        column = array(self.typecode, values)
+        if block is None:
+            with open(self.data_path, 'ab') as f:
+                f.write(column.tobytes())
+        else:
+            with open(self.data_path, 'r+b') as f:
+                f.seek(block * n * self.data.itemsize)
+                f.write(column.tobytes())
+        self._store_block(block, stage_number, stage_id, values)
+        self._write_index()
+
+    def _store_block(self, block, stage_number, stage_id, values):
+        n = len(self.teams)
+        if block is None:
+            self.stages.append({'stage_number': stage_number, 'stage_id': stage_id})
+            self.data.extend(values)
+            self._reindex()
+        else:
+            self.data[block * n:(block + 1) * n] = array(self.data.typecode, values)
+            if stage_id is not None:
+                self.stages[block]['stage_id'] = stage_id
+
+    @property
+    def stage_numbers(self):
+        return [s['stage_number'] for s in self.stages]
+
+    def stage_column(self, stage_number):
+        """Punten van alle teams in één etappe (in team volgorde), één slice"""
+        n = len(self.teams)
+        block = self.blocks[stage_number]
+        return self.data[block * n:(block + 1) * n]
+
+    def stage_points(self, stage_number):
+        return dict(zip(self.teams, self.stage_column(stage_number)))
+
+    def team_points(self, participant_id):
+        """Punten per etappe van één team, één strided slice"""
+        return list(self.data[self.columns[participant_id]::len(self.teams)])
+
+    def team_cumulative(self, participant_id):
+        """Totaal na elke etappe (decoderen van de delta's)"""
+        return list(accumulate(self.team_points(participant_id)))
+
+    def best_stages(self, participant_id, k=5):
+        """[(stage_number, punten)] van de k beste etappes, bij gelijke punten de vroegste etappe"""
+        points = self.team_points(participant_id)
+        best = heapq.nlargest(k, range(len(points)), key=lambda i: (points[i], -i))
+        return [(self.stages[i]['stage_number'], points[i]) for i in best]
+
+    def totals_after(self, stage_number):
+        """{participant_id: totaal} na een etappe"""
+        n = len(self.teams)
+        totals = [0] * n
+        for block in range(self.blocks[stage_number] + 1):
+            for i, value in enumerate(self.data[block * n:(block + 1) * n]):
+                totals[i] += value
+        return dict(zip(self.teams, totals))
@@ -0,0 +1,222 @@
+"""
+Integrity checks for a parsed stage, before any SQL is generated.
+
+The generated SQL hides problems: `DISTINCT ON (stage_id, rider_id)` silently
+keeps one of two duplicate riders and `WHERE rider_id IS NOT NULL` drops
+unmatched names. `validate_stage` builds hash indexes over the records and
+checks everything in one pass in position order:
+
+- every position and every rider_id occurs once
+- every rider has a rider_id, or a name that the RiderIndex resolves the same
+  way the import does (without an index a name only gives a warning)
+- positions 1..n have no gaps
+- times do not decrease with the position
+- riders without a time (DNF/DNS/...) come after all finishers
+- no rider was already out of the race in an earlier stage
+
+The report is a list of issues with a code, so it can be written as JSON
+and checked by other tools.
+"""
+
+import os
+from dataclasses import asdict, dataclass, field
+
+from .records import Status, read_stage_results_csv
+
+ERROR = 'error'
+WARNING = 'warning'
+
+DUPLICATE_POSITION = 'duplicate_position'
+DUPLICATE_RIDER = 'duplicate_rider'
+UNMATCHED_RIDER = 'unmatched_rider'
+UNRESOLVED_NAME = 'unresolved_name'
+POSITION_GAP = 'position_gap'
+TIME_DECREASING = 'time_decreasing'
+DNF_BEFORE_FINISHER = 'dnf_before_finisher'
+ALREADY_OUT = 'already_out_of_race'
+
+SEVERITY = {
+    DUPLICATE_POSITION: ERROR,
+    DUPLICATE_RIDER: ERROR,
+    UNMATCHED_RIDER: ERROR,
+    # Nog geen rider_id maar wel een naam; niet gecontroleerd omdat er geen RiderIndex was
+    UNRESOLVED_NAME: WARNING,
+    POSITION_GAP: WARNING,
+    TIME_DECREASING: ERROR,
+    DNF_BEFORE_FINISHER: ERROR,
+    ALREADY_OUT: ERROR,
+}
+
+
+@dataclass(slots=True)
+class Issue:
+    code: str
+    severity: str
+    position: int | None
+    rider_id: int | None
+    message: str
+    related_position: int | None = None
+
+
+@dataclass(slots=True)
+class IntegrityReport:
+    stage_number: int | None
+    rider_count: int
+    issues: list = field(default_factory=list)
+
+    def add(self, code, position, rider_id, message, related_position=None):
+        self.issues.append(Issue(code, SEVERITY[code], position, rider_id, message, related_position))
+
+    @property
+    def errors(self):
+        return [i for i in self.issues if i.severity == ERROR]
+
+    @property
+    def warnings(self):
+        return [i for i in self.issues if i.severity == WARNING]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def counts(self):
+        counts = {}
+        for issue in self.issues:
+            counts[issue.code] = counts.get(issue.code, 0) + 1
+        return counts
+
+    def to_json(self):
+        return {
+            'stage_number': self.stage_number,
+            'rider_count': self.rider_count,
+            'ok': self.ok,
+            'error_count': len(self.errors),
+            'warning_count': len(self.warnings),
+            'counts': self.counts(),
+            'issues': [asdict(i) for i in self.issues],
+        }
+
+
+def _name(rider):
+    return f"{rider.first_name} {rider.last_name}".strip()
+
+
+def out_of_race_rider_ids(previous_stages):
+    """rider_id's die in een eerdere etappe niet gefinisht zijn (lijst van record lijsten)"""
+    return {
+        r.rider_id
+        for records in previous_stages
+        for r in records
+        if r.rider_id is not None and (r.time_seconds is None or r.status != Status.FINISHED)
+    }
+
+
+def validate_stage(records, out_of_race=frozenset(), stage_number=None, rider_index=None):
+    """Controleer een geparste etappe; geeft een IntegrityReport
+
+    rider_index: RiderIndex om renners zonder rider_id op naam te zoeken, zoals de import
+    dat doet. Alleen een naam die niet gevonden wordt (of geen naam) is een UNMATCHED_RIDER
+    fout; zonder index is een naam zonder rider_id een UNRESOLVED_NAME waarschuwing.
+    """
+    report = IntegrityReport(stage_number, len(records))
+    by_position = {}
+    by_rider = {}
+    previous_finisher = None
+    pending_dnfs = []
+
+    for rider in sorted(records, key=lambda r: r.position):
+        position = rider.position
+        rider_id = rider.rider_id
+
+        if position in by_position:
+            report.add(DUPLICATE_POSITION, position, rider_id,
+                       f"Positie {position} komt dubbel voor: {_name(by_position[position])} en {_name(rider)}")
+        else:
+            by_position[position] = rider
+
+        if rider_id is None:
+            name = _name(rider)
+            if name and rider_index is not None:
+                rider_id = rider_index.find(rider.first_name, rider.last_name)
+                if rider_id is None:
+                    report.add(UNMATCHED_RIDER, position, None, f"{name} staat niet in de riders tabel")
+            elif name:
+                report.add(UNRESOLVED_NAME, position, None, f"{name} heeft nog geen rider_id")
+            else:
+                report.add(UNMATCHED_RIDER, position, None, "Renner zonder naam en zonder rider_id")
+
+        if rider_id is None:
+            pass
+        elif rider_id in by_rider:
+            first = by_rider[rider_id]
+            report.add(DUPLICATE_RIDER, position, rider_id,
+                       f"rider_id {rider_id} ({_name(rider)}) staat ook op positie {first.position}",
+                       related_position=first.position)
+        else:
+            by_rider[rider_id] = rider
+            if rider_id in out_of_race:
+                report.add(ALREADY_OUT, position, rider_id, f"{_name(rider)} was al uit koers in een eerdere etappe")
+
+        if rider.time_seconds is None:
+            pending_dnfs.append(rider)
+            continue
+
+        # Een finisher na DNF renners: die DNF's staan te hoog
+        for dnf in pending_dnfs:
+            report.add(DNF_BEFORE_FINISHER, dnf.position, dnf.rider_id,
+                       f"{_name(dnf)} zonder tijd staat vóór finisher {_name(rider)} (positie {position})",
+                       related_position=position)
+        pending_dnfs.clear()
+
+        if previous_finisher is not None and rider.time_seconds < previous_finisher.time_seconds:
+            report.add(TIME_DECREASING, position, rider_id,
+                       f"Tijd {rider.time_seconds}s is sneller dan positie {previous_finisher.position} "
+                       f"({previous_finisher.time_seconds}s)",
+                       related_position=previous_finisher.position)
+        previous_finisher = rider
+
+    if by_position:
+        missing = [p for p in range(1, max(by_position) + 1) if p not in by_position]
+        for position in missing:
+            report.add(POSITION_GAP, position, None, f"Positie {position} ontbreekt")
+
+    return report
+
+
+def fill_rider_ids(records, rider_index):
+    """Zet de rider_id die validate_stage op naam vindt in de records (in place); geeft het aantal
+
+    De SQL zoekt een naam zonder rider_id alleen exact op (LOWER/TRIM) en laat renners die daar
+    niet matchen stil weg. Met de rider_id erin importeert de SQL precies wat de controle goedkeurde.
+    """
+    filled = 0
+    for rider in records:
+        if rider.rider_id is None and _name(rider):
+            rider_id = rider_index.find(rider.first_name, rider.last_name)
+            if rider_id is not None:
+                rider.rider_id = rider_id
+                filled += 1
+    return filled
+
+
+def stage_file(stage_number):
+    """De gecorrigeerde uitslag als die er is, anders de ruwe CSV (zelfde keuze als generate-etappe-1-sql.py)"""
+    fixed = f'imports/etappe-{stage_number}-uitslag-fixed.csv'
+    return fixed if os.path.exists(fixed) else f'imports/etappe-{stage_number}-uitslag.csv'
+
+
+def previous_out_of_race(stage_number):
+    """rider_id's die in een van de etappes vóór stage_number uitgevallen zijn (voor zover de CSV's er zijn)"""
+    previous = []
+    for n in range(1, stage_number):
+        path = stage_file(n)
+        if os.path.exists(path):
+            previous.append(read_stage_results_csv(path))
+    return out_of_race_rider_ids(previous)
+
+
+def available_rider_index():
+    """De gedeelde RiderIndex over database_csv/riders.csv, of None als die er niet is"""
+    from . import tables
+
+    return tables.rider_index() if os.path.exists(tables.RIDERS_FILE) else None
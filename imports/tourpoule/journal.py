@@ -0,0 +1,47 @@
+"""
+Append-only JSON Lines journal for resumable work.
+
+Every line is one JSON object with a 'key'; a later line with the same key
+replaces an earlier one. append() flushes and fsyncs each line, so after a
+crash at most the last line is half written; load() skips it and the next
+append() starts on a fresh line. Used for the backfill progress (backfill.py)
+and the committed chunks of a chunked batch file (sql_batch.py).
+"""
+
+import json
+import os
+
+
+class Journal:
+    """Append-only voortgangslog; een half geschreven laatste regel (crash) wordt genegeerd"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """{key: laatste entry met die key}; een ontbrekend bestand is een leeg journal"""
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry['key']] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def append(self, entry):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with open(self.path, 'a+b') as f:
+            # Na een crash midden in een regel eerst afsluiten, anders plakt deze entry eraan vast
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = '\n' + line
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,43 @@
+"""
+Name normalization and the known typo corrections, shared by the import scripts
+"""
+
+import unicodedata
+
+
+def normalize_name(name):
+    """Normaliseer naam door diakrieten te verwijderen en lowercase"""
+    if not name:
+        return ""
+    nfd = unicodedata.normalize('NFD', name)
+    normalized = ''.join(c for c in nfd if unicodedata.category(c) != 'Mn').lower().strip()
+    return normalized
+
+
+# Bekende typo's in de uitslagen. Een string corrigeert de voornaam bij elke achternaam,
+# een dict corrigeert één renner: {achternaam: (voornaam, achternaam)}
+NAME_CORRECTIONS = {
+    'Rem++': 'Remco',
+    'Primo+': 'Primoz',
+    'Staff': 'Steff',
+    'Bastion': 'Bastien',
+    'Thyme+': 'Thymen',
+    'Einar': 'Einer',
+    'Ro&': 'Roel',
+    'Mathieu': {'van der Po&': ('Mathieu', 'van der Poel')},
+    'Vito': {'Brant': ('Vito', 'Braet')},
+    'Anders': {'Johannessen': ('Anders', 'Halland Johannessen')},
+    'Gregor': {'Muehlberger': ('Gregor', 'Muhlberger')},
+    'Frank': {'van den Brook': ('Frank', 'Van Den Broek')},
+    'William': {'Barta': ('Will', 'Barta')},
+}
+
+
+def correct_name(first_name, last_name):
+    """Pas de typo correcties toe op een voor- en achternaam"""
+    correction = NAME_CORRECTIONS.get(first_name)
+    if isinstance(correction, dict):
+        return correction.get(last_name, (first_name, last_name))
+    if correction is not None:
+        return correction, last_name
+    return first_name, last_name
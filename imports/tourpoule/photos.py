@@ -0,0 +1,226 @@
+"""
+Rider photos as files in a content-addressed cache instead of data URLs.
+
+`riders.photo_url` holds `data:image/jpeg;base64,...` strings (see
+README-photo-import.md), so every rider query and backup carries the image
+data. This module:
+
+1. collects the images (data URLs from the riders table, or local files
+   named `<rider_id>.<ext>`)
+2. deduplicates them by the SHA-256 of the bytes; riders with the same photo
+   share one entry
+3. renders the thumbnails per unique image in a process pool (WebP, square
+   crop; needs Pillow, without it the original bytes are stored unchanged;
+   the same fallback applies per image Pillow cannot read)
+4. writes them as `<dir>/<key[:2]>/<key>-<size>.<ext>`, where the key is the
+   hash of the source plus the render settings, so a URL never changes
+   content and can be cached forever
+5. gives `photo_url` = `/photos/<key[:2]>/<key>-40.webp` per rider
+
+Other sizes are found by swapping the `-40` suffix.
+"""
+
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+# Pillow is optioneel; zonder wordt het origineel ongewijzigd in de cache gezet
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - afhankelijk van de omgeving
+    Image = None
+
+DEFAULT_DIR = os.path.join('public', 'photos')
+URL_PREFIX = '/photos'
+SIZES = (40, 80)
+DEFAULT_SIZE = 40
+WEBP_QUALITY = 80
+# Onderdeel van de cache key: ophogen als de thumbnails anders gerenderd worden
+RENDER_VERSION = 1
+# field_size_limit neemt een C long: sys.maxsize geeft OverflowError op Windows
+CSV_FIELD_LIMIT = 2**31 - 1
+
+IMAGE_EXTENSIONS = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp',
+                    '.gif': 'image/gif'}
+MIME_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+DATA_URL_PATTERN = re.compile(r'^data:(image/[\w.+-]+)?(;[\w=-]+)*;base64,', re.IGNORECASE)
+
+
+def parse_data_url(url):
+    """'data:image/jpeg;base64,...' -> (mime, bytes); None als het geen (geldige) base64 data URL is"""
+    match = DATA_URL_PATTERN.match(url or '')
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(url[match.end():], validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    return (match.group(1) or 'image/jpeg').lower(), data
+
+
+def render_settings():
+    return f"v{RENDER_VERSION};sizes={','.join(map(str, SIZES))};webp={WEBP_QUALITY};pil={Image is not None}"
+
+
+def cache_key(data):
+    """Hash van de bron plus de render instellingen (24 hex tekens)"""
+    digest = hashlib.sha256(data)
+    digest.update(render_settings().encode())
+    return digest.hexdigest()[:24]
+
+
+@dataclass(slots=True)
+class SourceImage:
+    key: str
+    mime: str
+    data: bytes
+
+
+def collect_from_rows(rows):
+    """riders rijen (id, photo_url) -> ({key: SourceImage}, {rider_id: key}); rijen zonder data URL vallen af"""
+    images = {}
+    rider_keys = {}
+    for row in rows:
+        parsed = parse_data_url(row.get('photo_url'))
+        if parsed is None:
+            continue
+        mime, data = parsed
+        key = cache_key(data)
+        images.setdefault(key, SourceImage(key, mime, data))
+        rider_keys[int(row['id'])] = key
+    return images, rider_keys
+
+
+def collect_from_directory(directory):
+    """Bestanden <rider_id>.<ext> -> ({key: SourceImage}, {rider_id: key})"""
+    images = {}
+    rider_keys = {}
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if not stem.isdigit() or ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            data = f.read()
+        key = cache_key(data)
+        images.setdefault(key, SourceImage(key, IMAGE_EXTENSIONS[ext.lower()], data))
+        rider_keys[int(stem)] = key
+    return images, rider_keys
+
+
+def read_riders_photo_rows(path):
+    """id en photo_url uit een riders.csv backup (photo_url velden kunnen groot zijn)"""
+    csv.field_size_limit(CSV_FIELD_LIMIT)
+    with open(path, 'r', encoding='utf-8') as f:
+        return [{'id': row['id'], 'photo_url': row.get('photo_url') or ''} for row in csv.DictReader(f)]
+
+
+def thumbnail_extension(mime, rendered=True):
+    """'webp' voor gerenderde thumbnails, anders de extensie van het origineel"""
+    return 'webp' if rendered and Image is not None else MIME_EXTENSIONS.get(mime, 'jpg')
+
+
+def thumbnail_path(key, size, ext):
+    return f'{key[:2]}/{key}-{size}.{ext}'
+
+
+def photo_url(key, mime, size=DEFAULT_SIZE, rendered=True):
+    return f'{URL_PREFIX}/{thumbnail_path(key, size, thumbnail_extension(mime, rendered))}'
+
+
+def render(data, size):
+    """Vierkante thumbnail als WebP bytes (center crop, zoals de 40x40 foto's nu)"""
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        thumb = ImageOps.fit(img, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=6)
+        return buffer.getvalue()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_thumbnails(image, output_dir, rendered):
+    ext = thumbnail_extension(image.mime, rendered)
+    written = 0
+    skipped = 0
+    for size in SIZES:
+        path = os.path.join(output_dir, thumbnail_path(image.key, size, ext))
+        if os.path.exists(path):
+            skipped += 1
+            continue
+        data = render(image.data, size) if rendered else image.data
+        _write_atomic(path, data)
+        written += len(data)
+    return written, skipped
+
+
+def _store_original(image, output_dir, error):
+    """Zet het origineel ongewijzigd in de cache, zoals zonder Pillow; geeft (key, geschreven, overgeslagen, fout)"""
+    return (image.key, *_write_thumbnails(image, output_dir, rendered=False), error)
+
+
+def build_thumbnails(image, output_dir):
+    """Schrijf de thumbnails van één bron (draait in een worker); bestaande bestanden worden overgeslagen
+
+    Geeft (key, geschreven bytes, overgeslagen bestanden, fout). Een bron die Pillow niet kan lezen
+    (kapot of onbekend formaat) gaat als origineel in de cache; fout is dan de melding, anders None.
+    """
+    try:
+        return (image.key, *_write_thumbnails(image, output_dir, rendered=Image is not None), None)
+    except Exception as e:
+        # Pillow geeft per formaat een ander type (UnidentifiedImageError, OSError, SyntaxError, ...)
+        return _store_original(image, output_dir, f'{type(e).__name__}: {e}')
+
+
+def build_cache(images, output_dir=DEFAULT_DIR, workers=None):
+    """Render alle unieke bronnen parallel; geeft {key: (geschreven bytes, overgeslagen, fout of None)}
+
+    Een foto die niet te renderen is stopt de rest niet: die staat als origineel in de cache (zie
+    photo_url(..., rendered=False)) en heeft een fout in het resultaat.
+    """
+    results = {}
+    if not images:
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(image, pool.submit(build_thumbnails, image, output_dir)) for image in images.values()]
+        for image, future in futures:
+            try:
+                key, written, skipped, error = future.result()
+            except Exception as e:
+                # De worker zelf is weggevallen (bv. geheugen); het hoofdproces schrijft dan het origineel
+                key, written, skipped, error = _store_original(image, output_dir, f'{type(e).__name__}: {e}')
+            results[key] = (written, skipped, error)
+    return results
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def update_sql(urls):
+    """Eén UPDATE ... FROM (VALUES ...) voor {rider_id: photo_url}"""
+    values = ',\n'.join(f"  ({rider_id}, {_literal(url)})" for rider_id, url in sorted(urls.items()))
+    return f"""-- Rider photos: data URLs -> content-addressed cache ({URL_PREFIX}/)
+-- Generated automatically
+-- {len(urls)} rider(s)
+
+UPDATE riders AS r
+SET photo_url = v.photo_url
+FROM (VALUES
+{values}
+) AS v(id, photo_url)
+WHERE r.id = v.id;
+"""
@@ -0,0 +1,122 @@
+"""
+Inverted index from rider_id to the fantasy teams that selected the rider.
+
+Per rider two sorted arrays of fantasy_team_id's (main and reserve), plus the
+forward mapping team -> riders so a changed team can be applied as a diff.
+Popularity counts (get-most-selected-riders.js) and a team's exposure to
+unpopular riders (the UNDERDOG award) become lookups instead of a scan over
+fantasy_team_riders.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+
+# Een renner is een "underdog" als hij in hooguit dit deel van de teams zit
+UNDERDOG_MAX_SHARE = 0.05
+
+
+def _remove(ids, value):
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        del ids[i]
+
+
+class PopularityIndex:
+    def __init__(self):
+        self._main = {}      # rider_id -> array('i') gesorteerde fantasy_team_id's
+        self._reserve = {}
+        self._teams = {}     # fantasy_team_id -> {rider_id: is_main}
+
+    @classmethod
+    def from_team_riders(cls, team_riders, active_only=True):
+        """Bouw de index uit een TeamRiders snapshot (zelfde filter als de JS: active = true)"""
+        index = cls()
+        selections = {}
+        for i in range(len(team_riders)):
+            if active_only and not team_riders.active[i]:
+                continue
+            selections.setdefault(team_riders.fantasy_team_id[i], {})[team_riders.rider_id[i]] = bool(team_riders.is_main[i])
+
+        # Team id's in oplopende volgorde toevoegen: de arrays blijven gesorteerd zonder insort
+        for team_id in sorted(selections):
+            index._teams[team_id] = selections[team_id]
+            for rider_id, is_main in selections[team_id].items():
+                target = index._main if is_main else index._reserve
+                target.setdefault(rider_id, array('i')).append(team_id)
+        return index
+
+    @property
+    def team_count(self):
+        return len(self._teams)
+
+    def team_ids(self):
+        return self._teams.keys()
+
+    def set_team(self, team_id, selections):
+        """Werk één team bij; selections = {rider_id: is_main}. Alleen het verschil wordt toegepast."""
+        old = self._teams.get(team_id, {})
+        for rider_id, is_main in old.items():
+            if selections.get(rider_id) != is_main:
+                _remove((self._main if is_main else self._reserve)[rider_id], team_id)
+        for rider_id, is_main in selections.items():
+            if old.get(rider_id) != is_main:
+                insort((self._main if is_main else self._reserve).setdefault(rider_id, array('i')), team_id)
+        if selections:
+            self._teams[team_id] = dict(selections)
+        else:
+            self._teams.pop(team_id, None)
+
+    def remove_team(self, team_id):
+        self.set_team(team_id, {})
+
+    def teams(self, rider_id):
+        """Gesorteerde fantasy_team_id's die deze renner geselecteerd hebben"""
+        return sorted(self._main.get(rider_id, array('i')) + self._reserve.get(rider_id, array('i')))
+
+    def main_count(self, rider_id):
+        return len(self._main.get(rider_id, ()))
+
+    def reserve_count(self, rider_id):
+        return len(self._reserve.get(rider_id, ()))
+
+    def count(self, rider_id):
+        return self.main_count(rider_id) + self.reserve_count(rider_id)
+
+    def share(self, rider_id):
+        return self.count(rider_id) / self.team_count if self.team_count else 0.0
+
+    def most_selected(self, limit=10):
+        """[(rider_id, selection_count, main_selections, reserve_selections)], zoals get-most-selected-riders"""
+        riders = set(self._main) | set(self._reserve)
+        rows = [(r, self.count(r), self.main_count(r), self.reserve_count(r)) for r in riders if self.count(r)]
+        rows.sort(key=lambda row: (-row[1], -row[2], row[0]))
+        return rows[:limit]
+
+    def underdogs(self, max_share=UNDERDOG_MAX_SHARE):
+        """rider_id's die in hooguit max_share van de teams zitten"""
+        # Afronden: 0.29 * 100 is als float net geen 29, en een renner op precies de grens telt mee
+        limit = round(max_share * self.team_count, 9)
+        riders = set(self._main) | set(self._reserve)
+        return {r for r in riders if 0 < self.count(r) <= limit}
+
+    def underdog_exposure(self, team_id, max_share=UNDERDOG_MAX_SHARE, underdogs=None):
+        """Aantal underdogs in een team (geef underdogs mee bij herhaald gebruik)"""
+        if underdogs is None:
+            underdogs = self.underdogs(max_share)
+        return sum(1 for rider_id in self._teams.get(team_id, ()) if rider_id in underdogs)
+
+    def underdog_points(self, rider_points, max_share=UNDERDOG_MAX_SHARE):
+        """{fantasy_team_id: punten van underdog renners} voor de UNDERDOG award
+
+        rider_points = {rider_id: punten}. Loopt alleen over de postings lists van
+        de underdogs die punten hebben, niet over alle teams.
+        """
+        totals = {}
+        for rider_id in self.underdogs(max_share):
+            points = rider_points.get(rider_id, 0)
+            if not points:
+                continue
+            # Alleen main renners scoren punten
+            for team_id in self._main.get(rider_id, ()):
+                totals[team_id] = totals.get(team_id, 0) + points
+        return totals
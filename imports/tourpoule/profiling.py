@@ -0,0 +1,308 @@
+"""
+Profiling mode for the import scripts (--profile).
+
+A script marks its phases per stage (`with profiler.phase('etappe-1-parse')`)
+and every phase gets its own profile:
+
+- trace (`--profile`): sys.setprofile sees every Python and C call, so the
+  stacks are exact and the value is the self time in microseconds. The
+  overhead makes everything slower, but evenly.
+- sample (`--profile=sample`): a thread reads the stack of the main thread
+  every SAMPLE_INTERVAL seconds; the value is the number of samples. Cheap
+  enough for large batches.
+
+Phases started with allocations=True also run under tracemalloc (peak and
+the largest allocation sites), which slows them down further.
+
+A run is written to imports/profiles/<name>/: one `<phase>.collapsed` per
+phase (collapsed stacks, `a;b;c 123` per line, sorted) that flamegraph.pl,
+speedscope or difffolded.pl read directly, and summary.json with the wall
+times and allocation statistics. diff_runs() compares two runs.
+"""
+
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+
+DEFAULT_DIR = os.path.join('imports', 'profiles')
+TRACE = 'trace'
+SAMPLE = 'sample'
+MODES = (TRACE, SAMPLE)
+SAMPLE_INTERVAL = 0.001
+TOP_ALLOCATIONS = 10
+SUMMARY_NAME = 'summary.json'
+COLLAPSED_SUFFIX = '.collapsed'
+
+_UNSAFE = re.compile(r'[;\s]+')
+# Het betreden en afsluiten van de with zelf hoort niet bij de fase
+_WITH_LABEL = 'contextlib.py:_GeneratorContextManager.'
+
+
+def code_label(code):
+    """'resolve.py:RiderIndex.find'"""
+    return _UNSAFE.sub('_', f"{os.path.basename(code.co_filename)}:{code.co_qualname}")
+
+
+def builtin_label(func):
+    """'unicodedata.normalize', 'str.join'"""
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', None) or repr(func)
+    return _UNSAFE.sub('_', f"{module}.{name}" if module and module != 'builtins' else name)
+
+
+class _Tracer:
+    """sys.setprofile callback: self time per volledige stack, in nanoseconden"""
+
+    def __init__(self, root):
+        self.stack = [root]
+        self.totals = {}
+        self.last = time.perf_counter_ns()
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        key = tuple(self.stack)
+        self.totals[key] = self.totals.get(key, 0) + now - self.last
+        if event == 'call':
+            self.stack.append(code_label(frame.f_code))
+        elif event == 'c_call':
+            self.stack.append(builtin_label(arg))
+        elif len(self.stack) > 1:
+            # return, c_return, c_exception; nooit voorbij de fase zelf
+            self.stack.pop()
+        self.last = time.perf_counter_ns()
+
+    def stacks(self):
+        return {key: round(ns / 1000) for key, ns in self.totals.items() if ns >= 500}
+
+
+class _Sampler:
+    """Leest elke interval seconden de stack van één thread, tot aan base_frame (exclusief)"""
+
+    def __init__(self, root, thread_id, base_frame, interval):
+        import threading
+
+        self.root = root
+        self.thread_id = thread_id
+        self.base_frame = base_frame
+        self.interval = interval
+        self.counts = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.base_frame:
+                labels.append(code_label(frame.f_code))
+                frame = frame.f_back
+            if frame is None:
+                # Niet (meer) binnen de fase
+                continue
+            key = (self.root, *reversed(labels))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def stacks(self):
+        return self.counts
+
+
+def _allocation_sites(snapshot, limit=TOP_ALLOCATIONS):
+    sites = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        sites.append({
+            'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        })
+    return sites
+
+
+class Profiler:
+    """Profiel per fase; zonder mode doet phase() niets behalve de fase uitvoeren"""
+
+    def __init__(self, mode=None, name=None, directory=DEFAULT_DIR, interval=SAMPLE_INTERVAL):
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Onbekende profiel mode: {mode} (kies uit {', '.join(MODES)})")
+        self.mode = mode
+        self.name = name
+        self.directory = directory
+        self.interval = interval
+        self.phases = {}
+        self._active = False
+
+    @classmethod
+    def from_args(cls, argv, tool):
+        """--profile (trace), --profile=sample, --profile-name=<naam> (standaard <tool>-<tijd>)"""
+        options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+        mode = options.get('profile', TRACE if '--profile' in argv else None)
+        name = options.get('profile-name') or f"{tool}-{time.strftime('%Y%m%d-%H%M%S')}"
+        return cls(mode, name)
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    @contextlib.contextmanager
+    def phase(self, name, allocations=False):
+        if not self.enabled or self._active:
+            # Geneste fases tellen mee in de buitenste
+            yield
+            return
+
+        tracing_memory = False
+        if allocations:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                tracing_memory = True
+            tracemalloc.reset_peak()
+
+        if self.mode == TRACE:
+            collector = _Tracer(name)
+        else:
+            collector = _Sampler(name, _thread_id(), sys._getframe(2), self.interval)
+
+        self._active = True
+        started = time.perf_counter()
+        if self.mode == TRACE:
+            sys.setprofile(collector)
+        else:
+            collector.start()
+        try:
+            yield
+        finally:
+            if self.mode == TRACE:
+                sys.setprofile(None)
+            else:
+                collector.stop()
+            wall_ms = (time.perf_counter() - started) * 1000
+            self._active = False
+
+            entry = self.phases.setdefault(name, {'wall_ms': 0.0, 'stacks': {}})
+            entry['wall_ms'] += wall_ms
+            for key, value in collector.stacks().items():
+                if len(key) > 1 and key[1].startswith(_WITH_LABEL):
+                    continue
+                entry['stacks'][key] = entry['stacks'].get(key, 0) + value
+
+            if allocations:
+                import tracemalloc
+
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces([
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, contextlib.__file__),
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                ])
+                entry['allocations'] = {
+                    'peak_kb': round(peak / 1024, 1),
+                    'sites': _allocation_sites(snapshot),
+                }
+                if tracing_memory:
+                    tracemalloc.stop()
+
+    @property
+    def unit(self):
+        return 'us' if self.mode == TRACE else 'samples'
+
+    def write(self):
+        """Schrijf de run naar <directory>/<name>/; geeft het pad (None als profileren uit staat)"""
+        if not self.enabled:
+            return None
+        path = os.path.join(self.directory, self.name)
+        os.makedirs(path, exist_ok=True)
+        summary = {
+            'mode': self.mode,
+            'unit': self.unit,
+            'interval_ms': self.interval * 1000 if self.mode == SAMPLE else None,
+            'phases': {},
+        }
+        for name, entry in self.phases.items():
+            file_name = phase_file_name(name)
+            lines = sorted(f"{';'.join(key)} {value}" for key, value in entry['stacks'].items() if value)
+            with open(os.path.join(path, file_name), 'w', encoding='utf-8', newline='\n') as f:
+                f.write(''.join(line + '\n' for line in lines))
+            summary['phases'][name] = {
+                'wall_ms': round(entry['wall_ms'], 3),
+                'total': sum(entry['stacks'].values()),
+                'file': file_name,
+                **({'allocations': entry['allocations']} if 'allocations' in entry else {}),
+            }
+        with open(os.path.join(path, SUMMARY_NAME), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return path
+
+
+def _thread_id():
+    import threading
+
+    return threading.get_ident()
+
+
+def phase_file_name(name):
+    return re.sub(r'[^\w.-]+', '_', name) + COLLAPSED_SUFFIX
+
+
+def read_collapsed(path):
+    """{stack tuple: waarde} uit een collapsed bestand"""
+    stacks = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stack, _, value = line.rstrip('\n').rpartition(' ')
+            if stack:
+                key = tuple(stack.split(';'))
+                stacks[key] = stacks.get(key, 0) + int(value)
+    return stacks
+
+
+def self_times(stacks, scale=1.0):
+    """{functie: self waarde x scale}: de laatste frame van elke stack"""
+    totals = {}
+    for key, value in stacks.items():
+        totals[key[-1]] = totals.get(key[-1], 0) + value * scale
+    return totals
+
+
+def load_run(path):
+    """summary.json plus de self tijden per fase in ms"""
+    with open(os.path.join(path, SUMMARY_NAME), 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    scale = 0.001 if summary['unit'] == 'us' else summary['interval_ms']
+    for phase in summary['phases'].values():
+        phase['self_ms'] = self_times(read_collapsed(os.path.join(path, phase['file'])), scale)
+    return summary
+
+
+def diff_runs(before, after, top=10):
+    """Per fase (wall_ms voor, na) en de functies met het grootste verschil in self tijd
+
+    before/after: load_run() resultaten. Fases die maar in één run voorkomen krijgen None.
+    """
+    result = {}
+    for name in sorted(set(before['phases']) | set(after['phases'])):
+        a = before['phases'].get(name)
+        b = after['phases'].get(name)
+        a_self = a['self_ms'] if a else {}
+        b_self = b['self_ms'] if b else {}
+        functions = [
+            (function, a_self.get(function, 0.0), b_self.get(function, 0.0))
+            for function in set(a_self) | set(b_self)
+        ]
+        functions.sort(key=lambda item: (-abs(item[2] - item[1]), item[0]))
+        result[name] = {
+            'wall_ms': (a['wall_ms'] if a else None, b['wall_ms'] if b else None),
+            'functions': functions[:top],
+        }
+    return result
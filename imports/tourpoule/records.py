@@ -0,0 +1,167 @@
+"""
+Compact record types for stage results and riders.
+
+The importers used to carry every row as a dict of strings and copy it at each
+step (`rider.copy()`, `{**rider, ...}`). These slot classes hold typed fields and
+are updated in place; `ResultColumns` stores a whole stage column-wise in
+arrays for large backfills.
+"""
+
+import csv
+from array import array
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class Status(IntEnum):
+    FINISHED = 0
+    DNF = 1  # Did Not Finish
+    DNS = 2  # Did Not Start
+    DSQ = 3  # Disqualified
+    OTL = 4  # Outside Time Limit
+
+    @classmethod
+    def from_code(cls, code):
+        """'DNF', 'DNS*', None, ... -> Status (None/onbekend = DNF)"""
+        if not code:
+            return cls.DNF
+        return cls.__members__.get(code.upper().rstrip('*'), cls.DNF)
+
+
+@dataclass(slots=True)
+class ResultRecord:
+    position: int
+    first_name: str
+    last_name: str
+    rider_id: int | None = None
+    team_name: str = ''
+    time_seconds: int | None = None
+    status: Status = Status.FINISHED
+    name_corrected: bool = False
+
+
+@dataclass(slots=True)
+class RiderRecord:
+    id: int
+    first_name: str
+    last_name: str
+    team_pro_id: int | None = None
+    first_name_normalized: str = ''
+    last_name_normalized: str = ''
+
+    @property
+    def name_key(self):
+        return (self.first_name_normalized, self.last_name_normalized)
+
+
+RESULT_CSV_FIELDS = ['position', 'first_name', 'last_name', 'rider_id', 'team_name', 'time_seconds']
+
+
+def _int_or_none(value):
+    value = (value or '').strip()
+    return int(value) if value.lstrip('-').isdigit() else None
+
+
+def read_stage_results_csv(path):
+    """Lees een etappe-uitslag CSV (position,first_name,last_name,rider_id,team_name,time_seconds)"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            time_seconds = _int_or_none(row.get('time_seconds'))
+            records.append(ResultRecord(
+                position=int(row['position']),
+                first_name=row.get('first_name', '').strip(),
+                last_name=row.get('last_name', '').strip(),
+                rider_id=_int_or_none(row.get('rider_id')),
+                team_name=(row.get('team_name') or '').strip(),
+                time_seconds=time_seconds,
+                status=Status.FINISHED if time_seconds is not None else Status.DNF,
+            ))
+    return records
+
+
+def write_stage_results_csv(path, records):
+    """Schrijf records terug in hetzelfde CSV formaat"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_CSV_FIELDS)
+        for r in records:
+            writer.writerow([
+                r.position,
+                r.first_name,
+                r.last_name,
+                '' if r.rider_id is None else r.rider_id,
+                r.team_name,
+                '' if r.time_seconds is None else r.time_seconds,
+            ])
+
+
+def read_riders_csv(path, normalize):
+    """Lees riders.csv uit een database backup; normalize wordt op voor- en achternaam toegepast"""
+    riders = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            rider_id = _int_or_none(row.get('id'))
+            if rider_id is None:
+                continue
+            first_name = (row.get('first_name') or '').strip()
+            last_name = (row.get('last_name') or '').strip()
+            riders.append(RiderRecord(
+                id=rider_id,
+                first_name=first_name,
+                last_name=last_name,
+                team_pro_id=_int_or_none(row.get('team_pro_id')),
+                first_name_normalized=normalize(first_name),
+                last_name_normalized=normalize(last_name),
+            ))
+    return riders
+
+
+class ResultColumns:
+    """Kolomgewijze opslag van uitslagen in arrays; 0 = geen rider_id, -1 = geen tijd"""
+
+    __slots__ = ('position', 'rider_id', 'time_seconds', 'status', 'first_name', 'last_name', 'team_name')
+
+    def __init__(self):
+        self.position = array('i')
+        self.rider_id = array('i')
+        self.time_seconds = array('i')
+        self.status = array('B')
+        self.first_name = []
+        self.last_name = []
+        self.team_name = []
+
+    @classmethod
+    def from_records(cls, records):
+        columns = cls()
+        for r in records:
+            columns.append(r)
+        return columns
+
+    def append(self, record):
+        self.position.append(record.position)
+        self.rider_id.append(record.rider_id or 0)
+        self.time_seconds.append(-1 if record.time_seconds is None else record.time_seconds)
+        self.status.append(record.status)
+        self.first_name.append(record.first_name)
+        self.last_name.append(record.last_name)
+        self.team_name.append(record.team_name)
+
+    def __len__(self):
+        return len(self.position)
+
+    def __getitem__(self, i):
+        time_seconds = self.time_seconds[i]
+        return ResultRecord(
+            position=self.position[i],
+            first_name=self.first_name[i],
+            last_name=self.last_name[i],
+            rider_id=self.rider_id[i] or None,
+            team_name=self.team_name[i],
+            time_seconds=None if time_seconds < 0 else time_seconds,
+            status=Status(self.status[i]),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
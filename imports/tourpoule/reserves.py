@@ -0,0 +1,296 @@
+"""
+Bulk reserve activation for all fantasy teams after a stage import.
+
+Same business rules as activateReservesForDroppedRiders in
+netlify/functions/import-stage-results.js, but computed for every team in one
+pass over a column snapshot of fantasy_team_riders instead of a few queries
+per team:
+
+1. Active main riders that dropped out -> active = false, out_of_race = true
+2. Inactive main riders in slots 1-10 move to 900+ so the slot becomes free
+3. Reserve riders that dropped out -> out_of_race = true
+4. Free main slots are filled (lowest first) with the remaining reserves,
+   ordered by slot_number, until the team has 10 active main riders
+
+The result is the delta: only the rows that change, as one set-based UPDATE.
+"""
+
+import csv
+from array import array
+from dataclasses import dataclass
+
+from .records import Status
+
+TARGET_MAIN_COUNT = 10
+FREED_SLOT_BASE = 900
+
+
+def _bool(value):
+    return str(value).strip().lower() in ('true', 't', '1')
+
+
+class TeamRiders:
+    """Kolomgewijze snapshot van fantasy_team_riders"""
+
+    __slots__ = ('id', 'fantasy_team_id', 'rider_id', 'is_main', 'slot_number', 'active', 'out_of_race')
+
+    def __init__(self):
+        self.id = array('i')
+        self.fantasy_team_id = array('i')
+        self.rider_id = array('i')
+        self.is_main = array('B')
+        self.slot_number = array('i')
+        self.active = array('B')
+        self.out_of_race = array('B')
+
+    def append(self, row):
+        self.id.append(int(row['id']))
+        self.fantasy_team_id.append(int(row['fantasy_team_id']))
+        self.rider_id.append(int(row['rider_id']))
+        self.is_main.append(row['slot_type'] == 'main')
+        self.slot_number.append(int(row['slot_number']))
+        self.active.append(_bool(row.get('active', True)))
+        self.out_of_race.append(_bool(row.get('out_of_race', False)))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Uit dict rijen (CSV backup of database query)"""
+        team_riders = cls()
+        for row in rows:
+            team_riders.append(row)
+        return team_riders
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_rows(csv.DictReader(f))
+
+    def __len__(self):
+        return len(self.id)
+
+    def copy(self):
+        team_riders = TeamRiders()
+        for name in self.__slots__:
+            column = getattr(self, name)
+            setattr(team_riders, name, array(column.typecode, column))
+        return team_riders
+
+    def apply(self, changes):
+        """Voer een delta van compute_activations door, zoals activation_sql dat in de database doet"""
+        index = {row_id: i for i, row_id in enumerate(self.id)}
+        for c in changes:
+            i = index[c.id]
+            self.is_main[i] = c.slot_type == 'main'
+            self.slot_number[i] = c.slot_number
+            self.active[i] = c.active
+            self.out_of_race[i] = c.out_of_race
+
+
+@dataclass(slots=True)
+class RiderChange:
+    id: int
+    fantasy_team_id: int
+    rider_id: int
+    slot_type: str
+    slot_number: int
+    active: bool
+    out_of_race: bool
+    reason: str
+
+
+def dropped_rider_ids(records):
+    """rider_id's met status DNF/DNS/DSQ/OTL (uit detect_dnf_status)"""
+    return {r.rider_id for r in records if r.rider_id is not None and r.status != Status.FINISHED}
+
+
+def finished_rider_ids(records):
+    return {r.rider_id for r in records if r.rider_id is not None and r.status == Status.FINISHED}
+
+
+def compute_activations(team_riders, dropped, finished=None, target=TARGET_MAIN_COUNT):
+    """Bereken de wijzigingen voor alle teams; geeft een lijst RiderChange terug
+
+    dropped: rider_id's die uit koers zijn. finished: als opgegeven tellen renners
+    zonder uitslagregel ook als uit koers (DNS), zoals in import-stage-results.js.
+    """
+    def is_out(rider_id):
+        return rider_id in dropped or (finished is not None and rider_id not in finished)
+
+    # Eén sortering over alle rijen: per team, main voor reserve, op slot_number
+    order = sorted(
+        range(len(team_riders)),
+        key=lambda i: (team_riders.fantasy_team_id[i], not team_riders.is_main[i], team_riders.slot_number[i]),
+    )
+
+    changes = []
+    start = 0
+    while start < len(order):
+        team_id = team_riders.fantasy_team_id[order[start]]
+        end = start
+        while end < len(order) and team_riders.fantasy_team_id[order[end]] == team_id:
+            end += 1
+        changes.extend(_team_changes(team_riders, order[start:end], is_out, target))
+        start = end
+    return changes
+
+
+def stage_rosters(team_riders, stage_records):
+    """{stage_number: TeamRiders} met de opstelling waarmee elke etappe gescoord is
+
+    team_riders is de opstelling vóór de eerste etappe in stage_records ({stage_number:
+    ResultRecords}, zonder gaten). Net als in import-stage-results.js worden de reserves na
+    de import van een etappe geactiveerd en pas daarna de punten berekend, dus de opstelling
+    van etappe n bevat de activaties van etappe 1 t/m n. Ongewijzigde etappes delen hun snapshot.
+    """
+    rosters = {}
+    roster = team_riders
+    for stage_number in sorted(stage_records):
+        records = stage_records[stage_number]
+        changes = compute_activations(roster, dropped_rider_ids(records), finished_rider_ids(records))
+        if changes:
+            roster = roster.copy()
+            roster.apply(changes)
+        rosters[stage_number] = roster
+    return rosters
+
+
+def submitted_rows(team_riders, target=TARGET_MAIN_COUNT):
+    """{fantasy_team_id: [(slot_type, slot_number, rider_id, replaced)]} met de opstelling zoals ingezonden
+
+    Draait de activaties terug: een vrijgemaakte main renner (slot 900+n, replaced = True) gaat terug
+    naar slot n en de renner die daar nu staat was een geactiveerde reserve; die krijgt de laagste
+    reserve slot die ontbreekt, in dezelfde volgorde als compute_activations ze activeert.
+    """
+    by_team = {}
+    for i in range(len(team_riders)):
+        by_team.setdefault(team_riders.fantasy_team_id[i], []).append(i)
+
+    t = team_riders
+    submitted = {}
+    for team_id, rows in by_team.items():
+        mains = {t.slot_number[i]: i for i in rows if t.is_main[i] and 1 <= t.slot_number[i] <= target}
+        freed = sorted((i for i in rows if t.is_main[i] and t.slot_number[i] > FREED_SLOT_BASE),
+                       key=lambda i: t.slot_number[i])
+        restored = {}
+        displaced = []
+        for i in freed:
+            slot = t.slot_number[i] - FREED_SLOT_BASE
+            if not 1 <= slot <= target or slot in restored.values():
+                # Uitgeweken bij een botsing (901 bezet -> 902): de eerste slot die nog niet terug is
+                slot = next((n for n in range(1, target + 1) if n not in restored.values()), slot)
+            restored[i] = slot
+            if slot in mains:
+                displaced.append((slot, mains.pop(slot)))
+
+        result = [('main', slot, t.rider_id[i], True) for i, slot in restored.items()]
+        result += [('main', slot, t.rider_id[i], False) for slot, i in mains.items()]
+        result += [('main', t.slot_number[i], t.rider_id[i], False)
+                   for i in rows if t.is_main[i] and target < t.slot_number[i] <= FREED_SLOT_BASE]
+        reserves = [i for i in rows if not t.is_main[i]]
+        used = {t.slot_number[i] for i in reserves}
+        missing = (n for n in range(1, len(rows) + 1) if n not in used)
+        result += [('reserve', next(missing), t.rider_id[i], False) for _, i in sorted(displaced)]
+        result += [('reserve', t.slot_number[i], t.rider_id[i], False) for i in reserves]
+        submitted[team_id] = result
+    return submitted
+
+
+def _team_changes(t, rows, is_out, target):
+    # Werkkopie van de kolommen voor dit team
+    is_main = {i: bool(t.is_main[i]) for i in rows}
+    slot = {i: t.slot_number[i] for i in rows}
+    active = {i: bool(t.active[i]) for i in rows}
+    out_of_race = {i: bool(t.out_of_race[i]) for i in rows}
+    reasons = {i: [] for i in rows}
+    mains = [i for i in rows if is_main[i]]
+    reserves = [i for i in rows if not is_main[i]]
+
+    # STEP 1: Deactivate main riders that are DNF/DNS in this stage
+    for i in mains:
+        if active[i] and is_out(t.rider_id[i]):
+            active[i] = False
+            out_of_race[i] = True
+            reasons[i].append('main uit koers')
+
+    # STEP 2: Free up slots from inactive main riders
+    used_high = {slot[i] for i in mains if slot[i] > target}
+    for i in mains:
+        if not active[i] and 1 <= slot[i] <= target:
+            new_slot = FREED_SLOT_BASE + slot[i]
+            while new_slot in used_high:
+                new_slot += 1
+            used_high.add(new_slot)
+            slot[i] = new_slot
+            reasons[i].append('slot vrijgemaakt')
+
+    # STEP 3: Mark reserve riders that are DNF/DNS as out_of_race
+    for i in reserves:
+        if not out_of_race[i] and is_out(t.rider_id[i]):
+            out_of_race[i] = True
+            reasons[i].append('reserve uit koers')
+
+    # STEP 4: Activate reserves into free main slots
+    occupied = {slot[i] for i in mains if active[i] and 1 <= slot[i] <= target}
+    needed = max(0, target - sum(1 for i in mains if active[i]))
+    free_slots = [n for n in range(1, target + 1) if n not in occupied]
+    available = [i for i in reserves if not out_of_race[i]]
+    for i, target_slot in zip(available[:needed], free_slots):
+        is_main[i] = True
+        slot[i] = target_slot
+        active[i] = True
+        reasons[i].append('reserve geactiveerd')
+
+    return [
+        RiderChange(
+            id=t.id[i],
+            fantasy_team_id=t.fantasy_team_id[i],
+            rider_id=t.rider_id[i],
+            slot_type='main' if is_main[i] else 'reserve',
+            slot_number=slot[i],
+            active=active[i],
+            out_of_race=out_of_race[i],
+            reason=', '.join(reasons[i]),
+        )
+        for i in rows if reasons[i]
+    ]
+
+
+def activation_sql(changes, stage_number):
+    """Eén set-based UPDATE voor de hele delta (alleen integers/booleans, geen escaping nodig)"""
+    ids = ','.join(str(c.id) for c in changes)
+    slot_types = ','.join(f"'{c.slot_type}'" for c in changes)
+    slot_numbers = ','.join(str(c.slot_number) for c in changes)
+    actives = ','.join('true' if c.active else 'false' for c in changes)
+    out_of_races = ','.join('true' if c.out_of_race else 'false' for c in changes)
+    activated = sum(1 for c in changes if 'reserve geactiveerd' in c.reason)
+    teams = len({c.fantasy_team_id for c in changes})
+
+    return f"""-- Reserve activation after Stage {stage_number}
+-- Generated automatically
+-- {len(changes)} fantasy_team_riders rows changed in {teams} team(s), {activated} reserve(s) activated
+-- Run BEFORE calculating stage points
+
+BEGIN;
+
+-- First, move all changed rows to temporary negative slot_numbers to avoid unique constraint violations
+UPDATE fantasy_team_riders
+SET slot_number = -id
+WHERE id = ANY(ARRAY[{ids}]::int[]);
+
+UPDATE fantasy_team_riders ftr
+SET
+  slot_type = d.slot_type,
+  slot_number = d.slot_number,
+  active = d.active,
+  out_of_race = d.out_of_race
+FROM unnest(
+  ARRAY[{ids}]::int[],
+  ARRAY[{slot_types}]::varchar[],
+  ARRAY[{slot_numbers}]::int[],
+  ARRAY[{actives}]::boolean[],
+  ARRAY[{out_of_races}]::boolean[]
+) AS d(id, slot_type, slot_number, active, out_of_race)
+WHERE ftr.id = d.id;
+
+COMMIT;
+"""
@@ -0,0 +1,153 @@
+"""
+Resolve rider_id's of a parsed stage against the riders table.
+
+Every lookup against the riders table is recorded as a dependency
+(`id:<rider_id>` or `name:<first>|<last>` -> what the table returned), so a
+cached resolution can be re-checked against a changed riders.csv without
+resolving the stage again.
+"""
+
+import hashlib
+import json
+
+from . import names
+from .names import NAME_CORRECTIONS, correct_name, normalize_name
+
+# Special name mappings (exact matches that need manual mapping)
+SPECIAL_MAPPINGS = {
+    ('Mattis', 'Cattaneo'): ('Mattia', 'Cattaneo', 18),
+    ('Aurelian', 'Paret-Peintre'): ('Aurelien', 'Paret-Peintre', 126),
+    ('Edward', 'Dunbar'): ('Eddie', 'Dunbar', 98),
+    ('Lucas', 'Plapp'): ('Luke', 'Plapp', 102),
+    ('Sebastian', 'Grignard'): ('Sebastien', 'Grignard', 173),
+    ('Anders', 'Halland Johannessen'): ('Anders Halland', 'Johannessen', 182),
+    ('Anders', 'Johannessen'): ('Anders Halland', 'Johannessen', 182),  # Alternative format
+    ('Tobias', 'Johannessen'): ('Tobias Halland', 'Johannessen', 177),  # or 182 for Anders
+    ('Jonas', 'Abrahamson'): ('Jonas', 'Abrahamsen', 178),
+    ('Niklas', 'Maerkl'): ('Niklas', 'Markl', 158),
+    ('Enric', 'Mas'): ('Enric Mondiale Team', 'Mas', 113),  # Database has wrong name
+    ('Søren', 'Wærenskjold'): ('Soren', 'Waerenskjold', 184),
+    ('Han', 'van Wilder'): ('Ilan', 'Van Wilder', 24),  # Different person, but likely match
+}
+
+
+def resolver_version():
+    """Hash van de correctie tabellen, names.py en deze module; verandert er een, dan zijn alle resoluties ongeldig"""
+    sources = []
+    for path in (__file__, names.__file__):
+        with open(path, 'rb') as f:
+            sources.append(hashlib.sha256(f.read()).hexdigest())
+    tables = {
+        'source': sources,
+        'corrections': NAME_CORRECTIONS,
+        'special': [[list(k), list(v)] for k, v in sorted(SPECIAL_MAPPINGS.items())],
+    }
+    return hashlib.sha256(json.dumps(tables, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+class RiderIndex:
+    """Hash indexes over de riders tabel op id en genormaliseerde naam"""
+
+    def __init__(self, riders):
+        self.by_id = {}
+        self.by_name = {}
+        for rider in riders:
+            self.by_id[rider.id] = rider
+            self.by_name.setdefault(rider.name_key, []).append(rider)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get_by_id(self, rider_id, deps=None):
+        rider = self.by_id.get(rider_id)
+        if deps is not None:
+            deps[f'id:{rider_id}'] = self.fingerprint(f'id:{rider_id}')
+        return rider
+
+    def get_by_name(self, key, deps=None):
+        matches = self.by_name.get(key)
+        if deps is not None:
+            deps[f'name:{key[0]}|{key[1]}'] = self.fingerprint(f'name:{key[0]}|{key[1]}')
+        return matches
+
+    def find(self, first_name, last_name):
+        """rider_id voor een (mogelijk verkeerd gespelde) naam, zonder het record aan te passen"""
+        special = SPECIAL_MAPPINGS.get((first_name, last_name))
+        if special:
+            return special[2]
+        first_name, last_name = correct_name(first_name, last_name)
+        matches = self.by_name.get((normalize_name(first_name), normalize_name(last_name)))
+        return matches[0].id if matches else None
+
+    def fingerprint(self, dep):
+        """Wat de tabel nu teruggeeft voor een lookup (JSON vergelijkbaar)"""
+        kind, value = dep.split(':', 1)
+        if kind == 'id':
+            rider = self.by_id.get(int(value))
+            return None if rider is None else list(rider.name_key)
+        matches = self.by_name.get(tuple(value.split('|', 1)))
+        return None if matches is None else [[r.id, r.first_name, r.last_name] for r in matches]
+
+
+def resolve_rider(rider, index, deps=None):
+    """Corrigeer naam en rider_id van één ResultRecord in place; geeft een correctie dict of None"""
+    original_first = rider.first_name
+    original_last = rider.last_name
+    provided_id = rider.rider_id
+
+    # Check for special mappings first
+    special_key = (original_first, original_last)
+    if special_key in SPECIAL_MAPPINGS:
+        rider.first_name, rider.last_name, rider.rider_id = SPECIAL_MAPPINGS[special_key]
+        rider.name_corrected = True
+        return None
+
+    first_name, last_name = correct_name(original_first, original_last)
+    key = (normalize_name(first_name), normalize_name(last_name))
+
+    correct_id = None
+    correction = None
+
+    if provided_id is not None:
+        db_rider = index.get_by_id(provided_id, deps)
+        if db_rider is not None and db_rider.name_key == key:
+            correct_id = provided_id
+        else:
+            # ID onbekend of hoort bij een andere naam: zoek op naam
+            matches = index.get_by_name(key, deps)
+            if matches and (db_rider is not None or len(matches) == 1):
+                correct_id = matches[0].id
+                correction = {
+                    'position': rider.position,
+                    'name': f"{original_first} {original_last}",
+                    'old_id': provided_id,
+                    'new_id': correct_id,
+                    'db_name': f"{matches[0].first_name} {matches[0].last_name}"
+                }
+                if len(matches) > 1:
+                    correction['note'] = f'{len(matches)} matches found'
+    else:
+        # No ID provided, find by name (multiple matches: use first)
+        matches = index.get_by_name(key, deps)
+        if matches:
+            correct_id = matches[0].id
+
+    rider.first_name = first_name
+    rider.last_name = last_name
+    rider.rider_id = correct_id
+
+    if original_first != first_name or original_last != last_name:
+        rider.name_corrected = True
+
+    return correction
+
+
+def resolve_stage(records, index):
+    """Resolve alle records van een etappe; geeft (corrections, deps) terug"""
+    corrections = []
+    deps = {}
+    for rider in records:
+        correction = resolve_rider(rider, index, deps)
+        if correction:
+            corrections.append(correction)
+    return corrections, deps
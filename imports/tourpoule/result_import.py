@@ -0,0 +1,223 @@
+"""
+Stage result text -> records -> SQL, as used by import-etappe-uitslag.py.
+
+The input is a pasted result (text, tab separated or CSV lines) or the CSV
+fallback. Times are collected as text and converted for the whole stage at
+once (times.apply_stage_times), because gaps need the winner's time.
+"""
+
+import csv
+import io
+import re
+
+from .records import ResultRecord, Status
+from .times import apply_stage_times
+
+# Wat te doen met renners zonder tijd
+DNF_SKIP = '1'
+DNF_NULL_TIME = '2'
+DNF_POSITION = '3'
+DNF_POSITION_BASE = 999
+
+FORMAT_EXAMPLES = (
+    "  1. CSV: 1,Jasper,Philipsen,3:53:11",
+    "  2. Tekst: 1. Jasper Philipsen 3:53:11",
+    "  3. Tab: 1\tJasper\tPhilipsen\t3:53:11",
+)
+
+_TEXT_LINE = re.compile(
+    r'^(\d+)[\.\)]?\s+(.+?)\s+(\+\s?[\d:]+|s\.?t\.?|,,|"|(?:\d+[:h])?\d+[:m]?\d+[s]?|DNF|DNS|DSQ|OTL)(?=\s|$)'
+)
+
+
+def _split_name(name_parts):
+    if len(name_parts) >= 2:
+        return name_parts[0], ' '.join(name_parts[1:])
+    return (name_parts[0] if name_parts else ''), ''
+
+
+def _parse_line(line):
+    """Eén regel -> (position, first_name, last_name, time tekst) of None"""
+    # CSV formaat (",," als tijd is geen CSV: dan begint de regel niet met "positie,")
+    if ',' in line and line.split(',', 1)[0].strip().isdigit():
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) >= 3:
+            try:
+                return int(parts[0]), parts[1], parts[2], parts[3] if len(parts) > 3 else ''
+            except ValueError:
+                return None
+        return None
+
+    # Tekst formaat: "1. Jasper Philipsen 3:53:11" of "1 Jasper Philipsen 3:53:11"
+    if re.match(r'^\d+[\.\)]\s+', line) or re.match(r'^\d+\s+', line):
+        match = _TEXT_LINE.match(line)
+        if match:
+            first_name, last_name = _split_name(match.group(2).strip().split())
+            return int(match.group(1)), first_name, last_name, match.group(3)
+        # Simpel formaat: positie naam tijd (laatste deel is tijd, rest is naam)
+        parts = line.split()
+        if len(parts) >= 3:
+            try:
+                position = int(parts[0])
+            except ValueError:
+                return None
+            first_name, last_name = _split_name(parts[1:-1])
+            return position, first_name, last_name, parts[-1]
+        return None
+
+    # Tab gescheiden
+    if '\t' in line:
+        parts = [p.strip() for p in line.split('\t')]
+        if len(parts) >= 3:
+            try:
+                return int(parts[0]), parts[1], parts[2], parts[3] if len(parts) > 3 else ''
+            except ValueError:
+                return None
+    return None
+
+
+def parse_results(content, is_csv=False):
+    """Uitslag tekst of CSV -> (ResultRecords, aantal onleesbare tijden)"""
+    riders = []
+    time_texts = []
+    if is_csv:
+        for row in csv.DictReader(io.StringIO(content)):
+            position = int(row.get('position', 0))
+            if position > 0:
+                riders.append(ResultRecord(
+                    position=position,
+                    first_name=row.get('first_name', '').strip(),
+                    last_name=row.get('last_name', '').strip(),
+                ))
+                time_texts.append(row.get('time_seconds', ''))
+    else:
+        for line in content.strip().split('\n'):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parsed = _parse_line(line)
+            if parsed is not None:
+                position, first_name, last_name, time_text = parsed
+                riders.append(ResultRecord(position=position, first_name=first_name, last_name=last_name))
+                time_texts.append(time_text)
+
+    unreadable_times = apply_stage_times(riders, time_texts)
+    return riders, unreadable_times
+
+
+def split_finishers(riders):
+    """(finishers, renners zonder tijd); renners zonder tijd en status krijgen DNF"""
+    finished_riders = []
+    dnf_riders = []
+    for rider in riders:
+        if rider.time_seconds is not None:
+            finished_riders.append(rider)
+        else:
+            if rider.status == Status.FINISHED:
+                rider.status = Status.DNF
+            dnf_riders.append(rider)
+    return finished_riders, dnf_riders
+
+
+def select_results(finished_riders, dnf_riders, choice=DNF_SKIP):
+    """De renners die in stage_results komen; bij DNF_POSITION krijgen DNF renners positie 999+"""
+    results = list(finished_riders)
+    if choice == DNF_NULL_TIME:
+        results.extend(dnf_riders)
+    elif choice == DNF_POSITION:
+        for i, rider in enumerate(dnf_riders):
+            rider.position = DNF_POSITION_BASE + i
+        results.extend(dnf_riders)
+    return results
+
+
+def _quote(value):
+    return value.replace("'", "''")
+
+
+def results_sql(finished_riders, dnf_riders, choice=DNF_SKIP):
+    """SQL script met VALUES literals voor etappe 1 (rider_id wordt op naam opgezocht)"""
+    sql_content = f"""-- SQL Script to import Stage 1 results from temp/uitslag etappe 1.txt
+-- Generated automatically
+-- Total riders: {len(finished_riders) + len(dnf_riders)} ({len(finished_riders)} finished, {len(dnf_riders)} DNF/DNS/DSQ)
+
+-- First, verify that Stage 1 exists
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM stages WHERE stage_number = 1) THEN
+    RAISE EXCEPTION 'Stage 1 does not exist. Please run full-reset-and-import.sql first.';
+  END IF;
+END $$;
+
+-- Clear existing Stage 1 results
+DELETE FROM stage_results WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);
+
+-- Insert Stage 1 results
+-- Uses rider_id lookup by name if not provided
+-- Calculates same_time_group based on time_seconds
+INSERT INTO stage_results (stage_id, rider_id, position, time_seconds, same_time_group)
+WITH stage_data AS (
+  SELECT 
+    s.id as stage_id,
+    v.position,
+    v.first_name,
+    v.last_name,
+    v.time_seconds,
+    -- Calculate same_time_group: assign group number based on time_seconds
+    DENSE_RANK() OVER (ORDER BY v.time_seconds NULLS LAST) as time_group
+  FROM stages s
+  CROSS JOIN (VALUES
+"""
+
+    values = []
+    for rider in finished_riders:
+        values.append(f"    ({rider.position}, '{_quote(rider.first_name)}', '{_quote(rider.last_name)}', {rider.time_seconds})")
+    if choice == DNF_NULL_TIME:
+        for rider in dnf_riders:
+            values.append(f"    ({rider.position}, '{_quote(rider.first_name)}', '{_quote(rider.last_name)}', NULL)")
+    elif choice == DNF_POSITION:
+        for i, rider in enumerate(dnf_riders):
+            values.append(f"    ({DNF_POSITION_BASE + i}, '{_quote(rider.first_name)}', '{_quote(rider.last_name)}', NULL)")
+
+    sql_content += ',\n'.join(values)
+    sql_content += """
+  ) AS v(position, first_name, last_name, time_seconds)
+  WHERE s.stage_number = 1
+),
+rider_lookup AS (
+  SELECT 
+    sd.*,
+    (
+      SELECT r.id 
+      FROM riders r 
+      WHERE LOWER(TRIM(r.first_name)) = LOWER(TRIM(sd.first_name))
+        AND LOWER(TRIM(r.last_name)) = LOWER(TRIM(sd.last_name))
+      LIMIT 1
+    ) as rider_id
+  FROM stage_data sd
+)
+SELECT DISTINCT ON (stage_id, rider_id)
+  stage_id,
+  rider_id,
+  position,
+  time_seconds,
+  time_group as same_time_group
+FROM rider_lookup
+WHERE rider_id IS NOT NULL
+ORDER BY stage_id, rider_id, position
+ON CONFLICT (stage_id, rider_id) 
+DO UPDATE SET
+  position = EXCLUDED.position,
+  time_seconds = EXCLUDED.time_seconds,
+  same_time_group = EXCLUDED.same_time_group;
+
+-- Verify the import
+SELECT 
+  COUNT(*) as total_results,
+  COUNT(DISTINCT rider_id) as unique_riders,
+  COUNT(DISTINCT same_time_group) as time_groups,
+  COUNT(*) FILTER (WHERE time_seconds IS NULL) as dnf_count
+FROM stage_results
+WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);
+"""
+    return sql_content
@@ -0,0 +1,268 @@
+"""
+Statistics rollup cube: rider x pro team x stage.
+
+get-top-riders-stats.js, get-stage-winners-stats.js and
+get-team-performance-stats.js rebuild their numbers from stage_results on
+every call (one query per stage). The cube keeps one cell per rider per stage
+with the rider's pro team at that stage and the measures
+
+    results, points, wins, top10
+
+plus the stage attributes (distance_km and its bucket). Rider, team, stage
+and bucket totals are kept next to the cells and updated incrementally:
+(re)importing a stage subtracts that stage's old cells and adds the new ones,
+the other stages are not touched.
+
+Distance buckets follow the awards: MID_RANGE is "ritten van 90-120 km", so
+90 <= distance_km <= 120 is the 'mid_range' bucket.
+
+update_sql() only writes rows; the tables come from prisma/schema.prisma
+(imports/add-stat-rollup-tables.sql). Which version of each stage is in the
+database is kept in a journal (APPLIED_PATH): a stage is pending until its
+current source_hash has been marked as applied.
+"""
+
+import json
+import os
+
+from .journal import Journal
+from .records import Status
+
+FORMAT = 'tourpoule-rollup/1'
+DEFAULT_PATH = os.path.join('imports', 'rollup-cube.json')
+APPLIED_PATH = os.path.join('imports', 'rollup-applied.jsonl')
+
+MEASURES = ('results', 'points', 'wins', 'top10')
+RESULTS, POINTS, WINS, TOP10 = range(len(MEASURES))
+
+SHORT = 'kort'
+MID_RANGE = 'mid_range'
+MEDIUM = 'middel'
+LONG = 'lang'
+BUCKETS = (SHORT, MID_RANGE, MEDIUM, LONG)
+
+
+def distance_bucket(distance_km):
+    """Afstand van een etappe -> bucket (None als de afstand onbekend is)"""
+    if distance_km is None or distance_km == '':
+        return None
+    distance_km = float(distance_km)
+    if distance_km < 90:
+        return SHORT
+    if distance_km <= 120:
+        return MID_RANGE
+    if distance_km < 180:
+        return MEDIUM
+    return LONG
+
+
+def stage_cells(records, position_points, team_of, extra_points=None):
+    """ResultRecords van één etappe -> {(rider_id, team_pro_id): [results, points, wins, top10]}
+
+    team_of: {rider_id: team_pro_id}; extra_points: {rider_id: punten} (truien).
+    Renners zonder rider_id tellen niet mee.
+    """
+    cells = {}
+    for r in records:
+        if r.rider_id is None:
+            continue
+        classified = r.status == Status.FINISHED and r.time_seconds is not None
+        cell = cells.setdefault((r.rider_id, team_of.get(r.rider_id)), [0] * len(MEASURES))
+        cell[RESULTS] += 1
+        if classified:
+            cell[POINTS] += position_points.get(r.position, 0)
+            cell[WINS] += r.position == 1
+            cell[TOP10] += 1 <= r.position <= 10
+    for rider_id, points in (extra_points or {}).items():
+        cell = cells.setdefault((rider_id, team_of.get(rider_id)), [0] * len(MEASURES))
+        cell[POINTS] += points
+    return cells
+
+
+def _add(totals, key, values, sign):
+    cell = totals.get(key)
+    if cell is None:
+        cell = totals[key] = [0] * len(MEASURES)
+    for i, value in enumerate(values):
+        cell[i] += sign * value
+    if not any(cell):
+        del totals[key]
+
+
+class RollupCube:
+    """Cellen per etappe plus de totalen per renner, ploeg, etappe en bucket"""
+
+    def __init__(self):
+        # {stage_number: {'distance_km', 'bucket', 'source_hash'}}
+        self.stages = {}
+        # {stage_number: {(rider_id, team_pro_id): [measures]}}
+        self.cells = {}
+        self.by_rider = {}
+        self.by_team = {}
+        self.by_stage = {}
+        self.by_bucket_rider = {}
+        self.by_bucket_team = {}
+
+    def _apply(self, stage_number, sign):
+        bucket = self.stages[stage_number]['bucket']
+        for (rider_id, team_pro_id), values in self.cells.get(stage_number, {}).items():
+            _add(self.by_rider, rider_id, values, sign)
+            _add(self.by_team, team_pro_id, values, sign)
+            _add(self.by_stage, stage_number, values, sign)
+            if bucket is not None:
+                _add(self.by_bucket_rider, (bucket, rider_id), values, sign)
+                _add(self.by_bucket_team, (bucket, team_pro_id), values, sign)
+
+    def update_stage(self, stage_number, cells, distance_km=None, source_hash=None):
+        """Vervang de cellen van één etappe; de totalen worden met het verschil bijgewerkt"""
+        if stage_number in self.stages:
+            self._apply(stage_number, -1)
+        self.stages[stage_number] = {
+            'distance_km': None if distance_km in (None, '') else float(distance_km),
+            'bucket': distance_bucket(distance_km),
+            'source_hash': source_hash,
+        }
+        self.cells[stage_number] = cells
+        self._apply(stage_number, 1)
+
+    def remove_stage(self, stage_number):
+        if stage_number in self.stages:
+            self._apply(stage_number, -1)
+            del self.stages[stage_number]
+            del self.cells[stage_number]
+
+    def stages_in(self, bucket):
+        return sorted(n for n, stage in self.stages.items() if stage['bucket'] == bucket)
+
+    def top(self, dimension='rider', measure='points', n=10, bucket=None):
+        """[(rider_id of team_pro_id, waarde)] aflopend; bucket beperkt tot etappes in die afstand"""
+        index = MEASURES.index(measure)
+        if bucket is None:
+            totals = self.by_rider if dimension == 'rider' else self.by_team
+            items = ((key, values[index]) for key, values in totals.items())
+        else:
+            totals = self.by_bucket_rider if dimension == 'rider' else self.by_bucket_team
+            items = ((key[1], values[index]) for key, values in totals.items() if key[0] == bucket)
+        ranked = sorted((item for item in items if item[1]), key=lambda item: (-item[1], item[0] is None, item[0] or 0))
+        return ranked[:n]
+
+    def stage_winners(self):
+        """{stage_number: [(rider_id, team_pro_id)]} (meer dan één bij een gedeelde eerste plaats)"""
+        return {
+            stage_number: sorted(key for key, values in self.cells[stage_number].items() if values[WINS])
+            for stage_number in sorted(self.cells)
+        }
+
+    def save(self, path=DEFAULT_PATH):
+        """Alleen de etappes en cellen; de totalen worden bij het laden opgebouwd"""
+        data = {
+            'format': FORMAT,
+            'measures': list(MEASURES),
+            'stages': {
+                str(n): {**self.stages[n], 'cells': [[*key, *values] for key, values in sorted(
+                    self.cells[n].items(), key=lambda item: item[0][0])]}
+                for n in sorted(self.stages)
+            },
+        }
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        cube = cls()
+        if not os.path.exists(path):
+            return cube
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT or data.get('measures') != list(MEASURES):
+            # Ander formaat: opnieuw opbouwen
+            return cube
+        for key, stage in data['stages'].items():
+            cells = {(row[0], row[1]): row[2:] for row in stage['cells']}
+            cube.update_stage(int(key), cells, stage['distance_km'], stage['source_hash'])
+        return cube
+
+
+def bucket_averages(stage_points, stage_numbers):
+    """Gemiddelde punten per team over de gegeven etappes (bv. MID_RANGE)
+
+    stage_points: {stage_number: {participant_id: punten}}, zoals HistoryStore.stage_points.
+    """
+    totals = {}
+    counts = {}
+    for stage_number in stage_numbers:
+        for team, points in stage_points.get(stage_number, {}).items():
+            totals[team] = totals.get(team, 0) + points
+            counts[team] = counts.get(team, 0) + 1
+    return {team: totals[team] / counts[team] for team in totals}
+
+
+def _sql_value(value):
+    return 'NULL' if value is None else str(value)
+
+
+def sql_stages(path):
+    """Etappes in een eerder geschreven update_sql bestand (de '-- Stages:' regel); [] zonder bestand"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('-- Stages:'):
+                return [int(n) for n in line[len('-- Stages:'):].split(',') if n.strip()]
+    return []
+
+
+def pending_stages(cube, path=APPLIED_PATH):
+    """Etappes in de cube waarvan deze versie (source_hash) nog niet als uitgevoerd in het journal staat"""
+    applied = Journal(path).load()
+    return sorted(n for n, stage in cube.stages.items()
+                  if applied.get(str(n), {}).get('source_hash') != stage['source_hash'])
+
+
+def mark_applied(cube, stage_numbers, path=APPLIED_PATH):
+    """Noteer de huidige versie van deze etappes als uitgevoerd in de database"""
+    journal = Journal(path)
+    for n in stage_numbers:
+        if n in cube.stages:
+            journal.append({'key': str(n), 'source_hash': cube.stages[n]['source_hash']})
+
+
+def update_sql(cube, stage_numbers):
+    """SQL die de cellen van de gegeven etappes in stat_rollup vervangt (per etappe idempotent)"""
+    lines = [
+        "-- Statistics rollup cube (imports/update-stats-rollup.py)",
+        "-- Generated automatically",
+        f"-- Stages: {', '.join(str(n) for n in stage_numbers)}",
+        "-- Tabellen: imports/add-stat-rollup-tables.sql",
+    ]
+    for n in stage_numbers:
+        stage = cube.stages[n]
+        bucket = 'NULL' if stage['bucket'] is None else f"'{stage['bucket']}'"
+        stage_id = f"(SELECT id FROM stages WHERE stage_number = {n})"
+        lines += [
+            "",
+            f"-- Stage {n}",
+            f"DELETE FROM stat_rollup WHERE stage_id = {stage_id};",
+            "INSERT INTO stat_rollup_stages (stage_id, distance_km, bucket)",
+            f"SELECT id, distance_km, {bucket} FROM stages WHERE stage_number = {n}",
+            "ON CONFLICT (stage_id) DO UPDATE SET distance_km = EXCLUDED.distance_km, bucket = EXCLUDED.bucket;",
+        ]
+        cells = sorted(cube.cells[n].items(), key=lambda item: item[0][0])
+        if not cells:
+            continue
+        values = ',\n'.join(
+            f"    ({rider_id}, {_sql_value(team_pro_id)}, {', '.join(map(str, measures))})"
+            for (rider_id, team_pro_id), measures in cells
+        )
+        lines += [
+            "INSERT INTO stat_rollup (stage_id, rider_id, team_pro_id, bucket, results, points, wins, top10)",
+            f"SELECT s.id, v.rider_id, v.team_pro_id::INTEGER, {bucket}, v.results, v.points, v.wins, v.top10",
+            "FROM stages s",
+            "CROSS JOIN (VALUES",
+            values,
+            "  ) AS v(rider_id, team_pro_id, results, points, wins, top10)",
+            f"WHERE s.stage_number = {n};",
+        ]
+    return ''.join(line + '\n' for line in lines)
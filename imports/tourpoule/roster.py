@@ -0,0 +1,251 @@
+"""
+Start list -> riders table synchronization as a minimal delta.
+
+Both sides are indexed by team and by folded name (normalize_name plus the
+letters NFD does not decompose, so 'Søren Wærenskjold' == 'Soren
+Waerenskjold'). Matching runs in passes, each one a hash lookup on the riders
+that are still unmatched:
+
+1. same folded first + last name (any team)       -> team move if the team differs
+2. same team + folded last name, unique on both sides and a similar first name
+3. same team + folded first name, unique on both sides and a similar last name
+                                                   -> name spelling fix (2 and 3)
+
+Start list riders left over are inserts, riders table rows left over are
+retirements (team_pro_id = NULL; rows stay because of the foreign keys).
+Only rows that change end up in the delta. Updates and retirements are one
+INSERT ... ON CONFLICT (id) DO UPDATE on their known ids; new riders get no
+id (the column default picks it) and conflict on the normalized name, so a
+sequence that is behind max(id) fails on the primary key instead of
+overwriting an existing rider. The delta is DML only: the normalized columns
+and their unique index (riders_normalized_name_key) are in
+prisma/schema.prisma and imports/add-riders-normalized-name-key.sql.
+"""
+
+import csv
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+from .names import normalize_name
+
+INSERT = 'insert'
+UPDATE = 'update'
+RETIRE = 'retire'
+
+# Minimale gelijkenis van de andere naamhelft bij een match op team + één naamhelft
+SIMILAR_NAME_RATIO = 0.5
+
+_FOLD = str.maketrans({
+    'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'ı': 'i', '-': ' ',
+})
+_SPACES = re.compile(r'\s+')
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def fold_name(name):
+    """normalize_name + letters zonder NFD decompositie; koppeltekens tellen als spatie"""
+    return _SPACES.sub(' ', normalize_name(name).translate(_FOLD)).strip()
+
+
+def team_key(name):
+    """'Groupama - FDJ' en 'Groupama-FDJ' -> 'groupamafdj'"""
+    return _NON_ALNUM.sub('', fold_name(name))
+
+
+@dataclass(slots=True)
+class StartListRider:
+    first_name: str
+    last_name: str
+    team_name: str
+    start_number: int | None = None
+    team_pro_id: int | None = None
+
+
+@dataclass(slots=True)
+class RosterChange:
+    kind: str
+    rider_id: int | None
+    first_name: str
+    last_name: str
+    team_pro_id: int | None
+    reason: str
+
+
+class TeamLookup:
+    """Teamnaam uit de start lijst -> teams_pro.id (op naam, anders via de teamcode)"""
+
+    def __init__(self, teams, codes=None):
+        self.by_key = {team_key(t['name']): int(t['id']) for t in teams}
+        by_code = {t['code']: int(t['id']) for t in teams if t.get('code')}
+        # imports/teams_pro.csv: naam -> code, voor namen die in de database anders gespeld zijn
+        for name, code in (codes or {}).items():
+            if code in by_code:
+                self.by_key.setdefault(team_key(name), by_code[code])
+
+    def team_id(self, name):
+        return self.by_key.get(team_key(name))
+
+
+def read_start_list(path, teams):
+    """imports/riders-from-pdf.csv (start_number,first_name,last_name,team_name)"""
+    riders = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            number = (row.get('start_number') or '').strip()
+            riders.append(StartListRider(
+                first_name=row['first_name'].strip(),
+                last_name=row['last_name'].strip(),
+                team_name=row['team_name'].strip(),
+                start_number=int(number) if number.isdigit() else None,
+                team_pro_id=teams.team_id(row['team_name']),
+            ))
+    return riders
+
+
+def _similar(a, b):
+    return SequenceMatcher(None, a, b).ratio() >= SIMILAR_NAME_RATIO
+
+
+def _unique_index(items, key):
+    """{key: item} voor keys die precies één keer voorkomen"""
+    index = {}
+    duplicates = set()
+    for item in items:
+        k = key(item)
+        if k in index:
+            duplicates.add(k)
+        index[k] = item
+    for k in duplicates:
+        del index[k]
+    return index
+
+
+def diff_roster(db_riders, start_list, retire=True):
+    """Minimale set wijzigingen om de riders tabel gelijk te maken aan de start lijst
+
+    db_riders: RiderRecord's, start_list: StartListRider's. Geeft een lijst RosterChange.
+    """
+    changes = []
+    pairs = []
+
+    # Pass 1: volledige naam
+    by_name = {}
+    for rider in db_riders:
+        by_name.setdefault((fold_name(rider.first_name), fold_name(rider.last_name)), []).append(rider)
+    unmatched = []
+    for entry in start_list:
+        candidates = by_name.get((fold_name(entry.first_name), fold_name(entry.last_name)))
+        if candidates:
+            pairs.append((candidates.pop(0), entry, None))
+        else:
+            unmatched.append(entry)
+    remaining = [r for riders in by_name.values() for r in riders]
+
+    # Pass 2 en 3: zelfde team + één naamhelft, uniek aan beide kanten
+    for same, other in (('last_name', 'first_name'), ('first_name', 'last_name')):
+        def key(item):
+            return (item.team_pro_id, fold_name(getattr(item, same)))
+
+        db_index = _unique_index(remaining, key)
+        list_index = _unique_index(unmatched, key)
+        matched = set()
+        for k, entry in list_index.items():
+            rider = db_index.get(k)
+            if rider is None or k[0] is None:
+                continue
+            if _similar(fold_name(getattr(rider, other)), fold_name(getattr(entry, other))):
+                pairs.append((rider, entry, 'spelling'))
+                matched.add(id(rider))
+                matched.add(id(entry))
+        remaining = [r for r in remaining if id(r) not in matched]
+        unmatched = [e for e in unmatched if id(e) not in matched]
+
+    for rider, entry, how in pairs:
+        reasons = []
+        first_name, last_name = rider.first_name, rider.last_name
+        if how == 'spelling':
+            first_name, last_name = entry.first_name, entry.last_name
+            reasons.append(f"naam {rider.first_name} {rider.last_name} -> {entry.first_name} {entry.last_name}")
+        team_pro_id = rider.team_pro_id
+        if entry.team_pro_id is not None and entry.team_pro_id != rider.team_pro_id:
+            team_pro_id = entry.team_pro_id
+            reasons.append(f"team {rider.team_pro_id} -> {entry.team_pro_id}")
+        if reasons:
+            changes.append(RosterChange(UPDATE, rider.id, first_name, last_name, team_pro_id, ', '.join(reasons)))
+
+    for entry in unmatched:
+        changes.append(RosterChange(INSERT, None, entry.first_name, entry.last_name, entry.team_pro_id,
+                                    f"nieuw ({entry.team_name})"))
+
+    if retire:
+        for rider in remaining:
+            if rider.team_pro_id is not None:
+                changes.append(RosterChange(RETIRE, rider.id, rider.first_name, rider.last_name, None,
+                                            "niet meer op de start lijst"))
+
+    changes.sort(key=lambda c: (c.kind != UPDATE, c.kind != RETIRE, c.rider_id or 0, c.last_name))
+    return changes
+
+
+def _literal(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _values(changes, with_id):
+    lines = []
+    for i, c in enumerate(changes):
+        rider_id = f"{_literal(c.rider_id)}, " if with_id else ''
+        separator = ',' if i < len(changes) - 1 else ''
+        reason = c.reason.replace('\n', ' ')
+        lines.append(
+            f"  ({rider_id}{_literal(c.first_name)}, {_literal(c.last_name)}, {_literal(c.team_pro_id)}, "
+            f"{_literal(normalize_name(c.first_name))}, {_literal(normalize_name(c.last_name))}){separator}"
+            f" -- {c.kind}: {reason}"
+        )
+    return '\n'.join(lines)
+
+
+def upsert_sql(changes):
+    """Delta als SQL: bekende ids via ON CONFLICT (id), nieuwe renners zonder id op de natuurlijke sleutel"""
+    counts = {kind: sum(1 for c in changes if c.kind == kind) for kind in (INSERT, UPDATE, RETIRE)}
+    existing = [c for c in changes if c.kind != INSERT]
+    new = [c for c in changes if c.kind == INSERT]
+    statements = []
+    if existing:
+        statements.append(f"""-- Updates and retirements of existing riders
+INSERT INTO riders (id, first_name, last_name, team_pro_id, first_name_normalized, last_name_normalized)
+VALUES
+{_values(existing, with_id=True)}
+ON CONFLICT (id) DO UPDATE SET
+  first_name = EXCLUDED.first_name,
+  last_name = EXCLUDED.last_name,
+  team_pro_id = EXCLUDED.team_pro_id,
+  first_name_normalized = EXCLUDED.first_name_normalized,
+  last_name_normalized = EXCLUDED.last_name_normalized;""")
+    if new:
+        # Geen id meegeven: loopt de sequence achter op max(id), dan faalt de primary key in plaats van
+        # dat een bestaande renner overschreven wordt
+        statements.append(f"""-- New riders: id from the column default, matched on the normalized name
+INSERT INTO riders (first_name, last_name, team_pro_id, first_name_normalized, last_name_normalized)
+VALUES
+{_values(new, with_id=False)}
+ON CONFLICT (first_name_normalized, last_name_normalized) DO UPDATE SET
+  first_name = EXCLUDED.first_name,
+  last_name = EXCLUDED.last_name,
+  team_pro_id = EXCLUDED.team_pro_id;""")
+    body = '\n\n'.join(statements)
+    return f"""-- Roster sync: riders table <- start list
+-- Generated automatically
+-- {counts[INSERT]} insert(s), {counts[UPDATE]} update(s), {counts[RETIRE]} retirement(s)
+
+BEGIN;
+
+{body}
+
+COMMIT;
+"""
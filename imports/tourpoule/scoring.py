@@ -0,0 +1,111 @@
+"""
+Stage points per rider, from the scoring_rules table.
+
+Same rule lookup as the netlify functions: rule_type 'stage_position' with
+condition_json {"position": n}, plus rule_type 'jersey' with
+{"jersey_type": ...} for every stage_jersey_wearers row, as in
+get-team-comparison.js. Only riders that scored are returned. The final
+stage (the highest stage_number in stages) awards no jersey points, as in
+import-stage-results.js (BUSINESS RULE 9).
+
+Without a path the readers take the table from tables.data_file(): the
+current export in database_csv/, or the backup in the repo if there is none.
+"""
+
+import csv
+import json
+
+from .tables import data_file
+
+SCORING_RULES_NAME = 'scoring_rules.csv'
+JERSEYS_NAME = 'jerseys.csv'
+JERSEY_WEARERS_NAME = 'stage_jersey_wearers.csv'
+STAGES_NAME = 'stages.csv'
+
+
+def read_position_points(path=None):
+    """{position: punten} voor de stage_position regels"""
+    path = path or data_file(SCORING_RULES_NAME)
+    points = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['rule_type'] != 'stage_position':
+                continue
+            condition = json.loads(row['condition_json'] or '{}')
+            if condition.get('position'):
+                points[int(condition['position'])] = int(row['points'])
+    return points
+
+
+def read_jersey_points(path=None, jerseys_path=None):
+    """{jersey_id: punten} via jerseys.type en de jersey regels"""
+    path = path or data_file(SCORING_RULES_NAME)
+    jerseys_path = jerseys_path or data_file(JERSEYS_NAME)
+    by_type = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['rule_type'] != 'jersey':
+                continue
+            condition = json.loads(row['condition_json'] or '{}')
+            if condition.get('jersey_type'):
+                by_type[condition['jersey_type']] = int(row['points'])
+    with open(jerseys_path, 'r', encoding='utf-8') as f:
+        return {int(row['id']): by_type.get(row['type'], 0) for row in csv.DictReader(f)}
+
+
+def read_jersey_wearers(path=None, stages_path=None):
+    """{stage_number: [(rider_id, jersey_id)]} uit stage_jersey_wearers"""
+    path = path or data_file(JERSEY_WEARERS_NAME)
+    stages_path = stages_path or data_file(STAGES_NAME)
+    with open(stages_path, 'r', encoding='utf-8') as f:
+        stage_numbers = {int(row['id']): int(row['stage_number']) for row in csv.DictReader(f)}
+    wearers = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            stage_number = stage_numbers.get(int(row['stage_id']))
+            if stage_number is not None:
+                wearers.setdefault(stage_number, []).append((int(row['rider_id']), int(row['jersey_id'])))
+    return wearers
+
+
+def read_final_stage(stages_path=None):
+    """Hoogste stage_number in stages (None zonder etappes), zoals isFinalStage in import-stage-results.js"""
+    stages_path = stages_path or data_file(STAGES_NAME)
+    with open(stages_path, 'r', encoding='utf-8') as f:
+        return max((int(row['stage_number']) for row in csv.DictReader(f)), default=None)
+
+
+def read_stage_scoring(source=None):
+    """(position_points, jersey_points, jersey_wearers) uit de tabellen in source (standaard database_csv/)
+
+    jersey_wearers bevat de laatste etappe niet: daar zijn geen truipunten (BUSINESS RULE 9).
+    """
+    rules = data_file(SCORING_RULES_NAME, source)
+    stages_path = data_file(STAGES_NAME, source)
+    jersey_wearers = read_jersey_wearers(data_file(JERSEY_WEARERS_NAME, source), stages_path)
+    jersey_wearers.pop(read_final_stage(stages_path), None)
+    return read_position_points(rules), read_jersey_points(rules, data_file(JERSEYS_NAME, source)), jersey_wearers
+
+
+def jersey_rider_points(jersey_wearers, jersey_points):
+    """{rider_id: truipunten} voor één etappe; een renner met twee truien krijgt beide"""
+    points = {}
+    for rider_id, jersey_id in jersey_wearers:
+        value = jersey_points.get(jersey_id, 0)
+        if value:
+            points[rider_id] = points.get(rider_id, 0) + value
+    return points
+
+
+def stage_rider_points(records, position_points, jersey_wearers=(), jersey_points=None):
+    """{rider_id: punten} voor één etappe: positie plus truien (alleen renners met punten)
+
+    jersey_wearers: [(rider_id, jersey_id)] van deze etappe, jersey_points: read_jersey_points().
+    """
+    points = {}
+    for r in records:
+        if r.rider_id is not None and r.position in position_points:
+            points[r.rider_id] = points.get(r.rider_id, 0) + position_points[r.position]
+    for rider_id, value in jersey_rider_points(jersey_wearers, jersey_points or {}).items():
+        points[rider_id] = points.get(rider_id, 0) + value
+    return points
@@ -0,0 +1,207 @@
+"""
+Parallel stage scoring for large leagues via multiprocessing.shared_memory.
+
+A team scores the stage points of its active main riders (same rule as
+comparison.py). All input is published once as flat int64 blocks:
+
+    offsets   [n_teams + 1]              team i owns members[offsets[i]:offsets[i + 1]]
+    members   [n_members]                rider_id's (CSR layout)
+    points    [n_stages * width]         points[s * width + rider_id]
+    totals    [n_teams * n_stages]       output, written by the workers
+
+Workers attach to the blocks once in the pool initializer and close them
+when the worker exits. A task is only a
+(start, end) range of teams and the result goes straight into `totals`, so
+nothing is copied or pickled per task besides two ints.
+"""
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+
+DEFAULT_SHARD_SIZE = 5000
+ITEM = 'q'
+ITEM_SIZE = array(ITEM).itemsize
+
+
+class ScoringInput:
+    """Team membership in CSR vorm plus de punten per etappe per rider_id"""
+
+    def __init__(self, team_keys, offsets, members, stage_numbers, points, width):
+        self.team_keys = team_keys
+        self.offsets = offsets
+        self.members = members
+        self.stage_numbers = stage_numbers
+        self.points = points
+        self.width = width
+
+    @classmethod
+    def from_team_riders(cls, team_riders, stage_points, team_keys=None):
+        """Uit een TeamRiders snapshot; stage_points = {stage_number: {rider_id: punten}}"""
+        by_team = {}
+        for i in range(len(team_riders)):
+            if team_riders.active[i] and team_riders.is_main[i]:
+                team_id = team_riders.fantasy_team_id[i]
+                key = team_keys.get(team_id, team_id) if team_keys else team_id
+                by_team.setdefault(key, []).append(team_riders.rider_id[i])
+        return cls.from_members(by_team, stage_points)
+
+    @classmethod
+    def from_members(cls, by_team, stage_points):
+        """{team key: [rider_id, ...]} en {stage_number: {rider_id: punten}}"""
+        keys = sorted(by_team)
+        offsets = array(ITEM, [0])
+        members = array(ITEM)
+        for key in keys:
+            members.extend(by_team[key])
+            offsets.append(len(members))
+
+        stage_numbers = sorted(stage_points)
+        width = max([max(members, default=0)] + [max(p, default=0) for p in stage_points.values()]) + 1
+        points = array(ITEM, bytes(ITEM_SIZE * width * len(stage_numbers)))
+        for s, stage_number in enumerate(stage_numbers):
+            for rider_id, value in stage_points[stage_number].items():
+                points[s * width + rider_id] = value
+        return cls(keys, offsets, members, stage_numbers, points, width)
+
+    def __len__(self):
+        return len(self.team_keys)
+
+
+def score_range(offsets, members, points, width, n_stages, totals, start, end):
+    """Scoor teams start..end-1 in totals (werkt op arrays én op shared memoryviews)"""
+    for s in range(n_stages):
+        base = s * width
+        for team in range(start, end):
+            total = 0
+            for m in range(offsets[team], offsets[team + 1]):
+                total += points[base + members[m]]
+            totals[team * n_stages + s] = total
+
+
+def _to_result(data, totals):
+    n_stages = len(data.stage_numbers)
+    return {key: list(totals[i * n_stages:(i + 1) * n_stages]) for i, key in enumerate(data.team_keys)}
+
+
+def score_serial(data):
+    """{team key: [punten per etappe]} in dit proces (referentie en fallback)"""
+    n_stages = len(data.stage_numbers)
+    totals = array(ITEM, bytes(ITEM_SIZE * len(data) * n_stages))
+    score_range(data.offsets, data.members, data.points, data.width, n_stages, totals, 0, len(data))
+    return _to_result(data, totals)
+
+
+class SharedBlocks:
+    """De vier blokken in shared memory; alleen het proces dat ze maakt ruimt ze op"""
+
+    NAMES = ('offsets', 'members', 'points', 'totals')
+
+    def __init__(self, data):
+        n_stages = len(data.stage_numbers)
+        sources = {
+            'offsets': data.offsets,
+            'members': data.members,
+            'points': data.points,
+            'totals': array(ITEM, bytes(ITEM_SIZE * len(data) * n_stages)),
+        }
+        self.blocks = {}
+        for name in self.NAMES:
+            source = sources[name]
+            # Lege blokken mogen niet; één item extra kost niets
+            block = shared_memory.SharedMemory(create=True, size=max(ITEM_SIZE, len(source) * ITEM_SIZE))
+            block.buf[:len(source) * ITEM_SIZE] = source.tobytes()
+            self.blocks[name] = block
+        self.layout = (data.width, n_stages)
+
+    def handles(self):
+        return {name: block.name for name, block in self.blocks.items()}, self.layout
+
+    def totals(self, count):
+        view = self.blocks['totals'].buf.cast(ITEM)
+        try:
+            return array(ITEM, view[:count])
+        finally:
+            view.release()
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per worker proces: de blokken en hun int64 views, één keer bij het starten van de worker
+_worker = {}
+
+
+def _attach(names, layout):
+    blocks = {name: shared_memory.SharedMemory(name=shm_name) for name, shm_name in names.items()}
+    _worker['blocks'] = blocks
+    _worker['views'] = {name: block.buf.cast(ITEM) for name, block in blocks.items()}
+    _worker['layout'] = layout
+    # Pool workers eindigen met os._exit, dus atexit draait niet; multiprocessing finalizers wel
+    util.Finalize(None, _detach, exitpriority=10)
+
+
+def _detach():
+    """Views vrijgeven en de blokken sluiten (unlink doet alleen SharedBlocks in het hoofdproces)"""
+    for view in _worker.pop('views', {}).values():
+        view.release()
+    for block in _worker.pop('blocks', {}).values():
+        block.close()
+    _worker.pop('layout', None)
+
+
+def _score_shard(start, end):
+    views = _worker['views']
+    width, n_stages = _worker['layout']
+    score_range(views['offsets'], views['members'], views['points'], width, n_stages, views['totals'], start, end)
+    return end - start
+
+
+def score_parallel(data, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """{team key: [punten per etappe]}, teams in shards verdeeld over workers processen"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(data) <= shard_size:
+        return score_serial(data)
+
+    shards = [(start, min(start + shard_size, len(data))) for start in range(0, len(data), shard_size)]
+    with SharedBlocks(data) as shared:
+        names, layout = shared.handles()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(names, layout)) as pool:
+            scored = sum(pool.map(_score_shard, *zip(*shards)))
+        if scored != len(data):
+            raise RuntimeError(f"{scored} van {len(data)} teams gescoord")
+        totals = shared.totals(len(data) * len(data.stage_numbers))
+    return _to_result(data, totals)
+
+
+def score_stage_rosters(rosters, stage_points, team_keys=None, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """(stage_numbers, {team key: [punten per etappe]}) met elke etappe gescoord op zijn eigen opstelling
+
+    rosters = {stage_number: TeamRiders} uit reserves.stage_rosters. Etappes die dezelfde snapshot
+    delen worden samen gescoord; per snapshot één ScoringInput (één members CSR). Een team dat in
+    een opstelling geen actieve hoofdrenners heeft, krijgt voor die etappes 0.
+    """
+    stage_numbers = sorted(stage_points)
+    groups = {}
+    for stage_number in stage_numbers:
+        roster = rosters[stage_number]
+        groups.setdefault(id(roster), (roster, []))[1].append(stage_number)
+
+    result = {}
+    for roster, numbers in groups.values():
+        data = ScoringInput.from_team_riders(roster, {n: stage_points[n] for n in numbers}, team_keys)
+        for key, totals in score_parallel(data, workers, shard_size).items():
+            row = result.setdefault(key, [0] * len(stage_numbers))
+            for stage_number, points in zip(data.stage_numbers, totals):
+                row[stage_numbers.index(stage_number)] = points
+    return stage_numbers, {key: result[key] for key in sorted(result)}
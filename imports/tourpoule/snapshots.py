@@ -0,0 +1,295 @@
+"""
+Static JSON snapshots of the read-heavy endpoints, per stage.
+
+The responses of get-standings, get-stage-results, get-stage-team-points and
+get-statistics-overview only change when a stage is imported and scored. The
+renderers below build the same response bodies from the database tables (or
+a CSV backup), restricted to the stages up to and including stage n, so a
+snapshot can be rebuilt later and gives the same bytes.
+
+Every body is written as `<endpoint>.<content hash>.json`; manifest.json maps
+stage and endpoint to the current file. Netlify compresses static files
+itself, so no .gz/.br copies are written. The frontend (src/utils/api.js)
+reads the files through manifest.json and calls the function when the
+manifest has no file for that stage.
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+
+from .records import _int_or_none
+
+FORMAT = 'tourpoule-snapshots/1'
+DEFAULT_DIR = os.path.join('public', 'data')
+URL_PREFIX = '/data'
+ENDPOINTS = ('standings', 'stage-results', 'stage-team-points', 'statistics-overview')
+
+TABLES = (
+    'stages', 'stage_results', 'riders', 'participants', 'fantasy_teams',
+    'fantasy_stage_points', 'fantasy_cumulative_points',
+)
+INT_COLUMNS = {
+    'id', 'stage_id', 'stage_number', 'rider_id', 'position', 'time_seconds', 'participant_id',
+    'points_stage', 'points_jerseys', 'points_bonus', 'total_points', 'after_stage_id', 'rank',
+}
+
+
+def load_tables_from_csv(directory):
+    """Tabellen uit een database backup map (backup-and-reset-database.js)"""
+    tables = {}
+    for name in TABLES:
+        with open(os.path.join(directory, f'{name}.csv'), 'r', encoding='utf-8') as f:
+            tables[name] = [
+                {key: _int_or_none(value) if key in INT_COLUMNS else value for key, value in row.items()}
+                for row in csv.DictReader(f)
+            ]
+    return tables
+
+
+def load_tables_from_db(conn):
+    """Tabellen uit de database (psycopg2 connectie)"""
+    tables = {}
+    with conn.cursor() as cur:
+        for name in TABLES:
+            cur.execute(f'SELECT * FROM {name}')
+            columns = [c[0] for c in cur.description]
+            tables[name] = [dict(zip(columns, row)) for row in cur.fetchall()]
+    return tables
+
+
+def format_time(seconds):
+    """Zelfde formaat als formatTime in get-stage-results.js (H:MM:SS)"""
+    if not seconds:
+        return None
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def participant_name(email):
+    """'jan.de.vries@x.nl' -> 'Jan De Vries', zoals in get-stage-team-points.js"""
+    if not email:
+        return 'Gebruiker'
+    return ' '.join(part[:1].upper() + part[1:] for part in email.split('@')[0].split('.'))
+
+
+def js_round(value, digits=2):
+    """Math.round(value * 10**digits) / 10**digits, met hele getallen als int
+
+    JSON.stringify schrijft 0 en 12 waar json.dumps 0.0 en 12.0 zou schrijven, en
+    Math.round rondt .5 naar boven af in plaats van naar het even getal.
+    """
+    scale = 10 ** digits
+    rounded = math.floor(value * scale + 0.5) / scale
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def _tie_ranks(values):
+    """Ranks voor een aflopend gesorteerde lijst; gelijke waarden krijgen dezelfde rank"""
+    ranks = []
+    for index, value in enumerate(values):
+        ranks.append(ranks[-1] if index and value == values[index - 1] else index + 1)
+    return ranks
+
+
+class StageSnapshot:
+    """Alle data tot en met één etappe, met de lookups die de renderers delen"""
+
+    def __init__(self, tables, stage_number):
+        self.tables = tables
+        self.stage_number = stage_number
+        self.stages = {s['id']: s for s in tables['stages']}
+        self.stage_ids = {s['stage_number']: s['id'] for s in tables['stages']}
+        self.participants = {p['id']: p for p in tables['participants']}
+        self.riders = {r['id']: r for r in tables['riders']}
+
+        # Alleen etappes tot en met stage_number tellen mee
+        self.results = [
+            r for r in tables['stage_results']
+            if self.stages[r['stage_id']]['stage_number'] <= stage_number
+        ]
+        self.stage_points = [
+            p for p in tables['fantasy_stage_points']
+            if self.stages[p['stage_id']]['stage_number'] <= stage_number
+        ]
+        self.numbers_with_results = sorted({self.stages[r['stage_id']]['stage_number'] for r in self.results})
+
+    def _cumulative(self, stage_id):
+        return [c for c in self.tables['fantasy_cumulative_points'] if c['after_stage_id'] == stage_id]
+
+    def _points_until(self, stage_number):
+        """[(participant_id, totaal)] over de etappes t/m stage_number, zoals de fallback query"""
+        totals = {}
+        for p in self.stage_points:
+            if self.stages[p['stage_id']]['stage_number'] <= stage_number:
+                totals[p['participant_id']] = totals.get(p['participant_id'], 0) + (p['total_points'] or 0)
+        rows = [(pid, total) for pid, total in totals.items() if pid in self.participants]
+        rows.sort(key=lambda row: (-row[1], self.participants[row[0]]['team_name'] or ''))
+        return rows
+
+    def standings(self):
+        if not self.numbers_with_results:
+            return {'ok': True, 'standings': [], 'message': 'No stages with results yet'}
+
+        latest_number = self.numbers_with_results[-1]
+        latest_id = self.stage_ids[latest_number]
+        cumulative = self._cumulative(latest_id)
+        if cumulative:
+            cumulative.sort(key=lambda c: (
+                c['rank'] is None, c['rank'] or 0, -(c['total_points'] or 0),
+                self.participants[c['participant_id']]['team_name'] or '',
+            ))
+            current = [(c['participant_id'], c['total_points'], c['rank']) for c in cumulative]
+        else:
+            current = [(pid, total, index + 1) for index, (pid, total) in enumerate(self._points_until(latest_number))]
+
+        previous_ranks = {}
+        if len(self.numbers_with_results) > 1:
+            previous_number = self.numbers_with_results[-2]
+            previous = self._cumulative(self.stage_ids[previous_number])
+            if previous:
+                previous_ranks = {c['participant_id']: c['rank'] for c in previous}
+            else:
+                rows = self._points_until(previous_number)
+                previous_ranks = dict(zip((pid for pid, _ in rows), _tie_ranks([total for _, total in rows])))
+
+        standings = []
+        for index, (pid, total, rank) in enumerate(current):
+            rank = rank or index + 1
+            previous_rank = previous_ranks.get(pid)
+            standings.append({
+                'participantId': pid,
+                'teamName': self.participants[pid]['team_name'],
+                'totalPoints': total or 0,
+                'rank': rank,
+                'positionChange': None if previous_rank is None else previous_rank - rank,
+            })
+        return {'ok': True, 'standings': standings, 'latestStageNumber': latest_number}
+
+    def stage_results(self):
+        stage_id = self.stage_ids.get(self.stage_number)
+        rows = sorted(
+            (r for r in self.results if r['stage_id'] == stage_id and r['rider_id'] in self.riders),
+            key=lambda r: r['position'],
+        )[:6]
+        results = []
+        for r in rows:
+            rider = self.riders[r['rider_id']]
+            results.append({
+                'position': r['position'],
+                'rider': f"{rider['first_name'] or ''} {rider['last_name'] or ''}".strip(),
+                'time': format_time(r['time_seconds']),
+            })
+        return {'ok': True, 'results': results}
+
+    def stage_team_points(self):
+        stage_id = self.stage_ids.get(self.stage_number)
+        points = {
+            p['participant_id']: (p['points_stage'] or 0) + (p['points_jerseys'] or 0) + (p['points_bonus'] or 0)
+            for p in self.stage_points if p['stage_id'] == stage_id
+        }
+        rows = []
+        for team in self.tables['fantasy_teams']:
+            participant = self.participants.get(team['participant_id'])
+            if participant is not None:
+                rows.append((points.get(participant['id'], 0), participant))
+        rows.sort(key=lambda row: (-row[0], row[1]['team_name'] or ''))
+
+        teams = []
+        for rank, (team_points, p) in zip(_tie_ranks([row[0] for row in rows]), rows):
+            teams.append({
+                'rank': rank,
+                'teamName': p['team_name'],
+                'participantName': participant_name(p['email']),
+                'avatarUrl': p['avatar_url'] or None,
+                'email': p['email'] or None,
+                'points': team_points,
+                'participantId': p['id'],
+            })
+        return {'ok': True, 'teams': teams, 'stageNumber': self.stage_number}
+
+    def statistics_overview(self):
+        average = None
+        if self.numbers_with_results:
+            cumulative = self._cumulative(self.stage_ids[self.numbers_with_results[-1]])
+            if cumulative:
+                average = sum(c['total_points'] or 0 for c in cumulative) / len(cumulative)
+        if average is None:
+            totals = {}
+            for p in self.stage_points:
+                total = p['total_points']
+                if total is None:
+                    total = (p['points_stage'] or 0) + (p['points_jerseys'] or 0) + (p['points_bonus'] or 0)
+                totals[p['participant_id']] = totals.get(p['participant_id'], 0) + total
+            positive = [t for t in totals.values() if t > 0]
+            average = sum(positive) / len(positive) if positive else 0
+
+        return {
+            'ok': True,
+            'statistics': {
+                'totalRiders': len(self.riders),
+                'activeRiders': len({r['rider_id'] for r in self.results if r['rider_id'] is not None}),
+                'totalStages': len(self.stages),
+                'stagesWithResults': len(self.numbers_with_results),
+                'teamsCount': len({t['participant_id'] for t in self.tables['fantasy_teams']
+                                   if t['participant_id'] in self.participants}),
+                'averagePoints': js_round(average),
+            },
+        }
+
+    def render(self):
+        """{endpoint: response body}"""
+        return {
+            'standings': self.standings(),
+            'stage-results': self.stage_results(),
+            'stage-team-points': self.stage_team_points(),
+            'statistics-overview': self.statistics_overview(),
+        }
+
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def publish(bodies, stage_number, directory=DEFAULT_DIR):
+    """Schrijf de bodies als <endpoint>.<hash>.json; geeft {endpoint: url} terug"""
+    stage_dir = os.path.join(directory, f'stage-{stage_number}')
+    os.makedirs(stage_dir, exist_ok=True)
+    urls = {}
+    for endpoint, body in bodies.items():
+        data = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        name = f'{endpoint}.{hashlib.sha256(data).hexdigest()[:12]}.json'
+        path = os.path.join(stage_dir, name)
+        # Zelfde hash = zelfde inhoud: bestaande bestanden niet opnieuw schrijven
+        _write_if_changed(path, data)
+        urls[endpoint] = f'{URL_PREFIX}/stage-{stage_number}/{name}'
+    return urls
+
+
+def update_manifest(stage_urls, directory=DEFAULT_DIR):
+    """Voeg de urls per etappe toe aan manifest.json; 'latest' wijst naar de hoogste etappe"""
+    path = os.path.join(directory, 'manifest.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {'format': FORMAT, 'stages': {}}
+
+    for stage_number, urls in stage_urls.items():
+        manifest['stages'][str(stage_number)] = urls
+    latest = max(int(n) for n in manifest['stages'])
+    manifest['latestStageNumber'] = latest
+    manifest['latest'] = manifest['stages'][str(latest)]
+
+    os.makedirs(directory, exist_ok=True)
+    _write_if_changed(path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
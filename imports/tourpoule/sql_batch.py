@@ -0,0 +1,282 @@
+"""
+Parameterized batch output for stage imports.
+
+Instead of one SQL file with hand-escaped literals, the generators can write a
+batch file: one fixed prepared statement plus typed parameter rows. The file is
+JSON Lines; the first line is the header, every following line is one batch
+(a list of parameter rows). `execute_batch_file` streams it into any DB-API
+connection (psycopg2, pg8000) with executemany.
+
+By default the whole file is one transaction. A chunked file
+(`"transaction": "chunk"` in the header) commits the setup and every batch
+separately, so locks on stage_results are only held for one chunk. After each
+commit a marker goes to `<file>.progress.jsonl`; a rerun skips the chunks
+that are already committed and the marker file is removed when the file is
+done. Re-applying a chunk is harmless (the upsert only moves a rider to a
+better position), so a crash between commit and marker costs nothing.
+"""
+
+import json
+import os
+
+from .build_cache import file_hash
+from .journal import Journal
+
+FORMAT = 'tourpoule-batch/1'
+DEFAULT_BATCH_SIZE = 500
+SINGLE = 'single'
+CHUNK = 'chunk'
+PROGRESS_SUFFIX = '.progress.jsonl'
+
+# Insert/upsert of one stage result. $1 is the stage_number (fixed per file),
+# rider_id wins over the name lookup; names are only sent when rider_id is missing.
+STAGE_RESULTS_NAME = 'import_stage_results'
+STAGE_RESULTS_COLUMNS = ('position', 'first_name', 'last_name', 'rider_id', 'time_seconds', 'same_time_group')
+STAGE_RESULTS_PARAM_TYPES = ('integer', 'integer', 'text', 'text', 'integer', 'integer', 'integer')
+STAGE_RESULTS_STATEMENT = """INSERT INTO stage_results (stage_id, rider_id, position, time_seconds, same_time_group)
+SELECT v.stage_id, v.rider_id, $2, $6, $7
+FROM (
+  SELECT
+    s.id AS stage_id,
+    COALESCE($5, (
+      SELECT r.id
+      FROM riders r
+      WHERE LOWER(TRIM(r.first_name)) = LOWER(TRIM($3))
+        AND LOWER(TRIM(r.last_name)) = LOWER(TRIM($4))
+      LIMIT 1
+    )) AS rider_id
+  FROM stages s
+  WHERE s.stage_number = $1
+) v
+WHERE v.rider_id IS NOT NULL
+ON CONFLICT (stage_id, rider_id)
+DO UPDATE SET
+  position = EXCLUDED.position,
+  time_seconds = EXCLUDED.time_seconds,
+  same_time_group = EXCLUDED.same_time_group
+WHERE EXCLUDED.position < stage_results.position"""
+
+
+def same_time_groups(times):
+    """Dense rank van time_seconds (None achteraan), zoals DENSE_RANK() in de SQL variant"""
+    distinct = sorted({t for t in times if t is not None})
+    rank = {t: i for i, t in enumerate(distinct, 1)}
+    none_group = len(distinct) + 1
+    return [rank[t] if t is not None else none_group for t in times]
+
+
+def stage_results_rows(records):
+    """Bouw parameter rijen uit ResultRecords"""
+    groups = same_time_groups([r.time_seconds for r in records])
+    rows = []
+    for r, group in zip(records, groups):
+        if r.rider_id is not None:
+            # Namen zijn alleen nodig voor de lookup; scheelt payload
+            rows.append([r.position, None, None, r.rider_id, r.time_seconds, group])
+        else:
+            rows.append([r.position, r.first_name, r.last_name, None, r.time_seconds, group])
+    return rows
+
+
+def stage_results_header(stage_number, total_rows, batch_size=DEFAULT_BATCH_SIZE, chunked=False):
+    """Header voor een stage_results batch bestand; chunked: elke batch is een eigen transactie"""
+    header = {
+        'format': FORMAT,
+        'name': STAGE_RESULTS_NAME,
+        'param_types': list(STAGE_RESULTS_PARAM_TYPES),
+        'statement': STAGE_RESULTS_STATEMENT,
+        'fixed_params': [stage_number],
+        'columns': list(STAGE_RESULTS_COLUMNS),
+        'require': {
+            'sql': 'SELECT 1 FROM stages WHERE stage_number = %s',
+            'params': [stage_number],
+            'message': f'Stage {stage_number} does not exist. Please run full-reset-and-import.sql first.',
+        },
+        'setup': [
+            {
+                'sql': 'DELETE FROM stage_results WHERE stage_id = (SELECT id FROM stages WHERE stage_number = %s)',
+                'params': [stage_number],
+            },
+        ],
+        'total_rows': total_rows,
+        'batch_size': batch_size,
+    }
+    if chunked:
+        header['transaction'] = CHUNK
+    return header
+
+
+def write_batch_file(path, header, rows, batch_size=None):
+    """Schrijf header + parameter batches als JSON Lines"""
+    batch_size = batch_size or header.get('batch_size') or DEFAULT_BATCH_SIZE
+    batches = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for start in range(0, len(rows), batch_size):
+            f.write(json.dumps(rows[start:start + batch_size], ensure_ascii=False, separators=(',', ':')) + '\n')
+            batches += 1
+    return batches
+
+
+def read_batch_header(path):
+    """Alleen de header van een batch bestand"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.loads(f.readline())
+
+
+def read_batch_file(path):
+    """Lees een batch bestand; geeft (header, generator over batches) terug"""
+    f = open(path, 'r', encoding='utf-8')
+    header = json.loads(f.readline())
+    if header.get('format') != FORMAT:
+        f.close()
+        raise ValueError(f"Onbekend batch formaat in {path}: {header.get('format')!r}")
+
+    def batches():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, batches()
+
+
+def chunk_count(header):
+    batch_size = header.get('batch_size') or DEFAULT_BATCH_SIZE
+    return -(-header['total_rows'] // batch_size)
+
+
+def progress_path(path):
+    return path + PROGRESS_SUFFIX
+
+
+def execute_batch_file(conn, path, resume=True, progress=None):
+    """Voer een batch bestand uit; geeft aantal verstuurde rijen terug
+
+    Zonder "transaction": "chunk" in de header is het één transactie. Anders zie
+    _execute_chunked; progress(chunk, chunks, rows) wordt na elke commit aangeroepen.
+    """
+    header, batches = read_batch_file(path)
+    if header.get('transaction', SINGLE) == CHUNK:
+        return _execute_chunked(conn, path, header, batches, resume, progress)
+
+    name = header['name']
+    fixed = header.get('fixed_params', [])
+    placeholders = ', '.join(['%s'] * len(header['param_types']))
+
+    cur = conn.cursor()
+    try:
+        require = header.get('require')
+        if require:
+            cur.execute(require['sql'], require['params'])
+            if cur.fetchone() is None:
+                raise RuntimeError(require['message'])
+
+        for step in header.get('setup', []):
+            cur.execute(step['sql'], step['params'])
+
+        # Eén keer parsen op de server, daarna alleen EXECUTE met parameters
+        cur.execute(f"PREPARE {name} ({', '.join(header['param_types'])}) AS {header['statement']}")
+        sent = 0
+        for batch in batches:
+            cur.executemany(f'EXECUTE {name} ({placeholders})', [fixed + row for row in batch])
+            sent += len(batch)
+        cur.execute(f'DEALLOCATE {name}')
+        conn.commit()
+        return sent
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _execute_chunked(conn, path, header, batches, resume, progress):
+    """Setup en elke batch in een eigen transactie, met een marker per gecommitte chunk"""
+    name = header['name']
+    fixed = header.get('fixed_params', [])
+    placeholders = ', '.join(['%s'] * len(header['param_types']))
+    chunks = chunk_count(header)
+
+    # Markers horen bij precies deze inhoud; een opnieuw gegenereerd bestand begint vooraan
+    batch_hash = file_hash(path)
+    journal = Journal(progress_path(path))
+    if not resume and os.path.exists(journal.path):
+        os.remove(journal.path)
+    done = {e['chunk'] for e in journal.load().values() if e.get('batch_hash') == batch_hash}
+
+    def mark(chunk, rows):
+        journal.append({'key': f'{batch_hash}:{chunk}', 'batch_hash': batch_hash, 'chunk': chunk, 'rows': rows})
+        if progress:
+            progress(chunk, chunks, rows)
+
+    cur = conn.cursor()
+    try:
+        require = header.get('require')
+        if require:
+            cur.execute(require['sql'], require['params'])
+            if cur.fetchone() is None:
+                raise RuntimeError(require['message'])
+
+        # Chunk 0 is de setup (DELETE); bij hervatten mag die niet opnieuw
+        if 0 not in done:
+            for step in header.get('setup', []):
+                cur.execute(step['sql'], step['params'])
+            conn.commit()
+            mark(0, 0)
+
+        cur.execute(f"PREPARE {name} ({', '.join(header['param_types'])}) AS {header['statement']}")
+        sent = 0
+        for chunk, batch in enumerate(batches, 1):
+            if chunk in done:
+                continue
+            cur.executemany(f'EXECUTE {name} ({placeholders})', [fixed + row for row in batch])
+            conn.commit()
+            sent += len(batch)
+            mark(chunk, len(batch))
+        cur.execute(f'DEALLOCATE {name}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    os.remove(journal.path)
+    return sent
+
+
+def execute_batch_files(connect, paths, workers=1, resume=True, progress=None):
+    """Voer meerdere batch bestanden uit, met workers verbindingen tegelijk
+
+    connect() geeft een nieuwe verbinding (één per bestand, DB-API verbindingen
+    zijn niet thread-safe). Bestanden voor dezelfde etappe (zelfde fixed_params)
+    raken dezelfde rijen en draaien daarom na elkaar in één worker.
+    progress(path, chunk, chunks, rows). Geeft {path: rijen of Exception}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    groups = {}
+    for path in paths:
+        header = read_batch_header(path)
+        groups.setdefault(json.dumps(header.get('fixed_params', [])), []).append(path)
+
+    def run_group(group):
+        results = {}
+        for path in group:
+            try:
+                conn = connect()
+                try:
+                    callback = (lambda *args, path=path: progress(path, *args)) if progress else None
+                    results[path] = execute_batch_file(conn, path, resume, callback)
+                finally:
+                    conn.close()
+            except Exception as e:
+                results[path] = e
+        return results
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for group_results in pool.map(run_group, groups.values()):
+            results.update(group_results)
+    return {path: results[path] for path in paths}
@@ -0,0 +1,132 @@
+"""
+Stage results CSV -> SQL script with VALUES literals (generate-etappe-1-sql.py).
+
+The batch output (prepared statement + parameter batches) is in sql_batch.py.
+"""
+
+from collections import defaultdict
+
+from .names import correct_name
+from .records import read_stage_results_csv
+
+
+def apply_typo_corrections(riders):
+    """Pas de bekende typo correcties toe op de namen (in place)"""
+    for rider in riders:
+        rider.first_name, rider.last_name = correct_name(rider.first_name, rider.last_name)
+    return riders
+
+
+def read_stage(csv_file):
+    """Lees de uitslag en pas de bekende typo correcties toe"""
+    return apply_typo_corrections(read_stage_results_csv(csv_file))
+
+
+def count_time_groups(riders):
+    """Group by time_seconds to calculate same_time_group"""
+    time_groups = defaultdict(list)
+    for i, rider in enumerate(riders, 1):
+        time_groups[rider.time_seconds].append(i)
+    return len(time_groups)
+
+
+def generate_sql(stage_number, source_name, riders):
+    """Genereer het SQL script voor één etappe"""
+    sql_lines = [
+        f"-- SQL Script to import Stage {stage_number} results from {source_name}",
+        "-- Generated automatically",
+        f"-- Total riders: {len(riders)}",
+        "",
+        f"-- First, verify that Stage {stage_number} exists",
+        "DO $$",
+        "BEGIN",
+        f"  IF NOT EXISTS (SELECT 1 FROM stages WHERE stage_number = {stage_number}) THEN",
+        f"    RAISE EXCEPTION 'Stage {stage_number} does not exist. Please run full-reset-and-import.sql first.';",
+        "  END IF;",
+        "END $$;",
+        "",
+        f"-- Clear existing Stage {stage_number} results",
+        f"DELETE FROM stage_results WHERE stage_id = (SELECT id FROM stages WHERE stage_number = {stage_number});",
+        "",
+        f"-- Insert Stage {stage_number} results",
+        "-- Uses rider_id from CSV if provided, otherwise looks up by name",
+        "-- Calculates same_time_group based on time_seconds",
+        "INSERT INTO stage_results (stage_id, rider_id, position, time_seconds, same_time_group)",
+        "WITH stage_data AS (",
+        "  SELECT ",
+        "    s.id as stage_id,",
+        "    v.position,",
+        "    v.first_name,",
+        "    v.last_name,",
+        "    v.rider_id_provided,",
+        "    v.time_seconds,",
+        "    -- Calculate same_time_group: assign group number based on time_seconds",
+        "    DENSE_RANK() OVER (ORDER BY v.time_seconds NULLS LAST) as time_group",
+        "  FROM stages s",
+        "  CROSS JOIN (VALUES",
+    ]
+
+    # Add VALUES
+    values = []
+    for rider in riders:
+        position = rider.position
+        # Escape single quotes for SQL (double them)
+        first_name = rider.first_name.replace("'", "''")
+        last_name = rider.last_name.replace("'", "''")
+
+        # Handle empty rider_id
+        if rider.rider_id is not None:
+            rider_id_sql = f"NULLIF('{rider.rider_id}', '')"
+        else:
+            rider_id_sql = "NULL"
+
+        # Handle time_seconds
+        time_seconds_sql = rider.time_seconds if rider.time_seconds is not None else "NULL"
+
+        values.append(f"    ({position}, '{first_name}', '{last_name}', {rider_id_sql}, {time_seconds_sql})")
+
+    sql_lines.append(',\n'.join(values))
+    sql_lines.extend([
+        "  ) AS v(position, first_name, last_name, rider_id_provided, time_seconds)",
+        f"  WHERE s.stage_number = {stage_number}",
+        "),",
+        "rider_lookup AS (",
+        "  SELECT ",
+        "    sd.*,",
+        "    CASE",
+        "      WHEN sd.rider_id_provided IS NOT NULL AND sd.rider_id_provided != '' THEN sd.rider_id_provided::INTEGER",
+        "      ELSE (",
+        "        SELECT r.id",
+        "        FROM riders r",
+        "        WHERE LOWER(TRIM(r.first_name)) = LOWER(TRIM(sd.first_name))",
+        "          AND LOWER(TRIM(r.last_name)) = LOWER(TRIM(sd.last_name))",
+        "        LIMIT 1",
+        "      )",
+        "    END as rider_id",
+        "  FROM stage_data sd",
+        ")",
+        "SELECT DISTINCT ON (stage_id, rider_id)",
+        "  stage_id,",
+        "  rider_id,",
+        "  position,",
+        "  time_seconds,",
+        "  time_group as same_time_group",
+        "FROM rider_lookup",
+        "WHERE rider_id IS NOT NULL",
+        "ORDER BY stage_id, rider_id, position",
+        "ON CONFLICT (stage_id, rider_id)",
+        "DO UPDATE SET",
+        "  position = EXCLUDED.position,",
+        "  time_seconds = EXCLUDED.time_seconds,",
+        "  same_time_group = EXCLUDED.same_time_group;",
+        "",
+        "-- Verify the import",
+        "SELECT ",
+        "  COUNT(*) as total_results,",
+        "  COUNT(DISTINCT rider_id) as unique_riders,",
+        "  COUNT(DISTINCT same_time_group) as time_groups,",
+        "  COUNT(*) FILTER (WHERE time_seconds IS NULL) as dnf_count",
+        "FROM stage_results",
+        f"WHERE stage_id = (SELECT id FROM stages WHERE stage_number = {stage_number});",
+    ])
+    return ''.join(line + '\n' for line in sql_lines)
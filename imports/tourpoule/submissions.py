@@ -0,0 +1,227 @@
+"""
+Bulk validation of fantasy team submissions.
+
+add-team-riders.js and save-participant.js check one team per request. This
+module checks a whole league at once: all teams go into one flat
+teams x slots array (10 main slots, then 5 reserve slots, 0 = empty) and one
+pass over that array, with a bytearray lookup for the rider flags, gives a
+verdict per team:
+
+- main and reserve slot counts (10 and 5)
+- slot numbers outside 1-10 / 1-5, two riders in the same slot
+- the same rider twice in a team
+- riders that are unknown or out of the race (withdrawn, DNF, no pro team),
+  except main riders that a reserve already replaced
+- submissions after the registration_deadline setting
+
+Re-validating after a late withdrawal only rebuilds the rider flags; the
+slot array stays the same.
+"""
+
+import csv
+import json
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from .reserves import submitted_rows
+
+MAIN_SLOTS = 10
+RESERVE_SLOTS = 5
+SLOTS = MAIN_SLOTS + RESERVE_SLOTS
+
+MAIN_COUNT = 'main_count'
+RESERVE_COUNT = 'reserve_count'
+INVALID_SLOT = 'invalid_slot'
+DUPLICATE_SLOT = 'duplicate_slot'
+DUPLICATE_RIDER = 'duplicate_rider'
+UNKNOWN_RIDER = 'unknown_rider'
+RIDER_OUT = 'rider_out_of_race'
+AFTER_DEADLINE = 'after_deadline'
+
+# Bits in de rider lookup
+KNOWN = 1
+OUT = 2
+
+
+def parse_timestamp(value):
+    """Settings waarde ('2026-07-05 12:00:00') of ISO timestamp uit een backup; naïeve tijden zijn UTC"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        text = str(value).strip().strip('"')
+        moment = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def read_setting(path, key):
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['key'] == key:
+                return row['value']
+    return None
+
+
+@dataclass(slots=True)
+class SlotIssue:
+    code: str
+    slot_type: str | None = None
+    slot_number: int | None = None
+    rider_id: int | None = None
+    count: int | None = None
+
+
+@dataclass(slots=True)
+class Verdict:
+    team: int
+    issues: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.issues
+
+    def to_json(self):
+        return {'ok': self.ok, 'issues': [asdict(i) for i in self.issues]}
+
+
+class Submissions:
+    """Alle teams als één teams x slots array plus een inzendtijd per team"""
+
+    def __init__(self):
+        self.teams = []
+        self.slots = array('i')
+        self.submitted_at = []
+        # 1 per slot met een renner die al door een reserve vervangen is; die telt niet als uit koers
+        self.replaced = bytearray()
+        # Rijen die niet in het raster passen: (team index, SlotIssue)
+        self.rejected = []
+
+    def add_team(self, team, rows, submitted_at=None):
+        """rows: (slot_type, slot_number, rider_id) of (slot_type, slot_number, rider_id, replaced)"""
+        index = len(self.teams)
+        self.teams.append(team)
+        self.submitted_at.append(parse_timestamp(submitted_at))
+        self.slots.extend([0] * SLOTS)
+        self.replaced.extend(bytes(SLOTS))
+        base = index * SLOTS
+        for slot_type, slot_number, rider_id, *replaced in rows:
+            if slot_type == 'main' and 1 <= slot_number <= MAIN_SLOTS:
+                column = slot_number - 1
+            elif slot_type == 'reserve' and 1 <= slot_number <= RESERVE_SLOTS:
+                column = MAIN_SLOTS + slot_number - 1
+            else:
+                self.rejected.append((index, SlotIssue(INVALID_SLOT, slot_type, slot_number, rider_id)))
+                continue
+            if self.slots[base + column]:
+                self.rejected.append((index, SlotIssue(DUPLICATE_SLOT, slot_type, slot_number, rider_id)))
+                continue
+            self.slots[base + column] = rider_id
+            if replaced and replaced[0]:
+                self.replaced[base + column] = 1
+
+    @classmethod
+    def from_team_riders(cls, team_riders, team_keys=None, created_at=None):
+        """Uit een TeamRiders snapshot; created_at = {fantasy_team_id: timestamp}
+
+        Ook na een import de opstelling zoals ingezonden: geactiveerde reserves tellen weer als
+        reserve en vervangen main renners als main (reserves.submitted_rows).
+        """
+        by_team = submitted_rows(team_riders)
+        submissions = cls()
+        for team_id in sorted(by_team):
+            key = team_keys.get(team_id, team_id) if team_keys else team_id
+            submissions.add_team(key, by_team[team_id], (created_at or {}).get(team_id))
+        return submissions
+
+    @classmethod
+    def from_jsonl(cls, path):
+        """Eén inzending per regel: {"participant_id", "submitted_at", "main": [...], "reserve": [...]}
+
+        main/reserve zijn rider_id's in slot volgorde (null = lege slot).
+        """
+        submissions = cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                rows = [('main', n, r) for n, r in enumerate(entry.get('main', []), 1) if r]
+                rows += [('reserve', n, r) for n, r in enumerate(entry.get('reserve', []), 1) if r]
+                submissions.add_team(entry['participant_id'], rows, entry.get('submitted_at'))
+        return submissions
+
+    def __len__(self):
+        return len(self.teams)
+
+
+def rider_flags(known_ids, out_ids):
+    """bytearray lookup per rider_id: KNOWN en/of OUT"""
+    size = max([0, *known_ids, *out_ids]) + 1
+    flags = bytearray(size)
+    for rider_id in known_ids:
+        flags[rider_id] |= KNOWN
+    for rider_id in out_ids:
+        flags[rider_id] |= OUT
+    return flags
+
+
+def _slot(column):
+    if column < MAIN_SLOTS:
+        return 'main', column + 1
+    return 'reserve', column - MAIN_SLOTS + 1
+
+
+def validate(submissions, known_ids, out_ids=frozenset(), deadline=None):
+    """{team: Verdict} voor alle teams in één pass over het slots raster"""
+    flags = rider_flags(known_ids, out_ids)
+    size = len(flags)
+    deadline = parse_timestamp(deadline)
+    slots = submissions.slots
+
+    verdicts = {}
+    for index, team in enumerate(submissions.teams):
+        verdict = Verdict(team)
+        base = index * SLOTS
+        row = slots[base:base + SLOTS]
+
+        mains = MAIN_SLOTS - row[:MAIN_SLOTS].count(0)
+        reserves = RESERVE_SLOTS - row[MAIN_SLOTS:].count(0)
+        if mains != MAIN_SLOTS:
+            verdict.issues.append(SlotIssue(MAIN_COUNT, 'main', count=mains))
+        if reserves != RESERVE_SLOTS:
+            verdict.issues.append(SlotIssue(RESERVE_COUNT, 'reserve', count=reserves))
+
+        seen = set()
+        for column, rider_id in enumerate(row):
+            if not rider_id:
+                continue
+            if rider_id in seen:
+                verdict.issues.append(SlotIssue(DUPLICATE_RIDER, *_slot(column), rider_id))
+            seen.add(rider_id)
+            flag = flags[rider_id] if 0 < rider_id < size else 0
+            if not flag & KNOWN:
+                verdict.issues.append(SlotIssue(UNKNOWN_RIDER, *_slot(column), rider_id))
+            elif flag & OUT and not submissions.replaced[base + column]:
+                verdict.issues.append(SlotIssue(RIDER_OUT, *_slot(column), rider_id))
+
+        submitted_at = submissions.submitted_at[index]
+        if deadline is not None and submitted_at is not None and submitted_at > deadline:
+            verdict.issues.append(SlotIssue(AFTER_DEADLINE))
+        verdicts[team] = verdict
+
+    for index, issue in submissions.rejected:
+        verdicts[submissions.teams[index]].issues.append(issue)
+    return verdicts
+
+
+def summary(verdicts):
+    """{code: aantal teams met dat probleem}"""
+    counts = {}
+    for verdict in verdicts.values():
+        for code in {i.code for i in verdict.issues}:
+            counts[code] = counts.get(code, 0) + 1
+    return counts
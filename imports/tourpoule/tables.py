@@ -0,0 +1,72 @@
+"""
+Lazily loaded, cached data tables (riders, scoring rules).
+
+A table is read the first time it is asked for and kept for the rest of the
+process, so a notebook or a script that resolves several stages parses
+riders.csv once. The cache key is the absolute path; an entry is dropped when
+the file's mtime or size changes, so an edited backup is picked up without a
+restart.
+
+Table exports live in database_csv/ (backup-and-reset-database.js). data_file()
+picks a table from an explicit source directory (--source), else from
+database_csv/, and only falls back to the backup committed in the repo when
+database_csv/ has no such file.
+"""
+
+import os
+
+DATA_DIR = 'database_csv'
+FALLBACK_DIR = os.path.join(DATA_DIR, 'backup_2025-12-16_10-32-55')
+RIDERS_FILE = os.path.join(DATA_DIR, 'riders.csv')
+
+_cache = {}
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load(kind, path, loader):
+    key = (kind, os.path.abspath(path))
+    stamp = _stamp(path)
+    entry = _cache.get(key)
+    if entry is None or entry[0] != stamp:
+        entry = (stamp, loader(path))
+        _cache[key] = entry
+    return entry[1]
+
+
+def data_file(name, source=None):
+    """<source>/<name>, anders database_csv/<name>, met de backup in de repo als laatste keuze"""
+    if source:
+        return os.path.join(source, name)
+    path = os.path.join(DATA_DIR, name)
+    return path if os.path.exists(path) else os.path.join(FALLBACK_DIR, name)
+
+
+def riders(path=RIDERS_FILE):
+    """RiderRecords uit riders.csv (name_key genormaliseerd)"""
+    from .names import normalize_name
+    from .records import read_riders_csv
+
+    return _load('riders', path, lambda p: read_riders_csv(p, normalize_name))
+
+
+def rider_index(path=RIDERS_FILE):
+    """RiderIndex over riders(path); gedeeld, dus niet aanpassen"""
+    from .resolve import RiderIndex
+
+    return _load('rider_index', path, lambda p: RiderIndex(riders(p)))
+
+
+def position_points(path=None):
+    """{positie: punten} uit scoring_rules.csv (standaard data_file('scoring_rules.csv'))"""
+    from .scoring import SCORING_RULES_NAME, read_position_points
+
+    return _load('position_points', path or data_file(SCORING_RULES_NAME), read_position_points)
+
+
+def clear():
+    """Vergeet alle geladen tabellen"""
+    _cache.clear()
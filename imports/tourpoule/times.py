@@ -0,0 +1,127 @@
+"""
+Stage time notation -> absolute time_seconds for a whole stage at once.
+
+Published results give the winner's time and then gaps:
+
+    1. Jasper Philipsen   3:53:11
+    2. Biniam Girmay      s.t.       (same time as the rider before)
+    3. Søren Wærenskjold  ,,         (idem)
+    4. Anthony Turgis     +0:12      (winner's time + 12 seconds)
+
+`classify_times` turns the time column into two arrays (kind, seconds) with
+plain string operations, `absolute_times` then resolves gaps and same-time
+markers in one cumulative pass. Absolute times (`3:53:11`, `13991`,
+`3h53m11s`) keep working as before; DNF/DNS/DSQ/OTL give no time.
+"""
+
+import re
+from array import array
+
+from .records import Status
+
+# Soorten tijd notatie
+EMPTY = 0
+ABSOLUTE = 1
+GAP = 2
+SAME_TIME = 3
+STATUS = 4
+INVALID = 5
+
+NO_TIME = -1
+
+SAME_TIME_MARKERS = frozenset({'s.t.', 's.t', 'st', ',,', '"', "''", '〃', '='})
+STATUS_CODES = ('DNF', 'DNS', 'DSQ', 'OTL')
+
+_HMS_PATTERN = re.compile(r'(\d+)h\s*(\d+)m\s*(\d+)s', re.IGNORECASE)
+
+
+def _clock_seconds(text):
+    """'3:53:11' / '0:12' / '13991' -> seconden, None als het geen tijd is"""
+    if text.isdigit():
+        return int(text)
+    parts = text.split(':')
+    if 2 <= len(parts) <= 3 and all(p.isdigit() for p in parts):
+        seconds = 0
+        for p in parts:
+            seconds = seconds * 60 + int(p)
+        return seconds
+    match = _HMS_PATTERN.fullmatch(text)
+    if match:
+        hours, minutes, seconds = map(int, match.groups())
+        return hours * 3600 + minutes * 60 + seconds
+    return None
+
+
+def classify_time(text):
+    """(soort, seconden) voor één tijd string; seconden is een status code bij STATUS"""
+    text = (text or '').strip()
+    if not text:
+        return EMPTY, 0
+    lower = text.lower()
+    if lower in SAME_TIME_MARKERS:
+        return SAME_TIME, 0
+    upper = text.upper()
+    for code in STATUS_CODES:
+        if code in upper:
+            return STATUS, int(Status[code])
+    if text[0] == '+':
+        seconds = _clock_seconds(text[1:].strip())
+        return (GAP, seconds) if seconds is not None else (INVALID, 0)
+    seconds = _clock_seconds(text)
+    return (ABSOLUTE, seconds) if seconds is not None else (INVALID, 0)
+
+
+def classify_times(texts):
+    """Tijd kolom -> (kinds, values) arrays"""
+    kinds = array('B')
+    values = array('i')
+    for text in texts:
+        kind, value = classify_time(text)
+        kinds.append(kind)
+        values.append(value)
+    return kinds, values
+
+
+def absolute_times(kinds, values):
+    """Eén cumulatieve pass: array('i') met absolute tijden (NO_TIME = geen tijd)
+
+    GAP is relatief aan de eerste absolute tijd (de winnaar), SAME_TIME neemt de
+    tijd van de vorige renner met een tijd over. Een gap of s.t. zonder
+    eerdere tijd heeft geen basis en krijgt geen tijd.
+    """
+    times = array('i', [NO_TIME]) * len(kinds)
+    base = NO_TIME
+    previous = NO_TIME
+    for i, kind in enumerate(kinds):
+        if kind == ABSOLUTE:
+            previous = values[i]
+            if base == NO_TIME:
+                base = previous
+        elif kind == GAP:
+            if base == NO_TIME:
+                continue
+            previous = base + values[i]
+        elif kind == SAME_TIME:
+            if previous == NO_TIME:
+                continue
+        else:
+            continue
+        times[i] = previous
+    return times
+
+
+def apply_stage_times(records, texts):
+    """Zet time_seconds en status van alle records van een etappe; geeft het aantal onleesbare tijden"""
+    kinds, values = classify_times(texts)
+    times = absolute_times(kinds, values)
+    invalid = 0
+    for rider, kind, value, seconds in zip(records, kinds, values, times):
+        if seconds != NO_TIME:
+            rider.time_seconds = seconds
+            rider.status = Status.FINISHED
+        else:
+            rider.time_seconds = None
+            rider.status = Status(value) if kind == STATUS else Status.DNF
+            if kind in (INVALID, GAP, SAME_TIME):
+                invalid += 1
+    return invalid
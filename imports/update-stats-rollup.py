@@ -0,0 +1,159 @@
+"""
+Werk de statistieken cube (renner x ploeg x etappe) bij na het importeren van een etappe
+
+Gebruik:
+  python imports/update-stats-rollup.py              # alle etappes met een uitslag, alleen gewijzigde
+  python imports/update-stats-rollup.py 5            # alleen etappe 5
+  python imports/update-stats-rollup.py --rebuild    # alles opnieuw
+  python imports/update-stats-rollup.py --sql-all    # SQL voor alle etappes in de cube, niet alleen openstaande
+  python imports/update-stats-rollup.py --applied    # de gegenereerde SQL is uitgevoerd
+  python imports/update-stats-rollup.py --source=database_csv/backup_2025-12-16_10-32-55
+                                                     # stages.csv, teams_pro.csv en de scoring tabellen uit een backup
+
+Invoer: imports/etappe-<n>-uitslag-fixed.csv (zie fix-rider-ids.py), database_csv/riders.csv
+(ploeg per renner), stages.csv (distance_km), de scoring rules en de truidragers
+(stage_jersey_wearers.csv; geen truipunten in de laatste etappe).
+Uitvoer: imports/rollup-cube.json (de cube, voor de volgende keer) en imports/update-stats-rollup.sql
+met de cellen van de etappes die nog niet in de stat_rollup tabel staan (eenmalig eerst
+imports/add-stat-rollup-tables.sql uitvoeren). Na het uitvoeren van de SQL:
+
+  python imports/update-stats-rollup.py --applied    # etappes uit de SQL in imports/rollup-applied.jsonl
+
+Tot dan neemt elke run die etappes opnieuw mee (de SQL is per etappe idempotent).
+"""
+
+import csv
+import os
+import sys
+
+from tourpoule import tables
+from tourpoule.build_cache import file_hash, text_hash
+from tourpoule.integrity import stage_file
+from tourpoule.records import read_stage_results_csv
+from tourpoule.rollup import (
+    DEFAULT_PATH, MID_RANGE, RollupCube, bucket_averages, mark_applied, pending_stages, sql_stages, stage_cells,
+    update_sql,
+)
+from tourpoule.scoring import (
+    JERSEYS_NAME, SCORING_RULES_NAME, STAGES_NAME, jersey_rider_points, read_stage_scoring,
+)
+
+RIDERS_FILE = 'database_csv/riders.csv'
+HISTORY_DIR = 'imports/history-store'
+OUTPUT_FILE = 'imports/update-stats-rollup.sql'
+MAX_STAGES = 21
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    rebuild = '--rebuild' in argv
+    sql_all = rebuild or '--sql-all' in argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    source = options.get('source')
+
+    if '--applied' in argv:
+        applied = sql_stages(OUTPUT_FILE)
+        if not applied:
+            print(f"❌ {OUTPUT_FILE} niet gevonden")
+            exit(1)
+        mark_applied(RollupCube.load(DEFAULT_PATH), applied)
+        os.remove(OUTPUT_FILE)
+        print(f"✅ Etappe {', '.join(map(str, applied))} als uitgevoerd genoteerd; {OUTPUT_FILE} weggehaald")
+        return
+
+    stages_file = tables.data_file(STAGES_NAME, source)
+    teams_pro_file = tables.data_file('teams_pro.csv', source)
+    for path in (stages_file, tables.data_file(SCORING_RULES_NAME, source)):
+        if not os.path.exists(path):
+            print(f"❌ {path} niet gevonden")
+            exit(1)
+    with open(stages_file, 'r', encoding='utf-8') as f:
+        distances = {int(row['stage_number']): row['distance_km'] for row in csv.DictReader(f)}
+
+    stage_numbers = [int(a) for a in args] or [n for n in range(1, MAX_STAGES + 1) if os.path.exists(stage_file(n))]
+    if not stage_numbers:
+        print("❌ Geen etappe uitslagen gevonden")
+        exit(1)
+
+    riders = tables.riders(RIDERS_FILE)
+    team_of = {r.id: r.team_pro_id for r in riders}
+    position_points, jersey_points, jersey_wearers = read_stage_scoring(source)
+    # Ploeg toewijzing en punten tabellen gaan mee in de hash: verandert er een, dan alle etappes opnieuw
+    shared_hash = ''.join(file_hash(path) or '' for path in (
+        RIDERS_FILE, tables.data_file(SCORING_RULES_NAME, source), tables.data_file(JERSEYS_NAME, source),
+    ))
+
+    cube = RollupCube() if rebuild else RollupCube.load(DEFAULT_PATH)
+    skipped = 0
+    for stage_number in stage_numbers:
+        input_file = stage_file(stage_number)
+        if not os.path.exists(input_file):
+            print(f"❌ Etappe {stage_number}: {input_file} niet gevonden")
+            continue
+        distance_km = distances.get(stage_number)
+        wearers = sorted(jersey_wearers.get(stage_number, ()))
+        source_hash = text_hash(file_hash(input_file) + shared_hash + str(distance_km) + str(wearers))[:16]
+        if cube.stages.get(stage_number, {}).get('source_hash') == source_hash:
+            skipped += 1
+            continue
+        cells = stage_cells(read_stage_results_csv(input_file), position_points, team_of,
+                            extra_points=jersey_rider_points(wearers, jersey_points))
+        cube.update_stage(stage_number, cells, distance_km, source_hash)
+        bucket = cube.stages[stage_number]['bucket']
+        print(f"✓ Etappe {stage_number}: {len(cells)} cellen ({distance_km} km, {bucket})")
+
+    if skipped:
+        print(f"⏭️  {skipped} etappe(s) ongewijzigd")
+
+    cube.save(DEFAULT_PATH)
+    if sql_all:
+        sql_stage_numbers = sorted(cube.stages)
+    else:
+        # Gewijzigde etappes plus die waarvan de SQL nog niet als uitgevoerd gemarkeerd is (per etappe idempotent)
+        sql_stage_numbers = pending_stages(cube)
+    if sql_stage_numbers:
+        with open(OUTPUT_FILE, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(update_sql(cube, sql_stage_numbers))
+
+    names = {r.id: f"{r.first_name} {r.last_name}".strip() for r in riders}
+    teams = {}
+    if os.path.exists(teams_pro_file):
+        with open(teams_pro_file, 'r', encoding='utf-8') as f:
+            teams = {int(row['id']): row['name'] for row in csv.DictReader(f)}
+
+    print(f"\n{'='*80}")
+    print(f"STATISTIEKEN ({len(cube.stages)} etappes):")
+    print(f"{'='*80}")
+    print("  Top renners (punten):")
+    for rider_id, points in cube.top('rider', 'points', 5):
+        print(f"    {names.get(rider_id, rider_id)}: {points}")
+    print("  Top ploegen (punten):")
+    for team_pro_id, points in cube.top('team', 'points', 5):
+        print(f"    {teams.get(team_pro_id, 'Onbekend team')}: {points}")
+    print("  Meeste top-10 plaatsen:")
+    for rider_id, count in cube.top('rider', 'top10', 3):
+        print(f"    {names.get(rider_id, rider_id)}: {count}")
+
+    mid_range = cube.stages_in(MID_RANGE)
+    print(f"  Ritten van 90-120 km (MID_RANGE): {', '.join(map(str, mid_range)) or 'geen'}")
+    if mid_range and os.path.exists(os.path.join(HISTORY_DIR, 'index.json')):
+        from tourpoule.history_store import HistoryStore
+
+        history = HistoryStore.open(HISTORY_DIR)
+        stored = set(history.stage_numbers)
+        averages = bucket_averages({n: history.stage_points(n) for n in mid_range if n in stored}, mid_range)
+        for participant_id, average in sorted(averages.items(), key=lambda item: -item[1])[:3]:
+            print(f"    Deelnemer {participant_id}: {average:.1f} gemiddeld")
+
+    if sql_stage_numbers:
+        print(f"\n✅ SQL gegenereerd: {OUTPUT_FILE} (etappe {', '.join(map(str, sql_stage_numbers))})")
+        print(f"   Uitvoeren: node imports/run-sql-script.js {OUTPUT_FILE}")
+        print("   Daarna: python imports/update-stats-rollup.py --applied")
+        print("   Tot dan nemen volgende runs deze etappes opnieuw mee")
+    else:
+        print("\n✅ Cube is actueel")
+
+
+if __name__ == '__main__':
+    main()
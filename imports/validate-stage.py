@@ -0,0 +1,71 @@
+"""
+Controleer een geparste etappe uitslag vóór het genereren van SQL
+
+Gebruik:
+  python imports/validate-stage.py              # etappe 1
+  python imports/validate-stage.py 1 2 3
+
+Leest imports/etappe-<n>-uitslag-fixed.csv (of de ruwe CSV) en schrijft het rapport naar
+imports/etappe-<n>-integrity.json. Exit code 1 als een etappe fouten heeft.
+"""
+
+import json
+import os
+import sys
+import time
+
+from tourpoule.integrity import ERROR, SEVERITY, available_rider_index, previous_out_of_race, stage_file, validate_stage
+from tourpoule.records import read_stage_results_csv
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    stage_numbers = [int(a) for a in args] or [1]
+
+    # Renners zonder rider_id op naam zoeken zoals de import; zonder riders.csv alleen een waarschuwing
+    rider_index = available_rider_index()
+    if rider_index is None:
+        print("⚠️  database_csv/riders.csv niet gevonden: namen zonder rider_id worden niet gecontroleerd")
+
+    failed = 0
+    for stage_number in stage_numbers:
+        csv_file = stage_file(stage_number)
+        if not os.path.exists(csv_file):
+            print(f"❌ Etappe {stage_number}: {csv_file} niet gevonden")
+            failed += 1
+            continue
+
+        records = read_stage_results_csv(csv_file)
+        out_of_race = previous_out_of_race(stage_number)
+        started = time.perf_counter()
+        report = validate_stage(records, out_of_race, stage_number, rider_index)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        report_file = f'imports/etappe-{stage_number}-integrity.json'
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report.to_json(), f, ensure_ascii=False, indent=2)
+
+        print(f"\n{'='*80}")
+        print(f"ETAPPE {stage_number}: {len(records)} renners uit {csv_file} ({elapsed_ms:.1f} ms)")
+        print(f"{'='*80}")
+        if not report.issues:
+            print("✅ Geen problemen gevonden")
+        for code, count in sorted(report.counts().items()):
+            print(f"  {'❌' if SEVERITY[code] == ERROR else '⚠️ '} {code}: {count}")
+        for issue in report.issues[:15]:
+            print(f"     Pos {issue.position}: {issue.message}")
+        if len(report.issues) > 15:
+            print(f"     ... en {len(report.issues) - 15} meer")
+        print(f"  Rapport: {report_file}")
+
+        if not report.ok:
+            failed += 1
+
+    if failed:
+        print(f"\n❌ {failed} van {len(stage_numbers)} etappe(s) met fouten")
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Controleer alle fantasy teams (of een bestand met inzendingen) in één keer
+
+Gebruik:
+  python imports/validate-teams.py                                  # database_csv/fantasy_team_riders.csv
+  python imports/validate-teams.py --submissions=imports/pending.jsonl
+  python imports/validate-teams.py --withdrawn=12,87                # na een late afmelding
+  python imports/validate-teams.py --deadline="2026-07-05 12:00:00"
+  python imports/validate-teams.py --source=database_csv/backup_2025-12-16_10-32-55
+
+De tabellen (riders, fantasy_team_riders, fantasy_teams, settings) komen uit --source, anders uit
+database_csv/ met de backup als laatste keuze.
+Renners zijn uit koers als ze zijn afgemeld (--withdrawn), geen pro team meer hebben
+(riders.csv, zie sync-roster.py) of in een geïmporteerde etappe zijn uitgevallen.
+De deadline komt standaard uit de registration_deadline setting. Voor teams uit de database is de
+inzendtijd fantasy_teams.created_at.
+Uitvoer: imports/team-verdicts.json (per team ok + problemen). Exit code 1 als een team afgekeurd is.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+
+from tourpoule import tables
+from tourpoule.integrity import previous_out_of_race
+from tourpoule.names import normalize_name
+from tourpoule.records import read_riders_csv
+from tourpoule.reserves import TeamRiders
+from tourpoule.submissions import Submissions, read_setting, summary, validate
+
+OUTPUT_FILE = 'imports/team-verdicts.json'
+MAX_STAGES = 21
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    withdrawn = {int(r) for r in options.get('withdrawn', '').split(',') if r.strip()}
+    source = options.get('source')
+    riders_file = tables.data_file('riders.csv', source)
+    team_riders_file = tables.data_file('fantasy_team_riders.csv', source)
+    teams_file = tables.data_file('fantasy_teams.csv', source)
+    required = [riders_file] if 'submissions' in options else [riders_file, team_riders_file]
+    for path in required:
+        if not os.path.exists(path):
+            print(f"❌ {path} niet gevonden")
+            exit(1)
+
+    deadline = options.get('deadline')
+    if deadline is None:
+        settings_file = tables.data_file('settings.csv', source)
+        if os.path.exists(settings_file):
+            deadline = read_setting(settings_file, 'registration_deadline')
+    if deadline:
+        print(f"✓ Deadline: {deadline}")
+    else:
+        print("⚠️  Geen registration_deadline gevonden, deadline wordt niet gecontroleerd")
+
+    riders = read_riders_csv(riders_file, normalize_name)
+    known = {r.id for r in riders}
+    without_team = {r.id for r in riders if r.team_pro_id is None}
+    dropped = previous_out_of_race(MAX_STAGES + 1)
+    out_of_race = withdrawn | without_team | dropped
+    print(f"✓ {len(known)} renners, {len(out_of_race)} uit koers "
+          f"({len(withdrawn)} afgemeld, {len(without_team)} zonder team, {len(dropped)} uitgevallen)")
+
+    if 'submissions' in options:
+        submissions = Submissions.from_jsonl(options['submissions'])
+        print(f"✓ {len(submissions)} inzendingen gelezen uit {options['submissions']}")
+    else:
+        team_keys = None
+        created_at = None
+        if os.path.exists(teams_file):
+            with open(teams_file, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            team_keys = {int(row['id']): int(row['participant_id']) for row in rows}
+            created_at = {int(row['id']): row['created_at'] for row in rows}
+        submissions = Submissions.from_team_riders(TeamRiders.from_csv(team_riders_file), team_keys, created_at)
+        print(f"✓ {len(submissions)} teams gelezen uit {team_riders_file}")
+
+    started = time.perf_counter()
+    verdicts = validate(submissions, known, out_of_race, deadline)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({str(team): verdict.to_json() for team, verdict in verdicts.items()}, f, ensure_ascii=False, indent=2)
+
+    rejected = [v for v in verdicts.values() if not v.ok]
+    print(f"\n{'='*80}")
+    print(f"TEAMS: {len(verdicts) - len(rejected)} goedgekeurd, {len(rejected)} afgekeurd ({elapsed_ms:.1f} ms)")
+    print(f"{'='*80}")
+    for code, count in sorted(summary(verdicts).items()):
+        print(f"  ❌ {code}: {count} team(s)")
+    for verdict in rejected[:15]:
+        details = ', '.join(
+            issue.code + (f" ({issue.slot_type} {issue.slot_number}: {issue.rider_id})" if issue.rider_id else '')
+            + (f" ({issue.count})" if issue.count is not None else '')
+            for issue in verdict.issues
+        )
+        print(f"     Team {verdict.team}: {details}")
+    if len(rejected) > 15:
+        print(f"     ... en {len(rejected) - 15} meer")
+    print(f"\n✓ Rapport: {OUTPUT_FILE}")
+
+    if rejected:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
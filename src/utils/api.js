@@ -39,9 +39,44 @@ async function fetchJson(url, options) {
   return data;
 }
 
+// Static snapshots (imports/publish-snapshots.py): /data/manifest.json maps each stage (and 'latest')
+// to a JSON file with the same body as the function. Without a manifest or a file for that stage,
+// the function is called. The manifest is re-read after a minute, like its Cache-Control header.
+const MANIFEST_URL = '/data/manifest.json';
+const MANIFEST_MAX_AGE_MS = 60 * 1000;
+let manifestCache = null;
+
+function loadManifest() {
+  const now = Date.now();
+  if (!manifestCache || now - manifestCache.loadedAt > MANIFEST_MAX_AGE_MS) {
+    const promise = fetch(MANIFEST_URL)
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+    manifestCache = { loadedAt: now, promise };
+  }
+  return manifestCache.promise;
+}
+
+async function fetchSnapshot(endpoint, stageNumber, functionUrl) {
+  const manifest = await loadManifest();
+  const urls = stageNumber == null ? manifest?.latest : manifest?.stages?.[String(stageNumber)];
+  const url = urls?.[endpoint];
+  if (url) {
+    try {
+      const res = await fetch(url);
+      if (res.ok) {
+        return await res.json();
+      }
+    } catch {
+      // Fall back to the function
+    }
+  }
+  return await fetchJson(functionUrl);
+}
+
 export const api = {
   async getStatisticsOverview() {
-    return await fetchJson('/.netlify/functions/get-statistics-overview');
+    return await fetchSnapshot('statistics-overview', null, '/.netlify/functions/get-statistics-overview');
   },
 
   async getTopRidersStats() {
@@ -72,7 +107,11 @@ export const api = {
   },
 
   async getStageResults(stageNumber) {
-    return await fetchJson(`/.netlify/functions/get-stage-results?stage_number=${encodeURIComponent(stageNumber)}`);
+    return await fetchSnapshot(
+      'stage-results',
+      stageNumber,
+      `/.netlify/functions/get-stage-results?stage_number=${encodeURIComponent(stageNumber)}`
+    );
   },
 
   async getMyStageRiders({ userId, stageNumber }) {
@@ -86,7 +125,11 @@ export const api = {
   },
 
   async getStageTeamPoints(stageNumber) {
-    return await fetchJson(`/.netlify/functions/get-stage-team-points?stage_number=${encodeURIComponent(stageNumber)}`);
+    return await fetchSnapshot(
+      'stage-team-points',
+      stageNumber,
+      `/.netlify/functions/get-stage-team-points?stage_number=${encodeURIComponent(stageNumber)}`
+    );
   },
 
   async validateStageResults({ stageId, resultsText }) {
@@ -149,7 +192,7 @@ export const api = {
   },
 
   async getStandings() {
-    return await fetchJson('/.netlify/functions/get-standings');
+    return await fetchSnapshot('standings', null, '/.netlify/functions/get-standings');
   },
 
   async getMyPointsRiders(userId) {
@@ -197,7 +240,7 @@ export const api = {
       return { ok: true, winners: [] };
     }
     const stageNumber = latestStageRes.stage.stage_number;
-    const teamPointsRes = await fetchJson(`/.netlify/functions/get-stage-team-points?stage_number=${encodeURIComponent(stageNumber)}`);
+    const teamPointsRes = await api.getStageTeamPoints(stageNumber);
     if (!teamPointsRes?.ok || !Array.isArray(teamPointsRes.teams)) {
       return { ok: true, winners: [] };
     }
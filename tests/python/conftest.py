@@ -0,0 +1,82 @@
+"""
+Shared fixtures for the Python import script tests.
+
+The scripts in imports/ use paths relative to the repository root, so the
+golden tests copy them into a temporary workspace with the same layout and
+run them as a subprocess. The tourpoule
+package is also imported in-process for the unit and performance tests.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+IMPORTS_DIR = os.path.join(ROOT, 'imports')
+BACKUP_DIR = os.path.join(ROOT, 'database_csv', 'backup_2025-12-16_10-32-55')
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden')
+
+# UPDATE_GOLDEN=1 schrijft de golden bestanden opnieuw in plaats van te vergelijken
+UPDATE_GOLDEN = os.getenv('UPDATE_GOLDEN') == '1'
+# Tijd asserts (doorvoer, cold start) hangen af van hoe druk de machine is; alleen met CHECK_TIMINGS=1
+CHECK_TIMINGS = os.getenv('CHECK_TIMINGS') == '1'
+
+sys.path.insert(0, IMPORTS_DIR)
+
+
+class Workspace:
+    """Tijdelijke kopie van de mappen die de scripts verwachten"""
+
+    def __init__(self, root):
+        self.root = str(root)
+        imports = os.path.join(self.root, 'imports')
+        shutil.copytree(
+            IMPORTS_DIR, imports,
+            ignore=shutil.ignore_patterns('__pycache__', '.build-cache', 'history', 'history-out', '*.js', '*.md'),
+        )
+        # Gegenereerde bestanden horen niet in de startsituatie
+        for name in os.listdir(imports):
+            if name.endswith(('.sql', '.jsonl')):
+                os.remove(os.path.join(imports, name))
+        os.makedirs(os.path.join(self.root, 'database_csv'))
+        for name in ('riders.csv', 'fantasy_team_riders.csv', 'fantasy_teams.csv'):
+            shutil.copy(os.path.join(BACKUP_DIR, name), os.path.join(self.root, 'database_csv', name))
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def run(self, script, *args, stdin=''):
+        result = subprocess.run(
+            [sys.executable, os.path.join('imports', script), *args],
+            cwd=self.root, input=stdin, capture_output=True, text=True, encoding='utf-8',
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8', 'PYTHONDONTWRITEBYTECODE': '1'},
+        )
+        assert result.returncode == 0, f"{script} faalde:\n{result.stdout}\n{result.stderr}"
+        return result.stdout
+
+    def read_bytes(self, *parts):
+        with open(self.path(*parts), 'rb') as f:
+            return f.read()
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    return Workspace(tmp_path)
+
+
+def assert_golden(name, data):
+    """Vergelijk bytes met tests/python/golden/<name>"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    path = os.path.join(GOLDEN_DIR, name)
+    if UPDATE_GOLDEN:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return
+    with open(path, 'rb') as f:
+        expected = f.read()
+    assert data == expected, f"output wijkt af van golden/{name} (UPDATE_GOLDEN=1 om bij te werken)"
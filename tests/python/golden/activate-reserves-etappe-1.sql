@@ -0,0 +1,28 @@
+-- Reserve activation after Stage 1
+-- Generated automatically
+-- 3 fantasy_team_riders rows changed in 2 team(s), 1 reserve(s) activated
+-- Run BEFORE calculating stage points
+
+BEGIN;
+
+-- First, move all changed rows to temporary negative slot_numbers to avoid unique constraint violations
+UPDATE fantasy_team_riders
+SET slot_number = -id
+WHERE id = ANY(ARRAY[387,414,416]::int[]);
+
+UPDATE fantasy_team_riders ftr
+SET
+  slot_type = d.slot_type,
+  slot_number = d.slot_number,
+  active = d.active,
+  out_of_race = d.out_of_race
+FROM unnest(
+  ARRAY[387,414,416]::int[],
+  ARRAY['reserve','main','main']::varchar[],
+  ARRAY[2,909,9]::int[],
+  ARRAY[true,false,true]::boolean[],
+  ARRAY[true,true,false]::boolean[]
+) AS d(id, slot_type, slot_number, active, out_of_race)
+WHERE ftr.id = d.id;
+
+COMMIT;
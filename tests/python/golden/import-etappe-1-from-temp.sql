@@ -0,0 +1,250 @@
+-- SQL Script to import Stage 1 results from temp/uitslag etappe 1.txt
+-- Generated automatically
+-- Total riders: 182 (182 finished, 0 DNF/DNS/DSQ)
+
+-- First, verify that Stage 1 exists
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM stages WHERE stage_number = 1) THEN
+    RAISE EXCEPTION 'Stage 1 does not exist. Please run full-reset-and-import.sql first.';
+  END IF;
+END $$;
+
+-- Clear existing Stage 1 results
+DELETE FROM stage_results WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);
+
+-- Insert Stage 1 results
+-- Uses rider_id lookup by name if not provided
+-- Calculates same_time_group based on time_seconds
+INSERT INTO stage_results (stage_id, rider_id, position, time_seconds, same_time_group)
+WITH stage_data AS (
+  SELECT 
+    s.id as stage_id,
+    v.position,
+    v.first_name,
+    v.last_name,
+    v.time_seconds,
+    -- Calculate same_time_group: assign group number based on time_seconds
+    DENSE_RANK() OVER (ORDER BY v.time_seconds NULLS LAST) as time_group
+  FROM stages s
+  CROSS JOIN (VALUES
+    (1, 'Jasper', 'Philipsen', 13991),
+    (2, 'Biniam', 'Girmay', 13991),
+    (3, 'Søren', 'Wærenskjold', 13991),
+    (4, 'Anthony', 'Turgis', 13991),
+    (5, 'Matteo', 'Trentin', 13991),
+    (6, 'Clement', 'Russo', 13991),
+    (7, 'Paul', 'Penhoet', 13991),
+    (8, 'Matteo', 'Jorgenson', 13991),
+    (9, 'Marius', 'Mayrhofer', 13991),
+    (10, 'Samuel', 'Watson', 13991),
+    (11, 'Mike', 'Teunissen', 13991),
+    (12, 'Ivan', 'Garcia Cortina', 13991),
+    (13, 'Niklas', 'Maerkl', 13991),
+    (14, 'Harry', 'Sweeny', 13991),
+    (15, 'Krists', 'Neilands', 13991),
+    (16, 'Kevin', 'Vauquelin', 13991),
+    (17, 'Damien', 'Touze', 13991),
+    (18, 'Tadej', 'Pogacar', 13991),
+    (19, 'Pascal', 'Ackermann', 13991),
+    (20, 'Jonas', 'Vingegaard', 13991),
+    (21, 'Jasper', 'Stuyven', 13991),
+    (22, 'Marco', 'Haller', 13991),
+    (23, 'Kaden', 'Groves', 13991),
+    (24, 'Kasper', 'Asgreen', 13991),
+    (25, 'Joseph', 'Blackmore', 13991),
+    (26, 'Luka', 'Mezgec', 13991),
+    (27, 'Tiesj', 'Benoot', 13991),
+    (28, 'Mathieu', 'van der Po&', 13991),
+    (29, 'Stian', 'Fredheim', 13991),
+    (30, 'Tobias', 'Johannessen', 13991),
+    (31, 'Enric', 'Mas', 13991),
+    (32, 'Tim', 'Wellens', 13991),
+    (33, 'Cyril', 'Barthe', 13991),
+    (34, 'Jonas', 'Abrahamson', 14004),
+    (35, 'Jonas', 'Rickaert', 14004),
+    (36, 'Xandro', 'Meurisse', 14004),
+    (37, 'Davide', 'Ballerini', 14011),
+    (38, 'Edoardo', 'Affini', 14016),
+    (39, 'Jonathan', 'Milan', 14030),
+    (40, 'Arnaud', 'de Lie', 14030),
+    (41, 'Bryan', 'Coquard', 14030),
+    (42, 'Jordi', 'Meeus', 14030),
+    (43, 'Pavel', 'Bittner', 14030),
+    (44, 'Alberto', 'Dainese', 14030),
+    (45, 'Robert', 'Stannard', 14030),
+    (46, 'Phil', 'Bauhaus', 14030),
+    (47, 'Tim', 'Merlier', 14030),
+    (48, 'Wout', 'van Aert', 14030),
+    (49, 'Danny', 'van Poppel', 14030),
+    (50, 'Neilson', 'Powless', 14030),
+    (51, 'Markus', 'Hoelgaard', 14030),
+    (52, 'Clement', 'Berthet', 14030),
+    (53, 'Tobias Lund', 'Andresen', 14030),
+    (54, 'Mattias', 'Skjelmose', 14030),
+    (55, 'Jasper', 'De Buyst', 14030),
+    (56, 'Emanuel', 'Buchmann', 14030),
+    (57, 'Guillaume', 'Boivin', 14030),
+    (58, 'Joao', 'Almeida', 14030),
+    (59, 'Amaury', 'Capiot', 14030),
+    (60, 'Dylan', 'Groenewegen', 14030),
+    (61, 'Magnus', 'Cort', 14030),
+    (62, 'Arnaud', 'Demare', 14030),
+    (63, 'Alexis', 'Renard', 14030),
+    (64, 'Ben', 'Healy', 14030),
+    (65, 'Matis', 'Louvel', 14030),
+    (66, 'Aurelian', 'Paret-Peintre', 14030),
+    (67, 'Rem++', 'Evenepoel', 14030),
+    (68, 'Jordan', 'Jegat', 14030),
+    (69, 'Carlos', 'Rodriguez', 14030),
+    (70, 'Gianni', 'Vermeersch', 14030),
+    (71, 'Santiago', 'Buitrago', 14030),
+    (72, 'Michael', 'Valgren', 14030),
+    (73, 'Oliver', 'Naesen', 14030),
+    (74, 'Oscar', 'Onley', 14030),
+    (75, 'Felix', 'Gall', 14030),
+    (76, 'Han', 'van Wilder', 14030),
+    (77, 'Pascal', 'Eenkhoorn', 14030),
+    (78, 'Florian', 'Lipowitz', 14030),
+    (79, 'Primo+', 'Roglic', 14030),
+    (80, 'Lennert', 'van Eetvelt', 14030),
+    (81, 'Valentin', 'Madouas', 14030),
+    (82, 'Guillaume', 'Martin', 14030),
+    (83, 'Nelson', 'Oliveira', 14030),
+    (84, 'Fabian', 'Lienhard', 14030),
+    (85, 'Sean', 'Flynn', 14030),
+    (86, 'Connor', 'Swift', 14030),
+    (87, 'Geraint', 'Thomas', 14030),
+    (88, 'Thomas', 'Gachignard', 14030),
+    (89, 'Jhonatan', 'Narvaez', 14030),
+    (90, 'Hugo', 'Page', 14030),
+    (91, 'Staff', 'Cras', 14030),
+    (92, 'Bastion', 'Tronchon', 14030),
+    (93, 'Alexandre', 'Delettre', 14030),
+    (94, 'Jack', 'Haig', 14030),
+    (95, 'Alex', 'Aranburu', 14030),
+    (96, 'Marc', 'Hirschi', 14030),
+    (97, 'Jenno', 'Berckmoes', 14030),
+    (98, 'Dylan', 'Teuns', 14030),
+    (99, 'Brent', 'van Moer', 14030),
+    (100, 'Tobias', 'Foss', 14030),
+    (101, 'Fred', 'Wright', 14030),
+    (102, 'Jarrad', 'Drizners', 14030),
+    (103, 'Vincenzo', 'Albanese', 14030),
+    (104, 'Elmar', 'Reinders', 14057),
+    (105, 'Aleksandr', 'Vlasov', 14057),
+    (106, 'Callum', 'Scotson', 14057),
+    (107, 'Warren', 'Barguil', 14057),
+    (108, 'Matej', 'Mohoric', 14057),
+    (109, 'Alex', 'Baudin', 14057),
+    (110, 'Clement', 'Venturini', 14057),
+    (111, 'Bert', 'van Lerberghe', 14057),
+    (112, 'Toms', 'Skujins', 14077),
+    (113, 'Edward', 'Theuns', 14077),
+    (114, 'Vito', 'Brant', 14077),
+    (115, 'Laurence', 'Pithie', 14084),
+    (116, 'Simone', 'Consonni', 14084),
+    (117, 'Mattis', 'Cattaneo', 14099),
+    (118, 'Victor', 'Campenaerts', 14110),
+    (119, 'Sepp', 'Kuss', 14030),
+    (120, 'Gianni', 'Moscon', 14125),
+    (121, 'Mick', 'van Dijke', 14125),
+    (122, 'Ion', 'Izagirre', 14125),
+    (123, 'Marc', 'Soler', 14137),
+    (124, 'Kamil', 'Gradek', 14137),
+    (125, 'Nils', 'Politt', 14309),
+    (126, 'Andreas', 'Leknessund', 14309),
+    (127, 'Anders', 'Johannessen', 14309),
+    (128, 'Quentin', 'Pacher', 14309),
+    (129, 'Harold', 'Tejada', 14309),
+    (130, 'Bruno', 'Armirail', 14309),
+    (131, 'Sebastian', 'Grignard', 14309),
+    (132, 'Mathis', 'le Berre', 14309),
+    (133, 'Thyme+', 'Arensman', 14309),
+    (134, 'Jonas', 'Rutsch', 14309),
+    (135, 'Eduardo', 'Sepulveda', 14309),
+    (136, 'Georg', 'Zimmermann', 14309),
+    (137, 'Gregor', 'Muehlberger', 14309),
+    (138, 'Benjamin', 'Thomas', 14309),
+    (139, 'Einar', 'Rubio', 14309),
+    (140, 'Cristian', 'Rodriguez', 14309),
+    (141, 'Frank', 'van den Brook', 14309),
+    (142, 'Quinn', 'Simmons', 14309),
+    (143, 'Tim', 'Naberman', 14309),
+    (144, 'Sergio', 'Higuita', 14309),
+    (145, 'Clement', 'Champoussin', 14309),
+    (146, 'Laurenz', 'Rex', 14309),
+    (147, 'Pablo', 'Castrillo', 14309),
+    (148, 'Raul', 'Garcia Pierna', 14309),
+    (149, 'Romain', 'Gregoire', 14309),
+    (150, 'Ewen', 'Costiou', 14309),
+    (151, 'Valentin', 'Paret-Peintre', 14309),
+    (152, 'Emilien', 'Jeanniere', 14309),
+    (153, 'Michael', 'Storer', 14309),
+    (154, 'Edward', 'Dunbar', 14309),
+    (155, 'Pavel', 'Sivakov', 14309),
+    (156, 'Adam', 'Yates', 14309),
+    (157, 'Emiel', 'Verstrynge', 14309),
+    (158, 'Jake', 'Stewart', 14309),
+    (159, 'Alexey', 'Lutsenko', 14309),
+    (160, 'Ben', 'O''Connor', 13991),
+    (161, 'Mauro', 'Schmid', 14318),
+    (162, 'Marijn', 'van den Berg', 13991),
+    (163, 'Luke', 'Durbridge', 14382),
+    (164, 'Simon', 'Yates', 14382),
+    (165, 'Axel', 'Laurance', 14382),
+    (166, 'Silvan', 'Dillier', 14382),
+    (167, 'Michael', 'Woods', 14382),
+    (168, 'Simone', 'Velasco', 14382),
+    (169, 'Maximilian', 'Schachmann', 14382),
+    (170, 'Lucas', 'Plapp', 14382),
+    (171, 'Yevgeniy', 'Fedorov', 14382),
+    (172, 'Cees', 'Bol', 14382),
+    (173, 'Julian', 'Alaphilippe', 14382),
+    (174, 'Ro&', 'van Sintmaartensdijk', 14382),
+    (175, 'Louis', 'Barre', 14382),
+    (176, 'Ivan', 'Romeo', 14382),
+    (177, 'William', 'Barta', 14382),
+    (178, 'Mathieu', 'Burgaudeau', 14382),
+    (179, 'Matteo', 'Vercher', 14382),
+    (180, 'Thibau', 'Nys', 14382),
+    (181, 'Lewis', 'Askey', 14382),
+    (182, 'Lenny', 'Martinez', 14542)
+  ) AS v(position, first_name, last_name, time_seconds)
+  WHERE s.stage_number = 1
+),
+rider_lookup AS (
+  SELECT 
+    sd.*,
+    (
+      SELECT r.id 
+      FROM riders r 
+      WHERE LOWER(TRIM(r.first_name)) = LOWER(TRIM(sd.first_name))
+        AND LOWER(TRIM(r.last_name)) = LOWER(TRIM(sd.last_name))
+      LIMIT 1
+    ) as rider_id
+  FROM stage_data sd
+)
+SELECT DISTINCT ON (stage_id, rider_id)
+  stage_id,
+  rider_id,
+  position,
+  time_seconds,
+  time_group as same_time_group
+FROM rider_lookup
+WHERE rider_id IS NOT NULL
+ORDER BY stage_id, rider_id, position
+ON CONFLICT (stage_id, rider_id) 
+DO UPDATE SET
+  position = EXCLUDED.position,
+  time_seconds = EXCLUDED.time_seconds,
+  same_time_group = EXCLUDED.same_time_group;
+
+-- Verify the import
+SELECT 
+  COUNT(*) as total_results,
+  COUNT(DISTINCT rider_id) as unique_riders,
+  COUNT(DISTINCT same_time_group) as time_groups,
+  COUNT(*) FILTER (WHERE time_seconds IS NULL) as dnf_count
+FROM stage_results
+WHERE stage_id = (SELECT id FROM stages WHERE stage_number = 1);
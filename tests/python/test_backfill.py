@@ -0,0 +1,92 @@
+"""
+Tests for tourpoule.journal and the resumable backfill in tourpoule.backfill.
+"""
+
+import os
+import shutil
+
+from conftest import BACKUP_DIR, IMPORTS_DIR
+from tourpoule.backfill import JOURNAL_NAME, discover_tasks, run_backfill
+from tourpoule.journal import Journal
+
+
+def history(tmp_path, stages=(1, 2)):
+    """imports/history met één seizoen; elke etappe is een kopie van de etappe 1 uitslag"""
+    season_dir = tmp_path / 'history' / '2023'
+    season_dir.mkdir(parents=True)
+    shutil.copy(os.path.join(BACKUP_DIR, 'riders.csv'), season_dir / 'riders.csv')
+    for n in stages:
+        shutil.copy(os.path.join(IMPORTS_DIR, 'etappe-1-uitslag.csv'), season_dir / f'etappe-{n}-uitslag.csv')
+    return str(tmp_path / 'history'), str(tmp_path / 'out')
+
+
+def test_journal_round_trip(tmp_path):
+    journal = Journal(str(tmp_path / 'sub' / JOURNAL_NAME))
+    assert journal.load() == {}
+    journal.append({'key': '2023/1', 'rows': 3, 'naam': 'Pogačar'})
+    journal.append({'key': '2023/2', 'rows': 5})
+    # Een latere regel met dezelfde key vervangt de eerdere
+    journal.append({'key': '2023/1', 'rows': 4})
+    assert Journal(journal.path).load() == {
+        '2023/1': {'key': '2023/1', 'rows': 4},
+        '2023/2': {'key': '2023/2', 'rows': 5},
+    }
+
+
+def test_journal_ignores_a_truncated_last_line(tmp_path):
+    journal = Journal(str(tmp_path / JOURNAL_NAME))
+    journal.append({'key': '2023/1', 'rows': 3})
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"key": "2023/2", "ro')
+    assert set(journal.load()) == {'2023/1'}
+    # De volgende entry komt op een nieuwe regel, niet achter de kapotte
+    journal.append({'key': '2023/3', 'rows': 1})
+    assert set(journal.load()) == {'2023/1', '2023/3'}
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    history_dir, output_dir = history(tmp_path)
+    tasks = discover_tasks(history_dir)
+    assert [t.key for t in tasks] == ['2023/1', '2023/2']
+
+    done, skipped, failed = run_backfill(tasks, output_dir, workers=1)
+    assert (len(done), skipped, failed) == (2, 0, [])
+    assert done[0]['rows'] == 182
+    assert os.path.exists(os.path.join(output_dir, '2023', 'rider-ids.csv'))
+
+    done, skipped, failed = run_backfill(tasks, output_dir, workers=1)
+    assert (done, skipped, failed) == ([], 2, [])
+
+    # Een gewijzigde input of output wordt opnieuw gedaan, de rest niet
+    with open(tasks[1].input_path, 'a', encoding='utf-8') as f:
+        f.write('183,Extra,Renner,,,\n')
+    os.remove(tasks[0].output_path(output_dir))
+    done, skipped, failed = run_backfill(tasks, output_dir, workers=1)
+    assert sorted(entry['key'] for entry in done) == ['2023/1', '2023/2']
+    assert skipped == 0
+
+    # --restart: het journal telt niet mee
+    done, skipped, _ = run_backfill(tasks, output_dir, workers=1, resume=False)
+    assert (len(done), skipped) == (2, 0)
+
+
+def test_resume_after_a_crash_mid_journal_line(tmp_path):
+    history_dir, output_dir = history(tmp_path)
+    tasks = discover_tasks(history_dir)
+    run_backfill(tasks, output_dir, workers=1)
+
+    # Crash tijdens het schrijven van de laatste regel: die etappe telt niet als klaar
+    path = os.path.join(output_dir, JOURNAL_NAME)
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    last_key = Journal(path).load()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:len(lines[-1]) // 2])
+    kept = set(Journal(path).load())
+    assert len(kept) == 1
+
+    done, skipped, failed = run_backfill(tasks, output_dir, workers=1)
+    assert skipped == 1 and failed == []
+    assert [entry['key'] for entry in done] == sorted(set(last_key) - kept)
+    assert set(Journal(path).load()) == set(last_key)
@@ -0,0 +1,114 @@
+"""
+Tests for tourpoule.comparison and the stage points it sums: position plus
+jersey points, over the main riders that were active in each stage.
+"""
+
+import os
+import shutil
+
+from conftest import BACKUP_DIR
+from tourpoule.comparison import TeamComparison
+from tourpoule.records import ResultRecord, Status
+from tourpoule.reserves import TeamRiders, stage_rosters
+from tourpoule.scoring import (
+    read_final_stage, read_jersey_points, read_jersey_wearers, read_stage_scoring, stage_rider_points,
+)
+
+POSITION_POINTS = {1: 30, 2: 15}
+JERSEY_POINTS = {1: 10, 2: 5}
+
+
+def team_rows(team_id, mains, reserves, first_id):
+    rows = [{'fantasy_team_id': team_id, 'rider_id': r, 'slot_type': 'main', 'slot_number': n}
+            for n, r in enumerate(mains, 1)]
+    rows += [{'fantasy_team_id': team_id, 'rider_id': r, 'slot_type': 'reserve', 'slot_number': n}
+             for n, r in enumerate(reserves, 1)]
+    for i, row in enumerate(rows):
+        row['id'] = first_id + i
+    return rows
+
+
+def results(ranking, out=(), riders=range(1, 22)):
+    """Uitslag: ranking vooraan, de rest daarna; renners in out zijn uitgevallen, ontbrekende hebben geen regel"""
+    order = list(ranking) + [r for r in riders if r not in ranking and r not in out]
+    records = [ResultRecord(position, 'Voor', f'Naam {r}', r) for position, r in enumerate(order, 1)]
+    records += [ResultRecord(len(order) + 1, 'Voor', f'Naam {r}', r, status=Status.DNF) for r in out]
+    return records
+
+
+# Team 1: main 1-10, reserve 11. Team 2: main 12-21, reserve 1
+TEAM_RIDERS = TeamRiders.from_rows(team_rows(1, range(1, 11), [11], 100) + team_rows(2, range(12, 22), [1], 200))
+# Etappe 1: renner 1 valt uit, reserve 11 wint. Etappe 2: renner 1 heeft geen regel meer, 11 draagt geel
+STAGE_RECORDS = {
+    1: results([11, 2], out=[1]),
+    2: results([3, 11], riders=range(2, 22)),
+}
+JERSEY_WEARERS = {2: [(11, 1)]}
+
+
+def stage_points():
+    return {n: stage_rider_points(records, POSITION_POINTS, JERSEY_WEARERS.get(n, ()), JERSEY_POINTS)
+            for n, records in STAGE_RECORDS.items()}
+
+
+def test_stage_rider_points_include_jerseys():
+    records = results([5, 6])
+    assert stage_rider_points(records, POSITION_POINTS) == {5: 30, 6: 15}
+    assert stage_rider_points(records, POSITION_POINTS, [(6, 1), (7, 2), (8, 3)], JERSEY_POINTS) == {
+        5: 30, 6: 25, 7: 5,
+    }
+
+
+def test_read_jersey_points_from_backup():
+    points = read_jersey_points(os.path.join(BACKUP_DIR, 'scoring_rules.csv'), os.path.join(BACKUP_DIR, 'jerseys.csv'))
+    # geel = 10, groen = 5 (scoring_rules 11 en 12)
+    assert points[1] == 10
+    assert points[2] == 5
+
+
+def test_read_jersey_wearers(tmp_path):
+    stages = tmp_path / 'stages.csv'
+    stages.write_text('id,stage_number\n7,1\n8,2\n', encoding='utf-8')
+    wearers = tmp_path / 'stage_jersey_wearers.csv'
+    wearers.write_text('id,stage_id,jersey_id,rider_id\n1,7,1,11\n2,8,1,11\n3,8,2,4\n4,99,1,5\n', encoding='utf-8')
+    assert read_jersey_wearers(str(wearers), str(stages)) == {1: [(11, 1)], 2: [(11, 1), (4, 2)]}
+
+
+def test_no_jersey_points_on_the_final_stage(tmp_path):
+    for name in ('scoring_rules.csv', 'jerseys.csv'):
+        shutil.copy(os.path.join(BACKUP_DIR, name), tmp_path / name)
+    (tmp_path / 'stages.csv').write_text('id,stage_number\n7,1\n8,2\n', encoding='utf-8')
+    (tmp_path / 'stage_jersey_wearers.csv').write_text(
+        'id,stage_id,jersey_id,rider_id\n1,7,1,11\n2,8,1,11\n', encoding='utf-8')
+    assert read_final_stage(str(tmp_path / 'stages.csv')) == 2
+    # Etappe 2 is de laatste: de gele trui telt daar niet (BUSINESS RULE 9)
+    _, jersey_points, jersey_wearers = read_stage_scoring(str(tmp_path))
+    assert jersey_wearers == {1: [(11, 1)]}
+    assert stage_rider_points([], {}, jersey_wearers.get(2, ()), jersey_points) == {}
+
+
+def test_stage_rosters_replay_reserve_activations():
+    rosters = stage_rosters(TEAM_RIDERS, STAGE_RECORDS)
+    first = rosters[1]
+    reserve = list(first.id).index(110)
+    dropped = list(first.id).index(100)
+    assert (first.is_main[reserve], first.active[reserve], first.slot_number[reserve]) == (1, 1, 1)
+    assert (first.active[dropped], first.out_of_race[dropped]) == (0, 1)
+    # Reserve 1 van team 2 is ook uit koers, maar team 2 mist niemand
+    assert first.out_of_race[list(first.id).index(210)] == 1
+    # Etappe 2 verandert niets meer, dus dezelfde snapshot; het origineel blijft ongewijzigd
+    assert rosters[2] is first
+    assert TEAM_RIDERS.active[dropped] == 1 and TEAM_RIDERS.is_main[reserve] == 0
+
+
+def test_points_use_the_roster_of_each_stage():
+    rosters = stage_rosters(TEAM_RIDERS, STAGE_RECORDS)
+    comparison = TeamComparison.from_team_riders(rosters[2], stage_points(), stage_rosters=rosters)
+    # Etappe 1: reserve 11 is na de import geactiveerd en scoort (30) plus renner 2 (15);
+    # etappe 2: renner 3 (30), 11 tweede (15) en in het geel (10)
+    assert comparison.points[1] == [45, 55]
+    assert comparison.points[2] == [0, 0]
+    assert comparison.mains[1] >> 11 & 1 and not comparison.mains[1] >> 1 & 1
+
+    # Met alleen de opstelling van voor de eerste etappe tellen 11 en zijn trui niet mee
+    assert TeamComparison.from_team_riders(TEAM_RIDERS, stage_points()).points[1] == [15, 30]
@@ -0,0 +1,52 @@
+"""
+Golden output tests: run the import scripts on the committed stage 1 inputs
+and compare the generated files byte for byte with tests/python/golden/.
+
+Update the golden files after an intended output change with:
+  UPDATE_GOLDEN=1 python -m pytest tests/python/test_golden_outputs.py
+"""
+
+from conftest import assert_golden
+
+
+def test_fix_rider_ids(workspace):
+    output = workspace.run('fix-rider-ids.py', '1', '--no-cache')
+    assert_golden('etappe-1-uitslag-fixed.csv', workspace.read_bytes('imports', 'etappe-1-uitslag-fixed.csv'))
+    assert 'Corrected CSV geschreven' in output
+
+
+def test_generate_sql(workspace):
+    workspace.run('generate-etappe-1-sql.py', '1', '--no-cache')
+    assert_golden('import-etappe-1-uitslag.sql', workspace.read_bytes('imports', 'import-etappe-1-uitslag.sql'))
+
+
+def test_generate_sql_batch(workspace):
+    workspace.run('generate-etappe-1-sql.py', '1', '--batch', '--no-cache')
+    assert_golden(
+        'import-etappe-1-uitslag.batch.jsonl',
+        workspace.read_bytes('imports', 'import-etappe-1-uitslag.batch.jsonl'),
+    )
+
+
+def test_import_stage_results(workspace):
+    # Optie 2: DNF renners met NULL tijd toevoegen
+    workspace.run('import-etappe-uitslag.py', '--reserves', stdin='2\n')
+    assert_golden('import-etappe-1-from-temp.sql', workspace.read_bytes('imports', 'import-etappe-1-from-temp.sql'))
+    assert_golden('activate-reserves-etappe-1.sql', workspace.read_bytes('imports', 'activate-reserves-etappe-1.sql'))
+
+
+def test_import_stage_results_batch(workspace):
+    workspace.run('import-etappe-uitslag.py', '--batch', stdin='1\n')
+    assert_golden(
+        'import-etappe-1-from-temp.batch.jsonl',
+        workspace.read_bytes('imports', 'import-etappe-1-from-temp.batch.jsonl'),
+    )
+
+
+def test_validate_sql(workspace):
+    workspace.run('generate-etappe-1-sql.py', '1', '--no-cache')
+    assert_golden('validate-sql.txt', workspace.run('validate-sql.py'))
+
+
+def test_compare_riders(workspace):
+    assert_golden('compare-riders-with-database.txt', workspace.run('compare-riders-with-database.py'))
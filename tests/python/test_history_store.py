@@ -0,0 +1,100 @@
+"""
+Tests for tourpoule.history_store: delta-encoded per-stage team points.
+"""
+
+import os
+
+import pytest
+
+from tourpoule.history_store import HistoryStore, stage_points_from_rows, typecode_for
+
+STAGE_POINTS = {
+    1: {1: 10, 2: 0, 3: 25},
+    2: {1: 5, 2: 40},
+    3: {1: 30, 2: 1, 3: 2},
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore.build(str(tmp_path / 'store'), STAGE_POINTS, {1: 101, 2: 102, 3: 103})
+
+
+def test_typecode_for():
+    assert typecode_for([0, 127]) == 'b'
+    assert typecode_for([-129]) == 'h'
+    assert typecode_for([1], current='h') == 'h'
+    assert typecode_for([40000]) == 'i'
+
+
+def test_stage_points_from_rows():
+    rows = [{'stage_id': 7, 'participant_id': 3, 'total_points': 12}, {'stage_id': 8, 'participant_id': 3, 'total_points': None}]
+    stages = [{'id': 7, 'stage_number': 1}, {'id': 8, 'stage_number': 2}]
+    assert stage_points_from_rows(rows, stages) == {1: {3: 12}, 2: {3: 0}}
+
+
+def test_team_and_stage_slices(store):
+    assert store.typecode == 'b'
+    assert os.path.getsize(store.data_path) == 9
+    assert store.team_points(3) == [25, 0, 2]
+    assert store.team_cumulative(1) == [10, 15, 45]
+    assert store.stage_points(2) == {1: 5, 2: 40, 3: 0}
+    assert store.best_stages(1, k=2) == [(3, 30), (1, 10)]
+    assert store.totals_after(2) == {1: 15, 2: 40, 3: 25}
+
+
+def test_reopen(store):
+    reopened = HistoryStore.open(store.directory)
+    assert reopened.teams == [1, 2, 3]
+    assert reopened.stages[0] == {'stage_number': 1, 'stage_id': 101}
+    assert reopened.team_points(2) == store.team_points(2)
+
+
+def test_open_after_a_crash_before_the_index_was_written(store):
+    # Blok van etappe 4 geschreven, daarna gecrasht: de index kent alleen etappe 1-3
+    with open(store.data_path, 'ab') as f:
+        f.write(bytes([7, 8, 9]))
+    reopened = HistoryStore.open(store.directory)
+    assert reopened.stage_numbers == [1, 2, 3]
+    assert os.path.getsize(store.data_path) == 9
+    reopened.append_stage(4, {1: 1, 2: 2, 3: 3})
+    assert HistoryStore.open(store.directory).stage_points(4) == {1: 1, 2: 2, 3: 3}
+
+    # Te kort kan niet hersteld worden
+    with open(store.data_path, 'r+b') as f:
+        f.truncate(5)
+    with pytest.raises(ValueError):
+        HistoryStore.open(store.directory)
+
+
+def test_append_only_writes_the_new_block(store):
+    with open(store.data_path, 'rb') as f:
+        before = f.read()
+    store.append_stage(4, {1: 1, 2: 2, 3: 3}, 104)
+    with open(store.data_path, 'rb') as f:
+        after = f.read()
+    assert after[:len(before)] == before
+    assert after[len(before):] == bytes([1, 2, 3])
+    assert HistoryStore.open(store.directory).team_cumulative(3) == [25, 25, 27, 30]
+
+
+def test_overwrite_existing_stage_in_place(store):
+    store.append_stage(2, {1: 6, 2: 41, 3: 1})
+    reopened = HistoryStore.open(store.directory)
+    assert reopened.stage_points(2) == {1: 6, 2: 41, 3: 1}
+    assert reopened.stages[1]['stage_id'] == 102
+
+
+def test_append_widens_type(store):
+    store.append_stage(4, {1: 300})
+    reopened = HistoryStore.open(store.directory)
+    assert reopened.typecode == 'h'
+    assert reopened.team_points(1) == [10, 5, 30, 300]
+
+
+def test_changes_that_need_a_rebuild(store):
+    with pytest.raises(ValueError):
+        store.append_stage(4, {99: 1})
+    store.append_stage(5, {1: 1})
+    with pytest.raises(ValueError):
+        store.append_stage(4, {1: 1})
@@ -0,0 +1,126 @@
+"""
+Tests for tourpoule.integrity: single-pass stage checks.
+"""
+
+import os
+import time
+
+from conftest import CHECK_TIMINGS, IMPORTS_DIR
+from tourpoule.integrity import (
+    ALREADY_OUT, DNF_BEFORE_FINISHER, DUPLICATE_POSITION, DUPLICATE_RIDER, POSITION_GAP,
+    TIME_DECREASING, UNMATCHED_RIDER, UNRESOLVED_NAME, fill_rider_ids, out_of_race_rider_ids, validate_stage,
+)
+from tourpoule.sql_batch import stage_results_rows
+from tourpoule.names import normalize_name
+from tourpoule.records import ResultRecord, RiderRecord, Status, read_stage_results_csv
+from tourpoule.resolve import RiderIndex
+
+
+def rider(position, rider_id, time_seconds, status=Status.FINISHED):
+    return ResultRecord(position, 'Renner', str(position), rider_id, '', time_seconds, status)
+
+
+def codes(report):
+    return [(i.code, i.position) for i in report.issues]
+
+
+def test_clean_stage_has_no_issues():
+    report = validate_stage([rider(1, 10, 100), rider(2, 11, 100), rider(3, 12, 105), rider(4, 13, None, Status.DNF)])
+    assert report.ok
+    assert report.issues == []
+
+
+def test_duplicates_and_unmatched():
+    report = validate_stage([rider(1, 10, 100), rider(2, 10, 100), rider(2, 11, 101), rider(3, None, 102)])
+    # Zonder RiderIndex is een naam zonder rider_id alleen een waarschuwing
+    assert codes(report) == [(DUPLICATE_RIDER, 2), (DUPLICATE_POSITION, 2), (UNRESOLVED_NAME, 3)]
+    assert report.issues[0].related_position == 1
+    assert not report.ok
+    assert validate_stage([rider(1, 10, 100), rider(2, None, 101)]).ok
+
+    nameless = ResultRecord(2, '', '', None, '', 101)
+    assert codes(validate_stage([rider(1, 10, 100), nameless])) == [(UNMATCHED_RIDER, 2)]
+
+
+def test_names_are_resolved_through_the_rider_index():
+    index = RiderIndex([
+        RiderRecord(rider_id, first, last, None, normalize_name(first), normalize_name(last))
+        for rider_id, first, last in [(10, 'Tadej', 'Pogačar'), (11, 'Jonas', 'Vingegaard')]
+    ])
+    records = [
+        ResultRecord(1, 'Tadej', 'Pogacar', None, '', 100),
+        ResultRecord(2, 'Jonas', 'Vingegaard', 11, '', 100),
+        ResultRecord(3, 'Onbekende', 'Renner', None, '', 101),
+        ResultRecord(4, 'Jonas', 'Vingegaard', None, '', 102),
+    ]
+    report = validate_stage(records, out_of_race={10}, rider_index=index)
+    # Pogacar wordt gevonden (en was al uit koers), de onbekende naam is een fout,
+    # en de tweede Vingegaard is via de naam dezelfde renner
+    assert codes(report) == [(ALREADY_OUT, 1), (UNMATCHED_RIDER, 3), (DUPLICATE_RIDER, 4)]
+    assert [i.severity for i in report.issues] == ['error'] * 3
+
+
+def test_names_found_by_folding_reach_the_sql():
+    # De SQL matcht exact op LOWER(TRIM(naam)): Søren Wærenskjold zou daar stil wegvallen
+    index = RiderIndex([RiderRecord(184, 'Soren', 'Waerenskjold', None, 'soren', 'waerenskjold'),
+                        RiderRecord(10, 'Tadej', 'Pogačar', None, 'tadej', 'pogacar')])
+    records = [
+        ResultRecord(1, 'Søren', 'Wærenskjold', None, '', 100),
+        ResultRecord(2, 'Tadej', 'Pogacar', None, '', 100),
+        ResultRecord(3, 'Onbekende', 'Renner', None, '', 101),
+    ]
+    assert codes(validate_stage(records, rider_index=index)) == [(UNMATCHED_RIDER, 3)]
+
+    assert fill_rider_ids(records, index) == 2
+    assert [r.rider_id for r in records] == [184, 10, None]
+    # Met rider_id gaat de renner zonder naam lookup de batch in; de onbekende blijft een (gemelde) naam lookup
+    assert [row[:4] for row in stage_results_rows(records)] == [
+        [1, None, None, 184], [2, None, None, 10], [3, 'Onbekende', 'Renner', None],
+    ]
+
+
+def test_gap_is_a_warning():
+    report = validate_stage([rider(1, 10, 100), rider(3, 11, 100)])
+    assert codes(report) == [(POSITION_GAP, 2)]
+    assert report.ok
+    assert len(report.warnings) == 1
+
+
+def test_time_order_and_dnf_placement():
+    report = validate_stage([
+        rider(1, 10, 100),
+        rider(2, 11, None, Status.DNF),
+        rider(3, 12, 110),
+        rider(4, 13, 105),
+    ])
+    assert codes(report) == [(DNF_BEFORE_FINISHER, 2), (TIME_DECREASING, 4)]
+    assert report.issues[0].related_position == 3
+
+
+def test_input_order_does_not_matter():
+    records = [rider(3, 12, 110), rider(1, 10, 100), rider(2, 11, 105)]
+    assert validate_stage(records).issues == []
+
+
+def test_already_out_of_race():
+    previous = [[rider(1, 10, 100), rider(2, 11, None, Status.DNF)]]
+    report = validate_stage([rider(1, 10, 100), rider(2, 11, 100)], out_of_race_rider_ids(previous))
+    assert codes(report) == [(ALREADY_OUT, 2)]
+
+
+def test_report_json():
+    data = validate_stage([rider(1, 10, 100), rider(1, 11, 100)], stage_number=4).to_json()
+    assert data['stage_number'] == 4
+    assert data['ok'] is False
+    assert data['counts'] == {DUPLICATE_POSITION: 1}
+    assert data['issues'][0]['code'] == DUPLICATE_POSITION
+
+
+def test_fixture_stage_is_checked_within_milliseconds():
+    records = read_stage_results_csv(os.path.join(IMPORTS_DIR, 'etappe-1-uitslag-fixed.csv'))
+    started = time.perf_counter()
+    report = validate_stage(records, stage_number=1)
+    if CHECK_TIMINGS:
+        assert time.perf_counter() - started < 0.05
+    # De tijden in de stage 1 bron zijn op drie plekken niet oplopend
+    assert report.counts() == {TIME_DECREASING: 3}
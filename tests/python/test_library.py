@@ -0,0 +1,112 @@
+"""
+The tourpoule package as a library: lazy exports, cached tables, cold start.
+
+The cold start test runs in a fresh interpreter, because in-process the other
+tests have long since imported everything.
+"""
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKUP_DIR, CHECK_TIMINGS, IMPORTS_DIR
+import tourpoule
+from tourpoule import result_import, tables
+from tourpoule.records import Status
+
+# Een tool die alleen de kern gebruikt mag deze modules niet laden
+HEAVY_MODULES = ['multiprocessing', 'concurrent.futures', 'logging', 'tourpoule.backfill',
+                 'tourpoule.shared_scoring', 'tourpoule.photos']
+CORE_MODULES = ['tourpoule.records', 'tourpoule.resolve', 'tourpoule.times', 'tourpoule.result_import',
+                'tourpoule.stage_sql', 'tourpoule.integrity', 'tourpoule.sql_batch', 'tourpoule.journal',
+                'tourpoule.tables']
+COLD_START_BUDGET_MS = 150
+
+
+def test_cold_start_loads_only_the_core():
+    code = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "import tourpoule\n"
+        f"for name in {CORE_MODULES!r}:\n"
+        "    __import__(name)\n"
+        "elapsed = (time.perf_counter() - started) * 1000\n"
+        f"print(elapsed, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=IMPORTS_DIR, capture_output=True, text=True, check=True)
+    elapsed_ms, *loaded = result.stdout.split()
+    assert loaded == []
+    if CHECK_TIMINGS:
+        assert float(elapsed_ms) < COLD_START_BUDGET_MS
+
+
+def test_lazy_exports():
+    assert 'parse_results' in dir(tourpoule)
+    assert tourpoule.parse_results is result_import.parse_results
+    assert tourpoule.rider_index is tables.rider_index
+    with pytest.raises(AttributeError):
+        tourpoule.does_not_exist
+
+
+def test_scripts_do_not_run_on_import(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for script in [
+        'generate-etappe-1-sql.py', 'fix-rider-ids.py', 'import-etappe-uitslag.py', 'rider-popularity.py',
+        'team-comparison.py', 'sync-roster.py', 'validate-teams.py', 'validate-stage.py', 'publish-snapshots.py',
+        'build-history-store.py', 'update-stats-rollup.py', 'run-batch-import.py', 'profile-diff.py',
+    ]:
+        spec = importlib.util.spec_from_file_location('script', os.path.join(IMPORTS_DIR, script))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert callable(module.main)
+    assert os.listdir(tmp_path) == []
+
+
+def test_parse_results_text_formats():
+    content = "# uitslag\n1. Jasper Philipsen 3:53:11\n2 Wout van Aert s.t.\n3\tArnaud\tDe Lie\t+0:12\n4. Tim Merlier DNF\n"
+    riders, unreadable = result_import.parse_results(content)
+    assert unreadable == 0
+    assert [(r.first_name, r.last_name) for r in riders] == [
+        ('Jasper', 'Philipsen'), ('Wout', 'van Aert'), ('Arnaud', 'De Lie'), ('Tim', 'Merlier')]
+    assert [r.time_seconds for r in riders[:3]] == [14000 - 9, 14000 - 9, 14000 + 3]
+
+    finished, dnf = result_import.split_finishers(riders)
+    assert len(finished) == 3 and dnf[0].status == Status.DNF
+    sql = result_import.results_sql(finished, dnf, result_import.DNF_POSITION)
+    assert "(999, 'Tim', 'Merlier', NULL)" in sql
+    assert '-- Total riders: 4 (3 finished, 1 DNF/DNS/DSQ)' in sql
+
+
+def test_tables_are_cached_until_the_file_changes(tmp_path):
+    path = str(tmp_path / 'riders.csv')
+    shutil.copy(os.path.join(BACKUP_DIR, 'riders.csv'), path)
+    tables.clear()
+
+    index = tables.rider_index(path)
+    assert tables.rider_index(path) is index
+    assert tables.riders(path) is tables.riders(path)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert tables.rider_index(path) is not index
+    assert len(tables.rider_index(path)) == len(index) - 1
+    tables.clear()
+
+
+def test_data_file_prefers_source_then_database_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Zonder export in database_csv/ de backup uit de repo
+    assert tables.data_file('jerseys.csv') == os.path.join(tables.FALLBACK_DIR, 'jerseys.csv')
+    os.makedirs('database_csv')
+    with open(os.path.join('database_csv', 'jerseys.csv'), 'w', encoding='utf-8') as f:
+        f.write('id,type\n')
+    assert tables.data_file('jerseys.csv') == os.path.join('database_csv', 'jerseys.csv')
+    assert tables.data_file('jerseys.csv', 'export') == os.path.join('export', 'jerseys.csv')
@@ -0,0 +1,37 @@
+"""
+Tests for tourpoule.names: the one typo table that resolve.py and stage_sql.py share.
+"""
+
+from tourpoule import names, resolve
+from tourpoule.names import correct_name, normalize_name
+from tourpoule.records import ResultRecord
+from tourpoule.stage_sql import apply_typo_corrections
+
+
+def test_correct_name():
+    # Voornaam typo: bij elke achternaam
+    assert correct_name('Rem++', 'Evenepoel') == ('Remco', 'Evenepoel')
+    assert correct_name('Ro&', 'van Sintmaartensdijk') == ('Roel', 'van Sintmaartensdijk')
+    # Eén renner: alleen bij die achternaam
+    assert correct_name('Mathieu', 'van der Po&') == ('Mathieu', 'van der Poel')
+    assert correct_name('William', 'Barta') == ('Will', 'Barta')
+    assert correct_name('William', 'Blume Levy') == ('William', 'Blume Levy')
+    assert correct_name('Tadej', 'Pogacar') == ('Tadej', 'Pogacar')
+
+
+def test_stage_sql_uses_the_same_corrections():
+    records = [ResultRecord(1, 'Rem++', 'Evenepoel', None), ResultRecord(2, 'Frank', 'van den Brook', None)]
+    apply_typo_corrections(records)
+    assert [(r.first_name, r.last_name) for r in records] == [('Remco', 'Evenepoel'), ('Frank', 'Van Den Broek')]
+
+
+def test_resolver_version_covers_the_table(monkeypatch):
+    before = resolve.resolver_version()
+    monkeypatch.setitem(names.NAME_CORRECTIONS, 'Jonas', {'Vingegard': ('Jonas', 'Vingegaard')})
+    assert resolve.resolver_version() != before
+
+
+def test_normalize_name():
+    assert normalize_name(' Søren Wærenskjold ') == 'søren wærenskjold'
+    assert normalize_name('Pogačar') == 'pogacar'
+    assert normalize_name(None) == ''
@@ -0,0 +1,168 @@
+"""
+Performance budgets for the parse, time conversion, resolve, validation and SQL generation paths.
+
+A synthetic stage file with PERF_ROWS rows (the stage 1 riders repeated) is
+run through the tourpoule functions in-process. Each step has to stay below
+the recorded peak memory in perf_budgets.json and, with CHECK_TIMINGS=1,
+above the recorded minimum throughput. Throughput depends on the load of the
+machine, so a default run (CI) only checks memory. The budgets have headroom
+for slower machines; record new ones after an intended change with:
+  UPDATE_PERF_BUDGETS=1 python -m pytest tests/python/test_perf_budgets.py
+"""
+
+import csv
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from conftest import BACKUP_DIR, CHECK_TIMINGS, IMPORTS_DIR
+from tourpoule import sql_batch
+from tourpoule.integrity import validate_stage
+from tourpoule.names import normalize_name
+from tourpoule.records import read_riders_csv, read_stage_results_csv, write_stage_results_csv
+from tourpoule.resolve import RiderIndex, resolve_stage
+from tourpoule.submissions import Submissions, validate
+from tourpoule.times import absolute_times, classify_times
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), 'perf_budgets.json')
+UPDATE_BUDGETS = os.getenv('UPDATE_PERF_BUDGETS') == '1'
+
+# Marge bij het vastleggen: een budget is 1/THROUGHPUT_MARGIN van de gemeten snelheid
+# en MEMORY_MARGIN x het gemeten geheugen
+THROUGHPUT_MARGIN = 4
+MEMORY_MARGIN = 1.5
+
+
+def _load_budgets():
+    with open(BUDGETS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+PERF_ROWS = _load_budgets()['rows']
+
+
+@pytest.fixture(scope='module')
+def large_stage_file(tmp_path_factory):
+    source = read_stage_results_csv(os.path.join(IMPORTS_DIR, 'etappe-1-uitslag.csv'))
+    records = []
+    for i in range(PERF_ROWS):
+        r = source[i % len(source)]
+        records.append(type(r)(i + 1, r.first_name, r.last_name, r.rider_id, r.team_name, r.time_seconds))
+    path = str(tmp_path_factory.mktemp('perf') / 'etappe-large-uitslag.csv')
+    write_stage_results_csv(path, records)
+    return path
+
+
+@pytest.fixture(scope='module')
+def index():
+    return RiderIndex(read_riders_csv(os.path.join(BACKUP_DIR, 'riders.csv'), normalize_name))
+
+
+def measure(step, setup):
+    """(rijen per seconde, piek geheugen in MB); tijd en geheugen in aparte runs"""
+    args = setup()
+    started = time.perf_counter()
+    step(*args)
+    elapsed = time.perf_counter() - started
+
+    args = setup()
+    tracemalloc.start()
+    step(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return PERF_ROWS / elapsed, peak / (1024 * 1024)
+
+
+def check_budget(name, step, setup=tuple):
+    """setup() geeft verse argumenten voor step (buiten de meting), bv. onbewerkte records"""
+    rows_per_sec, peak_mb = measure(step, setup)
+    budgets = _load_budgets()
+    if UPDATE_BUDGETS:
+        budgets['budgets'][name] = {
+            'min_rows_per_sec': int(rows_per_sec / THROUGHPUT_MARGIN),
+            'max_peak_mb': max(round(peak_mb * MEMORY_MARGIN, 1), 1.0),
+        }
+        with open(BUDGETS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return
+    budget = budgets['budgets'][name]
+    if CHECK_TIMINGS:
+        assert rows_per_sec >= budget['min_rows_per_sec'], (
+            f"{name}: {rows_per_sec:,.0f} rijen/s, budget {budget['min_rows_per_sec']:,}"
+        )
+    assert peak_mb <= budget['max_peak_mb'], f"{name}: piek {peak_mb:.1f} MB, budget {budget['max_peak_mb']} MB"
+
+
+def test_parse_budget(large_stage_file):
+    check_budget('parse', lambda: read_stage_results_csv(large_stage_file))
+
+
+def test_times_budget(large_stage_file):
+    # Uitslag zoals gepubliceerd: winnaar absoluut, daarna gaps en s.t.
+    records = read_stage_results_csv(large_stage_file)
+    winner = records[0].time_seconds
+    texts = ['3:53:11']
+    for r in records[1:]:
+        if r.time_seconds is None:
+            texts.append('DNF')
+        elif r.time_seconds == winner:
+            texts.append('s.t.')
+        else:
+            gap = r.time_seconds - winner
+            texts.append(f"+{gap // 60}:{gap % 60:02d}")
+    check_budget('times', lambda: absolute_times(*classify_times(texts)))
+
+
+def test_resolve_budget(large_stage_file, index):
+    # resolve_stage werkt de records in place bij: elke run krijgt een verse lijst
+    check_budget(
+        'resolve',
+        lambda records: resolve_stage(records, index),
+        setup=lambda: (read_stage_results_csv(large_stage_file),),
+    )
+
+
+def test_validate_budget(large_stage_file, index):
+    records = read_stage_results_csv(large_stage_file)
+    check_budget('validate', lambda: validate_stage(records, stage_number=1, rider_index=index))
+
+
+def test_submissions_budget(index):
+    # PERF_ROWS teams van 10 + 5 renners; de Submissions array wordt buiten de meting opgebouwd
+    rider_ids = sorted(index.by_id)
+
+    def setup():
+        submissions = Submissions()
+        for team in range(PERF_ROWS):
+            first = team % (len(rider_ids) - 15)
+            slots = [('main', n, rider_ids[first + n - 1]) for n in range(1, 11)]
+            slots += [('reserve', n, rider_ids[first + 9 + n]) for n in range(1, 6)]
+            submissions.add_team(team, slots)
+        return (submissions,)
+
+    check_budget('submissions', lambda submissions: validate(submissions, index.by_id, {rider_ids[0]}), setup)
+
+
+def test_sql_generation_budget(large_stage_file, tmp_path):
+    records = read_stage_results_csv(large_stage_file)
+    output = str(tmp_path / 'large.batch.jsonl')
+
+    def generate():
+        rows = sql_batch.stage_results_rows(records)
+        sql_batch.write_batch_file(output, sql_batch.stage_results_header(1, len(rows)), rows)
+
+    check_budget('sql', generate)
+
+
+def test_write_budget(large_stage_file, tmp_path):
+    records = read_stage_results_csv(large_stage_file)
+    output = str(tmp_path / 'large-fixed.csv')
+    check_budget('write', lambda: write_stage_results_csv(output, records))
+
+
+def test_budget_file_is_complete():
+    assert set(_load_budgets()['budgets']) == {'parse', 'times', 'resolve', 'validate', 'submissions', 'sql', 'write'}
@@ -0,0 +1,117 @@
+"""
+Tests for tourpoule.photos: data URLs -> content-addressed photo cache.
+"""
+
+import base64
+import csv
+import os
+
+import pytest
+
+from tourpoule import photos
+
+JPEG = b'\xff\xd8\xff' + b'jpeg' * 100
+PNG = b'\x89PNG' + b'png' * 100
+
+
+def data_url(mime, data):
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def test_parse_data_url():
+    assert photos.parse_data_url(data_url('image/jpeg', JPEG)) == ('image/jpeg', JPEG)
+    assert photos.parse_data_url('data:image/PNG;charset=x;base64,' + base64.b64encode(PNG).decode()) == ('image/png', PNG)
+    assert photos.parse_data_url('/photos/ab/abc-40.webp') is None
+    assert photos.parse_data_url('') is None
+    assert photos.parse_data_url(None) is None
+
+
+def test_collect_from_rows_deduplicates():
+    rows = [
+        {'id': '1', 'photo_url': data_url('image/jpeg', JPEG)},
+        {'id': '2', 'photo_url': data_url('image/jpeg', JPEG)},
+        {'id': '3', 'photo_url': data_url('image/png', PNG)},
+        {'id': '4', 'photo_url': ''},
+    ]
+    images, rider_keys = photos.collect_from_rows(rows)
+    assert len(images) == 2
+    assert rider_keys[1] == rider_keys[2] != rider_keys[3]
+    assert 4 not in rider_keys
+    assert images[rider_keys[3]].mime == 'image/png'
+
+
+def test_collect_from_directory(tmp_path):
+    (tmp_path / '7.jpg').write_bytes(JPEG)
+    (tmp_path / '8.JPEG').write_bytes(JPEG)
+    (tmp_path / 'notes.txt').write_bytes(b'x')
+    images, rider_keys = photos.collect_from_directory(str(tmp_path))
+    assert list(rider_keys) == [7, 8]
+    assert len(images) == 1
+
+
+
+def test_read_riders_photo_rows_with_large_fields(tmp_path):
+    # Groter dan de standaard csv limiet van 128 KB
+    url = data_url('image/jpeg', JPEG * 500)
+    path = str(tmp_path / 'riders.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows([['id', 'first_name', 'photo_url'], [5, 'Tadej', url], [6, 'Jonas', '']])
+    rows = photos.read_riders_photo_rows(path)
+    assert rows == [{'id': '5', 'photo_url': url}, {'id': '6', 'photo_url': ''}]
+
+def test_key_depends_on_render_settings(monkeypatch):
+    key = photos.cache_key(JPEG)
+    monkeypatch.setattr(photos, 'RENDER_VERSION', photos.RENDER_VERSION + 1)
+    assert photos.cache_key(JPEG) != key
+
+
+def test_build_cache_writes_every_size_once(tmp_path):
+    images, rider_keys = photos.collect_from_rows([{'id': 1, 'photo_url': data_url('image/jpeg', JPEG)}])
+    output_dir = str(tmp_path / 'photos')
+    first = photos.build_cache(images, output_dir, workers=1)
+    second = photos.build_cache(images, output_dir, workers=1)
+    key = rider_keys[1]
+    assert first[key][1] == 0
+    assert second[key] == (0, len(photos.SIZES), None)
+
+    url = photos.photo_url(key, 'image/jpeg')
+    assert url.startswith(f'{photos.URL_PREFIX}/{key[:2]}/{key}-{photos.DEFAULT_SIZE}.')
+    assert os.path.exists(os.path.join(output_dir, url[len(photos.URL_PREFIX) + 1:]))
+
+
+def test_unreadable_photo_is_stored_as_original(tmp_path, monkeypatch):
+    def render(data, size):
+        if data == JPEG:
+            raise OSError('cannot identify image file')
+        return b'webp'
+    # In-process (build_thumbnails is wat een worker draait), zodat het ook zonder Pillow werkt
+    monkeypatch.setattr(photos, 'Image', object())
+    monkeypatch.setattr(photos, 'render', render)
+    images, rider_keys = photos.collect_from_rows([{'id': 1, 'photo_url': data_url('image/jpeg', JPEG)},
+                                                   {'id': 2, 'photo_url': data_url('image/png', PNG)}])
+    output_dir = str(tmp_path / 'photos')
+    broken, good = (photos.build_thumbnails(images[rider_keys[n]], output_dir) for n in (1, 2))
+
+    assert good == (rider_keys[2], 4 * len(photos.SIZES), 0, None)
+    assert broken == (rider_keys[1], len(JPEG) * len(photos.SIZES), 0, 'OSError: cannot identify image file')
+    url = photos.photo_url(rider_keys[1], 'image/jpeg', rendered=False)
+    assert url.endswith(f'-{photos.DEFAULT_SIZE}.jpg')
+    with open(os.path.join(output_dir, url[len(photos.URL_PREFIX) + 1:]), 'rb') as f:
+        assert f.read() == JPEG
+    assert photos.photo_url(rider_keys[2], 'image/png').endswith('.webp')
+
+
+@pytest.mark.skipif(photos.Image is None, reason='Pillow niet geïnstalleerd')
+def test_render_square_webp():
+    import io
+    buffer = io.BytesIO()
+    photos.Image.new('RGB', (120, 90), 'red').save(buffer, format='JPEG')
+    with photos.Image.open(io.BytesIO(photos.render(buffer.getvalue(), 40))) as thumb:
+        assert thumb.format == 'WEBP'
+        assert thumb.size == (40, 40)
+
+
+def test_update_sql():
+    sql = photos.update_sql({2: "/photos/ab/ab-40.webp", 1: "/photos/cd/it's-40.webp"})
+    assert "(1, '/photos/cd/it''s-40.webp'),\n  (2, '/photos/ab/ab-40.webp')" in sql
+    assert sql.count('UPDATE riders') == 1
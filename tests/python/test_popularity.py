@@ -0,0 +1,95 @@
+"""
+Tests for tourpoule.popularity: incremental team updates must give the same
+index as a full recount, and the UNDERDOG threshold is inclusive.
+"""
+
+import random
+
+import pytest
+
+from tourpoule.popularity import UNDERDOG_MAX_SHARE, PopularityIndex
+from tourpoule.reserves import TeamRiders
+
+
+def team_riders(teams):
+    """{team_id: {rider_id: is_main}} -> TeamRiders"""
+    rows = []
+    for team_id, selections in teams.items():
+        for slot, (rider_id, is_main) in enumerate(selections.items(), 1):
+            rows.append({'id': len(rows) + 1, 'fantasy_team_id': team_id, 'rider_id': rider_id,
+                         'slot_type': 'main' if is_main else 'reserve', 'slot_number': slot})
+    return TeamRiders.from_rows(rows)
+
+
+def random_team(rng):
+    riders = rng.sample(range(1, 60), 12)
+    return {rider_id: i < 10 for i, rider_id in enumerate(riders)}
+
+
+def snapshot(index, rider_ids):
+    return {
+        'team_count': index.team_count,
+        'team_ids': sorted(index.team_ids()),
+        'teams': {r: index.teams(r) for r in rider_ids},
+        'counts': {r: (index.main_count(r), index.reserve_count(r)) for r in rider_ids},
+        'most_selected': index.most_selected(20),
+        'underdogs': index.underdogs(0.1),
+    }
+
+
+def test_incremental_updates_match_a_full_recount():
+    rng = random.Random(3)
+    teams = {team_id: random_team(rng) for team_id in range(1, 41)}
+    index = PopularityIndex.from_team_riders(team_riders(teams))
+
+    for _ in range(200):
+        team_id = rng.randint(1, 50)
+        action = rng.random()
+        if action < 0.15:
+            teams.pop(team_id, None)
+            index.remove_team(team_id)
+            continue
+        selections = dict(teams.get(team_id) or random_team(rng))
+        if action < 0.5 and selections:
+            # Eén renner vervangen door een andere
+            out = rng.choice(list(selections))
+            replacement = rng.choice([r for r in range(1, 60) if r not in selections])
+            selections[replacement] = selections.pop(out)
+        else:
+            # Main en reserve omwisselen
+            main = rng.choice([r for r, is_main in selections.items() if is_main])
+            reserve = rng.choice([r for r, is_main in selections.items() if not is_main])
+            selections[main], selections[reserve] = False, True
+        teams[team_id] = selections
+        index.set_team(team_id, selections)
+
+    recount = PopularityIndex.from_team_riders(team_riders(teams))
+    rider_ids = range(1, 60)
+    assert snapshot(index, rider_ids) == snapshot(recount, rider_ids)
+    for team_id in teams:
+        assert index.underdog_exposure(team_id, 0.1) == recount.underdog_exposure(team_id, 0.1)
+
+
+def test_set_team_with_the_same_selection_changes_nothing():
+    index = PopularityIndex.from_team_riders(team_riders({1: {5: True, 6: False}, 2: {5: True}}))
+    index.set_team(1, {5: True, 6: False})
+    assert index.teams(5) == [1, 2]
+    assert (index.main_count(6), index.reserve_count(6)) == (0, 1)
+
+
+@pytest.mark.parametrize('team_count, max_share, count, underdog', [
+    # 5% van 40 teams = 2: precies op de grens telt mee, één meer niet
+    (40, UNDERDOG_MAX_SHARE, 2, True),
+    (40, UNDERDOG_MAX_SHARE, 3, False),
+    (39, UNDERDOG_MAX_SHARE, 2, False),
+    # 0.29 * 100 is als float 28.999999999999996
+    (100, 0.29, 29, True),
+    (100, 0.29, 30, False),
+])
+def test_underdog_threshold_is_inclusive(team_count, max_share, count, underdog):
+    # Renner 1 zit in de eerste count teams, renner 2 in alle teams
+    teams = {team_id: {2: True, **({1: True} if team_id <= count else {})} for team_id in range(1, team_count + 1)}
+    index = PopularityIndex.from_team_riders(team_riders(teams))
+    assert (1 in index.underdogs(max_share)) is underdog
+    assert 2 not in index.underdogs(max_share)
+    assert index.underdog_points({1: 10, 2: 10}, max_share).get(1, 0) == (10 if underdog else 0)
@@ -0,0 +1,103 @@
+"""
+Profiling mode: collapsed stacks per phase, allocation statistics and run diffs.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from tourpoule.profiling import (
+    SAMPLE, TRACE, Profiler, diff_runs, load_run, phase_file_name, read_collapsed, self_times,
+)
+
+
+def busy(n):
+    return sum(len(str(i)) for i in range(n))
+
+
+def allocate(n):
+    return [str(i) * 4 for i in range(n)]
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        busy(200)
+
+
+def test_trace_writes_collapsed_stacks(tmp_path):
+    profiler = Profiler(TRACE, 'run', str(tmp_path))
+    with profiler.phase('etappe-1-parse', allocations=True):
+        kept = allocate(20000)
+    with profiler.phase('etappe-1-sql'):
+        busy(20000)
+    path = profiler.write()
+
+    with open(os.path.join(path, 'summary.json'), 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    assert summary['unit'] == 'us'
+    assert set(summary['phases']) == {'etappe-1-parse', 'etappe-1-sql'}
+    parse = summary['phases']['etappe-1-parse']
+    assert parse['allocations']['peak_kb'] > 0
+    assert parse['allocations']['sites'][0]['site'].startswith('test_profiling.py:')
+    assert 'allocations' not in summary['phases']['etappe-1-sql']
+    assert len(kept) == 20000
+
+    stacks = read_collapsed(os.path.join(path, phase_file_name('etappe-1-sql')))
+    assert all(key[0] == 'etappe-1-sql' for key in stacks)
+    assert any(key[1:3] == ('test_profiling.py:busy', 'sum') for key in stacks)
+    with open(os.path.join(path, phase_file_name('etappe-1-sql')), 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines == sorted(lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_sample_mode(tmp_path):
+    profiler = Profiler(SAMPLE, 'run', str(tmp_path))
+    with profiler.phase('etappe-1-resolve'):
+        spin(0.2)
+    stacks = profiler.phases['etappe-1-resolve']['stacks']
+    assert sum(stacks.values()) > 0
+    assert all(key[:2] == ('etappe-1-resolve', 'test_profiling.py:spin') for key in stacks)
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = Profiler.from_args(['1', '--no-cache'], 'tool')
+    assert not profiler.enabled
+    with profiler.phase('etappe-1-parse', allocations=True):
+        busy(10)
+    assert profiler.phases == {}
+    assert profiler.write() is None
+
+
+def test_from_args():
+    assert Profiler.from_args(['--profile'], 'tool').mode == TRACE
+    profiler = Profiler.from_args(['--profile=sample', '--profile-name=voor'], 'tool')
+    assert (profiler.mode, profiler.name) == (SAMPLE, 'voor')
+    with pytest.raises(ValueError):
+        Profiler('cprofile')
+
+
+def test_diff_runs(tmp_path):
+    runs = []
+    for name, n in [('voor', 40000), ('na', 4000)]:
+        profiler = Profiler(TRACE, name, str(tmp_path))
+        with profiler.phase('etappe-1-sql'):
+            busy(n)
+        if name == 'voor':
+            with profiler.phase('etappe-1-parse'):
+                busy(10)
+        runs.append(load_run(profiler.write()))
+
+    diff = diff_runs(*runs)
+    assert diff['etappe-1-parse']['wall_ms'][1] is None
+    function, before, after = diff['etappe-1-sql']['functions'][0]
+    assert after < before
+    assert function in runs[0]['phases']['etappe-1-sql']['self_ms']
+
+
+def test_self_times():
+    stacks = {('fase', 'a', 'b'): 10, ('fase', 'b'): 5, ('fase', 'a'): 2}
+    assert self_times(stacks, 0.5) == {'b': 7.5, 'a': 1.0}
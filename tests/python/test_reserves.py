@@ -0,0 +1,121 @@
+"""
+Tests for tourpoule.reserves: bulk reserve activation after a stage import.
+"""
+
+import re
+
+from tourpoule.records import ResultRecord, Status
+from tourpoule.reserves import (
+    FREED_SLOT_BASE, TeamRiders, activation_sql, compute_activations, dropped_rider_ids, finished_rider_ids,
+    submitted_rows,
+)
+
+MAINS = range(1, 11)
+
+
+def team(mains=MAINS, reserves=(11, 12), team_id=1, overrides=None):
+    """Eén team; row id = 100 * team + rider_id. overrides: {rider_id: {kolom: waarde}}"""
+    rows = [{'slot_type': 'main', 'slot_number': n, 'rider_id': r} for n, r in enumerate(mains, 1)]
+    rows += [{'slot_type': 'reserve', 'slot_number': n, 'rider_id': r} for n, r in enumerate(reserves, 1)]
+    for row in rows:
+        row.update(id=100 * team_id + row['rider_id'], fantasy_team_id=team_id, active='true', out_of_race='false')
+        row.update((overrides or {}).get(row['rider_id'], {}))
+    return rows
+
+
+def stage(out=(), riders=range(1, 13)):
+    """Uitslag waarin de renners uit out DNF zijn; renners buiten riders hebben geen regel"""
+    return [ResultRecord(position, 'Voor', f'Naam {r}', r, status=Status.DNF if r in out else Status.FINISHED)
+            for position, r in enumerate(riders, 1)]
+
+
+def activations(rows, records, use_finished=True):
+    finished = finished_rider_ids(records) if use_finished else None
+    changes = compute_activations(TeamRiders.from_rows(rows), dropped_rider_ids(records), finished)
+    return {c.rider_id: c for c in changes}
+
+
+def test_main_dnf_activates_the_first_reserve():
+    changes = activations(team(), stage(out=[4]))
+    assert set(changes) == {4, 11}
+    dropped, reserve = changes[4], changes[11]
+    assert (dropped.slot_type, dropped.slot_number, dropped.active, dropped.out_of_race) == (
+        'main', FREED_SLOT_BASE + 4, False, True)
+    assert dropped.reason == 'main uit koers, slot vrijgemaakt'
+    assert (reserve.slot_type, reserve.slot_number, reserve.active, reserve.out_of_race) == ('main', 4, True, False)
+    assert reserve.reason == 'reserve geactiveerd'
+
+
+def test_reserve_that_is_already_out_is_skipped():
+    rows = team(overrides={11: {'out_of_race': 'true'}})
+    changes = activations(rows, stage(out=[4], riders=[r for r in range(1, 13) if r != 11]))
+    # 11 was al uit koers en verandert niet; 12 neemt de plek in
+    assert set(changes) == {4, 12}
+    assert (changes[12].slot_number, changes[12].active) == (4, True)
+
+
+def test_reserve_that_drops_in_the_same_stage_is_not_activated():
+    changes = activations(team(), stage(out=[4, 11]))
+    assert changes[11].reason == 'reserve uit koers'
+    assert (changes[11].slot_type, changes[11].out_of_race) == ('reserve', True)
+    assert (changes[12].slot_type, changes[12].slot_number) == ('main', 4)
+
+
+def test_several_drop_outs_fill_the_lowest_free_slots():
+    # Renner 13 zit al op 903 van een eerdere etappe: het vrijgemaakte slot 3 schuift door naar 904
+    rows = team(reserves=(11, 12)) + [{
+        'id': 113, 'fantasy_team_id': 1, 'rider_id': 13, 'slot_type': 'main', 'slot_number': FREED_SLOT_BASE + 3,
+        'active': 'false', 'out_of_race': 'true',
+    }]
+    changes = activations(rows, stage(out=[3, 7, 9]))
+    assert changes[3].slot_number == FREED_SLOT_BASE + 4
+    assert changes[7].slot_number == FREED_SLOT_BASE + 7
+    assert changes[9].slot_number == FREED_SLOT_BASE + 9
+    assert 13 not in changes
+    # Twee reserves voor drie lege plekken: de laagste slots eerst
+    assert (changes[11].slot_number, changes[12].slot_number) == (3, 7)
+    slots = [c.slot_number for c in changes.values()]
+    assert len(slots) == len(set(slots))
+
+    sql = activation_sql(list(changes.values()), 5)
+    ids = ','.join(str(c.id) for c in changes.values())
+    # Eerst alle gewijzigde rijen naar een tijdelijk negatief slot, dan pas de nieuwe slots
+    assert sql.index('SET slot_number = -id') < sql.index('slot_number = d.slot_number')
+    assert sql.count(f'ARRAY[{ids}]::int[]') == 2
+    assert '-- 5 fantasy_team_riders rows changed in 1 team(s), 2 reserve(s) activated' in sql
+    slot_numbers = re.search(r'ARRAY\[([\d,]+)\]::int\[\],\n  ARRAY\[(?:true|false)', sql)
+    assert slot_numbers and slot_numbers.group(1) == ','.join(str(c.slot_number) for c in changes.values())
+
+
+def test_no_reserves_left():
+    rows = team(overrides={11: {'out_of_race': 'true'}, 12: {'out_of_race': 'true'}})
+    changes = activations(rows, stage(out=[2], riders=range(1, 11)))
+    assert set(changes) == {2}
+    assert changes[2].active is False
+
+
+def test_rider_without_result_line_counts_as_dns():
+    records = stage(riders=[r for r in range(1, 13) if r != 6])
+    changes = activations(team(), records)
+    assert changes[6].out_of_race is True
+    assert (changes[11].slot_number, changes[11].active) == (6, True)
+    # Zonder finished telt alleen een expliciete DNF/DNS regel
+    assert activations(team(), records, use_finished=False) == {}
+
+
+def test_teams_are_independent():
+    rows = team(team_id=1) + team(team_id=2, reserves=(13,))
+    changes = compute_activations(TeamRiders.from_rows(rows), {4}, None)
+    assert sorted((c.fantasy_team_id, c.rider_id) for c in changes) == [(1, 4), (1, 11), (2, 4), (2, 13)]
+
+
+def test_submitted_rows_undo_the_activations():
+    rows = team(reserves=(11, 12, 13))
+    team_riders = TeamRiders.from_rows(rows)
+    team_riders.apply(compute_activations(team_riders, {4, 7, 11}))
+    # 11 viel ook uit, dus 12 en 13 op slot 4 en 7
+    assert sorted(r for r, n in zip(team_riders.rider_id, team_riders.slot_number) if n in (4, 7)) == [12, 13]
+    submitted = sorted(submitted_rows(team_riders)[1])
+    assert submitted == sorted(
+        (row['slot_type'], row['slot_number'], row['rider_id'], row['rider_id'] in (4, 7)) for row in rows
+    )
@@ -0,0 +1,120 @@
+"""
+Statistics rollup cube: incremental updates must give the same totals as a
+full rebuild, and the distance buckets must match the MID_RANGE award.
+"""
+
+import pytest
+
+from tourpoule.records import ResultRecord, Status
+from tourpoule.rollup import (
+    LONG, MEDIUM, MID_RANGE, SHORT, RollupCube, bucket_averages, distance_bucket, mark_applied, pending_stages,
+    sql_stages, stage_cells, update_sql,
+)
+
+POSITION_POINTS = {1: 30, 2: 15, 3: 12}
+TEAM_OF = {1: 10, 2: 10, 3: 20, 4: None}
+
+
+def stage(*rows):
+    """(position, rider_id, status) -> ResultRecords"""
+    return [ResultRecord(position, 'Voor', f'Naam {rider_id}', rider_id, None,
+                         None if status != Status.FINISHED else 1000 + position, status)
+            for position, rider_id, status in rows]
+
+
+STAGE_1 = stage((1, 1, Status.FINISHED), (2, 2, Status.FINISHED), (3, 3, Status.FINISHED), (4, 4, Status.DNF))
+STAGE_2 = stage((1, 3, Status.FINISHED), (2, 1, Status.FINISHED), (3, 2, Status.FINISHED))
+STAGE_2_CORRECTED = stage((1, 2, Status.FINISHED), (2, 1, Status.FINISHED), (3, 3, Status.FINISHED))
+
+
+@pytest.mark.parametrize('distance, bucket', [
+    (33.0, SHORT), (89.9, SHORT), (90, MID_RANGE), ('93.1', MID_RANGE), (120, MID_RANGE),
+    (120.1, MEDIUM), (179.9, MEDIUM), (180, LONG), (None, None), ('', None),
+])
+def test_distance_bucket(distance, bucket):
+    assert distance_bucket(distance) == bucket
+
+
+def test_stage_cells():
+    cells = stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF, extra_points={2: 5})
+    assert cells[(1, 10)] == [1, 30, 1, 1]
+    assert cells[(2, 10)] == [1, 20, 0, 1]
+    # Uitgevallen: wel een resultaat, geen punten of top-10
+    assert cells[(4, None)] == [1, 0, 0, 0]
+
+
+def test_incremental_update_matches_rebuild():
+    cube = RollupCube()
+    cube.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9)
+    cube.update_stage(2, stage_cells(STAGE_2, POSITION_POINTS, TEAM_OF), 93.1)
+    cube.update_stage(2, stage_cells(STAGE_2_CORRECTED, POSITION_POINTS, TEAM_OF), 93.1)
+
+    rebuilt = RollupCube()
+    rebuilt.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9)
+    rebuilt.update_stage(2, stage_cells(STAGE_2_CORRECTED, POSITION_POINTS, TEAM_OF), 93.1)
+
+    for name in ['by_rider', 'by_team', 'by_stage', 'by_bucket_rider', 'by_bucket_team']:
+        assert getattr(cube, name) == getattr(rebuilt, name)
+    assert cube.top('rider', 'points', 2) == [(1, 45), (2, 45)]
+    assert cube.top('team', 'wins') == [(10, 2)]
+    assert cube.top('rider', 'points', bucket=MID_RANGE) == [(2, 30), (1, 15), (3, 12)]
+    assert cube.stages_in(MID_RANGE) == [2]
+    assert cube.stage_winners() == {1: [(1, 10)], 2: [(2, 10)]}
+
+    cube.remove_stage(2)
+    assert cube.top('rider', bucket=MID_RANGE) == []
+    assert cube.by_rider[1] == [1, 30, 1, 1]
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'cube.json')
+    cube = RollupCube()
+    cube.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9, 'abc')
+    cube.save(path)
+
+    loaded = RollupCube.load(path)
+    assert loaded.stages == cube.stages
+    assert loaded.cells == cube.cells
+    assert loaded.by_team == cube.by_team
+    assert RollupCube.load(str(tmp_path / 'missing.json')).stages == {}
+
+
+def test_bucket_averages():
+    stage_points = {1: {7: 10, 8: 4}, 2: {7: 20, 8: 6}, 3: {7: 100}}
+    assert bucket_averages(stage_points, [1, 2]) == {7: 15, 8: 5}
+
+
+def test_update_sql_replaces_only_the_given_stages():
+    cube = RollupCube()
+    cube.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9)
+    cube.update_stage(2, stage_cells(STAGE_2, POSITION_POINTS, TEAM_OF), 93.1)
+    sql = update_sql(cube, [2])
+    assert 'stage_number = 2' in sql and 'stage_number = 1' not in sql
+    assert "'mid_range'" in sql
+    assert '    (3, 20, 1, 30, 1, 1)' in sql
+    # Alleen rijen; de tabellen staan in prisma/schema.prisma
+    assert 'CREATE' not in sql
+
+
+def test_sql_stages_reads_back_the_stages(tmp_path):
+    cube = RollupCube()
+    cube.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9)
+    cube.update_stage(2, stage_cells(STAGE_2, POSITION_POINTS, TEAM_OF), 93.1)
+    path = tmp_path / 'update-stats-rollup.sql'
+    assert sql_stages(str(path)) == []
+    path.write_text(update_sql(cube, [1, 2]), encoding='utf-8')
+    assert sql_stages(str(path)) == [1, 2]
+
+
+def test_stages_stay_pending_until_marked_applied(tmp_path):
+    path = str(tmp_path / 'rollup-applied.jsonl')
+    cube = RollupCube()
+    cube.update_stage(1, stage_cells(STAGE_1, POSITION_POINTS, TEAM_OF), 184.9, 'a')
+    cube.update_stage(2, stage_cells(STAGE_2, POSITION_POINTS, TEAM_OF), 93.1, 'b')
+    assert pending_stages(cube, path) == [1, 2]
+    mark_applied(cube, [1, 2], path)
+    assert pending_stages(cube, path) == []
+
+    # Een gecorrigeerde etappe staat weer open, ook na het laden van het journal
+    cube.update_stage(2, stage_cells(STAGE_2_CORRECTED, POSITION_POINTS, TEAM_OF), 93.1, 'c')
+    assert pending_stages(cube, path) == [2]
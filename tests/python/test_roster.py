@@ -0,0 +1,102 @@
+"""
+Tests for tourpoule.roster: minimal-delta sync of the riders table.
+"""
+
+from tourpoule.names import normalize_name
+from tourpoule.records import RiderRecord
+from tourpoule.roster import (
+    INSERT, RETIRE, UPDATE, StartListRider, TeamLookup, diff_roster, fold_name, team_key, upsert_sql,
+)
+
+
+def db(rider_id, first_name, last_name, team_pro_id):
+    return RiderRecord(rider_id, first_name, last_name, team_pro_id,
+                       normalize_name(first_name), normalize_name(last_name))
+
+
+def entry(first_name, last_name, team_pro_id):
+    return StartListRider(first_name, last_name, f"team {team_pro_id}", None, team_pro_id)
+
+
+def apply(db_riders, changes):
+    """Voer de delta uit op een lijst RiderRecord's zoals de upsert dat in de database doet"""
+    by_id = {r.id: r for r in db_riders}
+    next_id = max(by_id) + 1
+    for c in changes:
+        rider_id = c.rider_id
+        if rider_id is None:
+            rider_id, next_id = next_id, next_id + 1
+        by_id[rider_id] = db(rider_id, c.first_name, c.last_name, c.team_pro_id)
+    return list(by_id.values())
+
+
+def test_fold_name_and_team_key():
+    assert fold_name('Søren Wærenskjold') == 'soren waerenskjold'
+    assert fold_name('Jan-Willem  Doe') == 'jan willem doe'
+    assert team_key('Groupama - FDJ') == team_key('Groupama-FDJ') == 'groupamafdj'
+
+
+def test_team_lookup_falls_back_to_code():
+    teams = TeamLookup([{'id': '7', 'name': 'Team Visma | Lease a Bike', 'code': 'TVL'}],
+                       {'Visma-Lease a Bike': 'TVL'})
+    assert teams.team_id('Team Visma - Lease a Bike') == 7
+    assert teams.team_id('Visma Lease a Bike') == 7
+    assert teams.team_id('Onbekend') is None
+
+
+def test_identical_roster_has_no_changes():
+    riders = [db(1, 'Søren', 'Wærenskjold', 3), db(2, 'Tadej', 'Pogačar', 1)]
+    start_list = [entry('Soren', 'Waerenskjold', 3), entry('Tadej', 'Pogacar', 1)]
+    assert diff_roster(riders, start_list) == []
+
+
+def test_team_move_spelling_insert_and_retire():
+    riders = [db(1, 'Tadej', 'Pogacar', 1), db(2, 'Jonas', 'Vingegaard', 2), db(3, 'Old', 'Timer', 2)]
+    start_list = [entry('Tadej', 'Pogacar', 4), entry('Jonas', 'Vingegaard Hansen', 2), entry('New', 'Comer', 2)]
+    changes = diff_roster(riders, start_list)
+    assert [(c.kind, c.rider_id, c.team_pro_id) for c in changes] == [
+        (UPDATE, 1, 4), (UPDATE, 2, 2), (RETIRE, 3, None), (INSERT, None, 2),
+    ]
+    assert changes[1].last_name == 'Vingegaard Hansen'
+
+    assert [c.kind for c in diff_roster(riders, start_list, retire=False)] == [UPDATE, UPDATE, INSERT]
+
+
+def test_ambiguous_partial_match_is_not_guessed():
+    riders = [db(1, 'Mads', 'Pedersen', 5), db(2, 'Rasmus', 'Pedersen', 5)]
+    start_list = [entry('Mats', 'Pedersen', 5), entry('Rasmuss', 'Pedersen', 5)]
+    changes = diff_roster(riders, start_list)
+    # 'Pedersen' is niet uniek binnen het team en op voornaam matcht niets exact
+    assert [(c.kind, c.rider_id) for c in changes] == [(RETIRE, 1), (RETIRE, 2), (INSERT, None), (INSERT, None)]
+
+
+def test_applying_the_delta_makes_the_diff_empty():
+    riders = [db(1, 'Tadej', 'Pogacar', 1), db(2, 'Jonas', 'Vingegard', 2), db(3, 'Old', 'Timer', 2)]
+    start_list = [entry('Tadej', 'Pogacar', 4), entry('Jonas', 'Vingegaard', 2), entry('New', 'Comer', 2)]
+    changes = diff_roster(riders, start_list)
+    assert changes
+    assert diff_roster(apply(riders, changes), start_list) == []
+
+
+def test_upsert_sql():
+    riders = [db(1, 'Tadej', 'Pogacar', 1), db(2, 'Old', 'Timer', 2)]
+    sql = upsert_sql(diff_roster(riders, [entry('Tadej', 'Pogacar', 4), entry("Ben", "O'Connor", 4)]))
+    assert '-- 1 insert(s), 1 update(s), 1 retirement(s)' in sql
+    existing, new = sql.split('-- New riders')
+    assert "(1, 'Tadej', 'Pogacar', 4, 'tadej', 'pogacar')," in existing
+    assert "(2, 'Old', 'Timer', NULL, 'old', 'timer') -- retire" in existing
+    assert 'ON CONFLICT (id) DO UPDATE' in existing and "O''Connor" not in existing
+    # Nieuwe renners zonder id, alleen op de natuurlijke sleutel
+    assert "  ('Ben', 'O''Connor', 4, 'ben', 'o''connor') -- insert" in new
+    assert 'INSERT INTO riders (first_name, last_name, team_pro_id,' in new
+    assert 'ON CONFLICT (first_name_normalized, last_name_normalized) DO UPDATE' in new
+    assert 'nextval' not in sql and 'ON CONFLICT (id)' not in new
+    # Alleen DML: de index staat in prisma/schema.prisma
+    assert 'CREATE' not in sql
+    assert sql.rstrip().endswith('COMMIT;')
+
+
+def test_upsert_sql_without_inserts():
+    sql = upsert_sql(diff_roster([db(1, 'Tadej', 'Pogacar', 1)], [entry('Tadej', 'Pogacar', 4)]))
+    assert sql.count('INSERT INTO riders') == 1
+    assert 'CREATE UNIQUE INDEX' not in sql
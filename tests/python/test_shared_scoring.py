@@ -0,0 +1,103 @@
+"""
+Tests for tourpoule.shared_scoring: shard scoring over shared memory.
+"""
+
+import os
+import random
+
+import pytest
+
+from conftest import IMPORTS_DIR
+from tourpoule.comparison import TeamComparison
+from tourpoule.records import ResultRecord, Status, read_stage_results_csv
+from tourpoule.reserves import TeamRiders, stage_rosters
+from tourpoule.scoring import read_position_points, stage_rider_points
+from tourpoule import shared_scoring
+from tourpoule.shared_scoring import SharedBlocks, ScoringInput, score_parallel, score_serial, score_stage_rosters
+
+BACKUP_DIR = os.path.join(os.path.dirname(IMPORTS_DIR), 'database_csv', 'backup_2025-12-16_10-32-55')
+
+
+def random_league(teams, seed=7):
+    rng = random.Random(seed)
+    by_team = {team: rng.sample(range(1, 185), 10) for team in range(1, teams + 1)}
+    stage_points = {n: {r: rng.randint(1, 50) for r in rng.sample(range(1, 185), 15)} for n in (1, 2, 5)}
+    return by_team, stage_points
+
+
+def test_serial_scores_main_riders_per_stage():
+    data = ScoringInput.from_members({10: [1, 2], 20: [2, 3], 30: []}, {1: {1: 5, 3: 2}, 2: {2: 7}})
+    assert score_serial(data) == {10: [5, 7], 20: [2, 7], 30: [0, 0]}
+
+
+def test_parallel_matches_serial():
+    by_team, stage_points = random_league(2500)
+    data = ScoringInput.from_members(by_team, stage_points)
+    expected = score_serial(data)
+    assert expected[1] == [sum(stage_points[n].get(r, 0) for r in by_team[1]) for n in (1, 2, 5)]
+    assert score_parallel(data, workers=2, shard_size=300) == expected
+
+
+def test_shared_blocks_are_removed():
+    by_team, stage_points = random_league(10)
+    with SharedBlocks(ScoringInput.from_members(by_team, stage_points)) as shared:
+        names = list(shared.handles()[0].values())
+    for name in names:
+        assert not os.path.exists(os.path.join('/dev/shm', name))
+
+
+def test_worker_detach_closes_its_blocks():
+    by_team, stage_points = random_league(10)
+    with SharedBlocks(ScoringInput.from_members(by_team, stage_points)) as shared:
+        shared_scoring._attach(*shared.handles())
+        blocks = list(shared_scoring._worker['blocks'].values())
+        shared_scoring._detach()
+        assert shared_scoring._worker == {}
+        # Gesloten blokken hebben geen buffer meer
+        assert all(block.buf is None for block in blocks)
+
+
+def test_fixture_league_matches_team_comparison():
+    stage_points = {1: stage_rider_points(
+        read_stage_results_csv(os.path.join(IMPORTS_DIR, 'etappe-1-uitslag-fixed.csv')),
+        read_position_points(os.path.join(BACKUP_DIR, 'scoring_rules.csv')),
+    )}
+    team_riders = TeamRiders.from_csv(os.path.join(BACKUP_DIR, 'fantasy_team_riders.csv'))
+    result = score_serial(ScoringInput.from_team_riders(team_riders, stage_points))
+    comparison = TeamComparison.from_team_riders(team_riders, stage_points)
+    assert result == {team: points for team, points in comparison.points.items() if team in result}
+    assert any(sum(points) for points in result.values())
+
+
+def test_each_stage_is_scored_with_its_own_roster():
+    # Team 1: hoofdrenners 1-10, reserve 11; team 2: 12-21. Renner 1 valt uit in etappe 1
+    rows = [{'id': 100 + r, 'fantasy_team_id': 1, 'rider_id': r, 'slot_type': 'main', 'slot_number': r}
+            for r in range(1, 11)]
+    rows.append({'id': 111, 'fantasy_team_id': 1, 'rider_id': 11, 'slot_type': 'reserve', 'slot_number': 1})
+    rows += [{'id': 200 + r, 'fantasy_team_id': 2, 'rider_id': r, 'slot_type': 'main', 'slot_number': r - 11}
+             for r in range(12, 22)]
+    team_riders = TeamRiders.from_rows(rows)
+    stage_records = {
+        1: [ResultRecord(p, 'Voor', f'Naam {r}', r) for p, r in enumerate([11, *range(2, 11), *range(12, 22)], 1)]
+        + [ResultRecord(21, 'Voor', 'Naam 1', 1, status=Status.DNF)],
+        2: [ResultRecord(p, 'Voor', f'Naam {r}', r) for p, r in enumerate([11, 12, *range(2, 11)], 1)],
+        3: [ResultRecord(p, 'Voor', f'Naam {r}', r) for p, r in enumerate([12, 11], 1)],
+    }
+    stage_points = {n: stage_rider_points(records, {1: 30, 2: 15}) for n, records in stage_records.items()}
+    rosters = stage_rosters(team_riders, stage_records)
+
+    # Reserve 11 is na de import van etappe 1 al actief en scoort in elke etappe mee (etappe 1: 11 + renner 2)
+    stage_numbers, result = score_stage_rosters(rosters, stage_points, workers=1)
+    assert stage_numbers == [1, 2, 3]
+    assert result == {1: [45, 30, 15], 2: [0, 15, 30]}
+    expected = TeamComparison.from_team_riders(rosters[3], stage_points, stage_rosters=rosters).points
+    assert result == expected
+    # Met alleen de opstelling van vóór etappe 1 telt reserve 11 nergens mee
+    assert score_serial(ScoringInput.from_team_riders(team_riders, stage_points))[1] == [15, 0, 0]
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_small_league_stays_in_process(workers):
+    by_team, stage_points = random_league(50)
+    data = ScoringInput.from_members(by_team, stage_points)
+    assert score_parallel(data, workers=workers) == score_serial(data)
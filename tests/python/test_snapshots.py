@@ -0,0 +1,124 @@
+"""
+Tests for tourpoule.snapshots: the static bodies must match what the
+functions in netlify/functions return, key for key and number for number.
+"""
+
+import json
+import os
+import re
+
+from conftest import IMPORTS_DIR
+from tourpoule.snapshots import ENDPOINTS, StageSnapshot, js_round, publish, update_manifest
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(IMPORTS_DIR), 'netlify', 'functions')
+# Endpoint -> (lijst of object met de data in de body, een sleutel daarvan in de JS)
+ITEMS = {
+    'standings': ('standings', 'participantId'),
+    'stage-results': ('results', 'position'),
+    'stage-team-points': ('teams', 'rank'),
+    'statistics-overview': ('statistics', 'totalRiders'),
+}
+
+
+def tables(stage_points=()):
+    """Twee etappes, alleen etappe 1 heeft een uitslag; stage_points: [(participant_id, stage_id, totaal)]"""
+    return {
+        'stages': [{'id': 10, 'stage_number': 1}, {'id': 11, 'stage_number': 2}],
+        'stage_results': [
+            {'stage_id': 10, 'rider_id': 1, 'position': 1, 'time_seconds': 16384},
+            {'stage_id': 10, 'rider_id': 2, 'position': 2, 'time_seconds': 16390},
+        ],
+        'riders': [
+            {'id': 1, 'first_name': 'Tadej', 'last_name': 'Pogačar'},
+            {'id': 2, 'first_name': 'Jonas', 'last_name': 'Vingegaard'},
+        ],
+        'participants': [
+            {'id': 1, 'team_name': 'Alpha', 'email': 'jan.de.vries@x.nl', 'avatar_url': ''},
+            {'id': 2, 'team_name': 'Bravo', 'email': 'piet@x.nl', 'avatar_url': '/a.png'},
+        ],
+        'fantasy_teams': [{'id': 1, 'participant_id': 1}, {'id': 2, 'participant_id': 2}],
+        'fantasy_stage_points': [
+            {'participant_id': pid, 'stage_id': stage_id, 'points_stage': total, 'points_jerseys': 0,
+             'points_bonus': 0, 'total_points': total}
+            for pid, stage_id, total in stage_points
+        ],
+        'fantasy_cumulative_points': [],
+    }
+
+
+def js_object_keys(source, start):
+    """Sleutels op het bovenste niveau van het object literal dat bij source[start] ('{') begint"""
+    depth = 0
+    top = []
+    for char in source[start:]:
+        if char in '{[(':
+            depth += 1
+        elif char in '}])':
+            depth -= 1
+            if depth == 0:
+                break
+        elif depth == 1:
+            top.append(char)
+    text = re.sub(r'//[^\n]*', '', ''.join(top))
+    return re.findall(r'(?:^|[,\n])\s*(\w+)\s*:', text)
+
+
+def js_response_keys(endpoint):
+    """(sleutels van de 200 body, sleutels van één item) uit netlify/functions/get-<endpoint>.js"""
+    with open(os.path.join(FUNCTIONS_DIR, f'get-{endpoint}.js'), 'r', encoding='utf-8') as f:
+        source = f.read()
+    # De laatste 200 response is die met data (standings heeft eerder een 'nog geen uitslag' response)
+    ok = source.index('JSON.stringify(', source.rindex('statusCode: 200'))
+    body = js_object_keys(source, source.index('{', ok))
+    item_key = source.index(f'{ITEMS[endpoint][1]}:')
+    item = js_object_keys(source, source.rindex('{', 0, item_key))
+    return set(body), set(item)
+
+
+def test_bodies_have_the_keys_of_the_functions():
+    bodies = StageSnapshot(tables([(1, 10, 30), (2, 10, 15)]), 1).render()
+    assert set(bodies) == set(ENDPOINTS)
+    for endpoint, body in bodies.items():
+        body_keys, item_keys = js_response_keys(endpoint)
+        assert set(body) == body_keys, endpoint
+        items = body[ITEMS[endpoint][0]]
+        item = items[0] if isinstance(items, list) else items
+        assert set(item) == item_keys, endpoint
+
+
+def test_bodies_match_the_function_output():
+    bodies = StageSnapshot(tables([(1, 10, 30), (2, 10, 15)]), 1).render()
+    assert bodies['standings']['standings'][0] == {
+        'participantId': 1, 'teamName': 'Alpha', 'totalPoints': 30, 'rank': 1, 'positionChange': None,
+    }
+    assert bodies['stage-results']['results'][0] == {'position': 1, 'rider': 'Tadej Pogačar', 'time': '4:33:04'}
+    assert bodies['stage-team-points']['teams'][0]['participantName'] == 'Jan De Vries'
+    assert bodies['stage-team-points']['teams'][0]['avatarUrl'] is None
+    assert bodies['statistics-overview']['statistics']['averagePoints'] == 22.5
+
+
+def test_average_points_is_formatted_like_json_stringify(tmp_path):
+    # Zonder punten geeft de functie 0, geen 0.0
+    bodies = StageSnapshot(tables(), 1).render()
+    urls = publish(bodies, 1, str(tmp_path))
+    with open(os.path.join(tmp_path, *urls['statistics-overview'].split('/')[2:]), 'rb') as f:
+        assert b'"averagePoints":0}' in f.read()
+
+    assert json.dumps(js_round(12.0)) == '12'
+    assert js_round(0.125) == 0.13
+    # Math.round rondt .5 naar boven af, round() naar het even getal
+    assert js_round(2.5, 0) == 3
+
+
+def test_publish_writes_only_json(tmp_path):
+    bodies = StageSnapshot(tables([(1, 10, 30)]), 1).render()
+    urls = publish(bodies, 1, str(tmp_path))
+    files = sorted(os.listdir(tmp_path / 'stage-1'))
+    assert len(files) == len(ENDPOINTS)
+    assert all(name.endswith('.json') for name in files)
+    assert urls['standings'].startswith('/data/stage-1/standings.')
+
+    manifest = update_manifest({1: urls}, str(tmp_path))
+    assert manifest['latest'] == urls
+    # Zelfde data: dezelfde bestandsnamen
+    assert publish(bodies, 1, str(tmp_path)) == urls
@@ -0,0 +1,136 @@
+"""
+Tests for chunked, resumable batch files in tourpoule.sql_batch.
+"""
+
+import os
+import threading
+
+import pytest
+
+from tourpoule import sql_batch
+
+
+class FakeConnection:
+    """DB-API verbinding die statements bijhoudt; stages bestaan altijd, fail_on_execute laat een EXECUTE falen"""
+
+    def __init__(self, fail_on_execute=None):
+        self.fail_on_execute = fail_on_execute
+        self.executes = 0
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed.append(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.pending.append(sql.split()[0])
+
+    def executemany(self, sql, rows):
+        self.conn.executes += 1
+        if self.conn.executes == self.conn.fail_on_execute:
+            raise RuntimeError('verbinding verbroken')
+        self.conn.pending.append(('EXECUTE', [row[1] for row in rows]))
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+def committed_positions(conn):
+    return [p for tx in conn.committed for step in tx if isinstance(step, tuple) for p in step[1]]
+
+
+def write_stage(path, stage_number, rows=10, chunk=3):
+    data = [[p, None, None, 100 + p, 1000 + p, p] for p in range(1, rows + 1)]
+    header = sql_batch.stage_results_header(stage_number, len(data), chunk, chunked=chunk is not None)
+    sql_batch.write_batch_file(str(path), header, data)
+    return str(path)
+
+
+def test_single_transaction_is_the_default(tmp_path):
+    path = write_stage(tmp_path / 'stage.jsonl', 1, chunk=None)
+    assert 'transaction' not in sql_batch.read_batch_header(path)
+    conn = FakeConnection()
+    assert sql_batch.execute_batch_file(conn, path) == 10
+    assert len(conn.committed) == 1
+
+
+def test_chunked_commits_setup_and_every_chunk(tmp_path):
+    path = write_stage(tmp_path / 'stage.jsonl', 1)
+    conn = FakeConnection()
+    seen = []
+    sent = sql_batch.execute_batch_file(conn, path, progress=lambda *args: seen.append(args))
+    assert sent == 10
+    assert seen == [(0, 4, 0), (1, 4, 3), (2, 4, 3), (3, 4, 3), (4, 4, 1)]
+    # setup (SELECT + DELETE), 4 chunks (de eerste met PREPARE), DEALLOCATE
+    assert conn.committed[0] == ['SELECT', 'DELETE']
+    assert len(conn.committed) == 6
+    assert committed_positions(conn) == list(range(1, 11))
+    assert not os.path.exists(sql_batch.progress_path(path))
+
+
+def test_resume_after_failure_skips_committed_chunks(tmp_path):
+    path = write_stage(tmp_path / 'stage.jsonl', 1)
+    failing = FakeConnection(fail_on_execute=3)
+    with pytest.raises(RuntimeError):
+        sql_batch.execute_batch_file(failing, path)
+    assert failing.rollbacks == 1
+    assert committed_positions(failing) == [1, 2, 3, 4, 5, 6]
+    assert os.path.exists(sql_batch.progress_path(path))
+
+    resumed = FakeConnection()
+    assert sql_batch.execute_batch_file(resumed, path) == 4
+    assert 'DELETE' not in [step for tx in resumed.committed for step in tx]
+    assert committed_positions(resumed) == [7, 8, 9, 10]
+    assert not os.path.exists(sql_batch.progress_path(path))
+
+
+def test_restart_and_changed_file_start_over(tmp_path):
+    path = write_stage(tmp_path / 'stage.jsonl', 1)
+    with pytest.raises(RuntimeError):
+        sql_batch.execute_batch_file(FakeConnection(fail_on_execute=2), path)
+    assert sql_batch.execute_batch_file(FakeConnection(), path, resume=False) == 10
+
+    with pytest.raises(RuntimeError):
+        sql_batch.execute_batch_file(FakeConnection(fail_on_execute=2), path)
+    write_stage(path, 1, rows=11)
+    assert sql_batch.execute_batch_file(FakeConnection(), path) == 11
+
+
+def test_parallel_stages_use_their_own_connection(tmp_path):
+    paths = [write_stage(tmp_path / f'stage-{n}.jsonl', n) for n in (1, 2, 3)]
+    connections = []
+    lock = threading.Lock()
+
+    def connect():
+        with lock:
+            conn = FakeConnection(fail_on_execute=2 if len(connections) == 1 else None)
+            connections.append(conn)
+        return conn
+
+    results = sql_batch.execute_batch_files(connect, paths, workers=3)
+    assert len(connections) == 3
+    assert all(c.closed for c in connections)
+    assert sorted(v for v in results.values() if not isinstance(v, Exception)) == [10, 10]
+    assert sum(isinstance(v, Exception) for v in results.values()) == 1
+    assert list(results) == paths
@@ -0,0 +1,101 @@
+"""
+Tests for tourpoule.submissions: bulk team validation.
+"""
+
+import json
+import time
+
+from conftest import CHECK_TIMINGS
+from tourpoule.reserves import TeamRiders, compute_activations
+from tourpoule.submissions import (
+    AFTER_DEADLINE, DUPLICATE_RIDER, DUPLICATE_SLOT, INVALID_SLOT, MAIN_COUNT, RESERVE_COUNT, RIDER_OUT,
+    UNKNOWN_RIDER, Submissions, parse_timestamp, summary, validate,
+)
+
+KNOWN = set(range(1, 201))
+DEADLINE = '2026-07-05 12:00:00'
+
+
+def full_team(first=1):
+    return [('main', n, first + n - 1) for n in range(1, 11)] + [('reserve', n, first + 9 + n) for n in range(1, 6)]
+
+
+def codes(verdict):
+    return [i.code for i in verdict.issues]
+
+
+def test_parse_timestamp():
+    assert parse_timestamp(DEADLINE) < parse_timestamp('"2026-07-05T12:00:01.000Z"')
+    assert parse_timestamp('') is None
+
+
+def test_complete_team_is_ok():
+    submissions = Submissions()
+    submissions.add_team(1, full_team(), '2026-07-01T10:00:00Z')
+    verdicts = validate(submissions, KNOWN, deadline=DEADLINE)
+    assert verdicts[1].ok
+    assert verdicts[1].to_json() == {'ok': True, 'issues': []}
+
+
+def test_slot_problems():
+    submissions = Submissions()
+    rows = full_team()[:9] + [('main', 9, 50), ('main', 11, 51), ('reserve', 1, 3)]
+    submissions.add_team(7, rows)
+    verdict = validate(submissions, KNOWN)[7]
+    assert codes(verdict) == [MAIN_COUNT, RESERVE_COUNT, DUPLICATE_RIDER, DUPLICATE_SLOT, INVALID_SLOT]
+    assert verdict.issues[0].count == 9
+    assert (verdict.issues[2].slot_type, verdict.issues[2].slot_number, verdict.issues[2].rider_id) == ('reserve', 1, 3)
+
+
+def test_unknown_out_of_race_and_deadline():
+    submissions = Submissions()
+    submissions.add_team(1, full_team(), '2026-07-05 12:00:00')
+    submissions.add_team(2, full_team(191), '2026-07-05T12:30:00Z')
+    verdicts = validate(submissions, KNOWN, out_ids={5}, deadline=DEADLINE)
+    assert codes(verdicts[1]) == [RIDER_OUT]
+    assert codes(verdicts[2]) == [UNKNOWN_RIDER] * 5 + [AFTER_DEADLINE]
+    assert summary(verdicts) == {RIDER_OUT: 1, UNKNOWN_RIDER: 1, AFTER_DEADLINE: 1}
+
+
+def test_from_team_riders_validates_the_roster_as_submitted():
+    rows = [
+        {'id': i, 'fantasy_team_id': 3, 'rider_id': r, 'slot_type': t, 'slot_number': n,
+         'active': 'true' if t == 'main' else 'false'}
+        for i, (t, n, r) in enumerate(full_team(), 1)
+    ]
+    team_riders = TeamRiders.from_rows(rows)
+    # Na twee etappes: main 3 en daarna reserve 11 (op slot 3 geactiveerd) uitgevallen, reserve 12 erin
+    team_riders.apply(compute_activations(team_riders, {3}))
+    team_riders.apply(compute_activations(team_riders, {11}))
+    assert sorted(n for n in team_riders.slot_number if n > 10) == [903, 904]
+
+    submissions = Submissions.from_team_riders(team_riders, {3: 30}, {3: '"2025-12-12T14:24:31.224Z"'})
+    verdicts = validate(submissions, KNOWN, out_ids={3, 11}, deadline=DEADLINE)
+    assert list(verdicts) == [30]
+    # 10 main en 5 reserve slots; de vervangen renners tellen niet als uit koers
+    assert verdicts[30].ok
+    assert sorted(submissions.slots) == list(range(1, 16))
+
+    # Een reserve (standaard inactief) die uitviel, blijft een probleem
+    verdict = validate(submissions, KNOWN, out_ids={13})[30]
+    assert codes(verdict) == [RIDER_OUT]
+
+
+def test_from_jsonl(tmp_path):
+    path = tmp_path / 'pending.jsonl'
+    path.write_text(json.dumps({'participant_id': 4, 'submitted_at': '2026-07-06T00:00:00Z',
+                                'main': list(range(1, 11)), 'reserve': [11, 12, None, 14, 15]}) + '\n')
+    verdict = validate(Submissions.from_jsonl(str(path)), KNOWN, deadline=DEADLINE)[4]
+    assert codes(verdict) == [RESERVE_COUNT, AFTER_DEADLINE]
+
+
+def test_large_league_revalidates_quickly():
+    submissions = Submissions()
+    for team in range(100_000):
+        submissions.add_team(team, full_team(team % 180 + 1))
+    started = time.perf_counter()
+    verdicts = validate(submissions, KNOWN, out_ids={42})
+    if CHECK_TIMINGS:
+        assert time.perf_counter() - started < 10
+    # Rider 42 zit in de teams die bij rider 28 t/m 42 beginnen
+    assert sum(not v.ok for v in verdicts.values()) == sum(1 for t in range(100_000) if 28 <= t % 180 + 1 <= 42)
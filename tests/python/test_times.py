@@ -0,0 +1,77 @@
+"""
+Tests for tourpoule.times: gap and same-time notation to absolute seconds.
+"""
+
+import random
+
+import pytest
+
+from tourpoule.records import ResultRecord, Status
+from tourpoule.times import (
+    ABSOLUTE, EMPTY, GAP, INVALID, NO_TIME, SAME_TIME, STATUS,
+    absolute_times, apply_stage_times, classify_time, classify_times,
+)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('3:53:11', (ABSOLUTE, 13991)),
+    ('13991', (ABSOLUTE, 13991)),
+    ('3h53m11s', (ABSOLUTE, 13991)),
+    ('+0:12', (GAP, 12)),
+    ('+ 1:02:03', (GAP, 3723)),
+    ('+12', (GAP, 12)),
+    ('s.t.', (SAME_TIME, 0)),
+    ('S.T.', (SAME_TIME, 0)),
+    (',,', (SAME_TIME, 0)),
+    ('"', (SAME_TIME, 0)),
+    ('DNF', (STATUS, int(Status.DNF))),
+    ('DNS*', (STATUS, int(Status.DNS))),
+    ('OTL', (STATUS, int(Status.OTL))),
+    ('', (EMPTY, 0)),
+    (None, (EMPTY, 0)),
+    ('+abc', (INVALID, 0)),
+    ('3:5x', (INVALID, 0)),
+])
+def test_classify_time(text, expected):
+    assert classify_time(text) == expected
+
+
+def test_absolute_times_resolves_gaps_against_winner():
+    kinds, values = classify_times(['3:53:11', 's.t.', '+0:12', ',,', 'DNF', '+1:00', 's.t.'])
+    assert list(absolute_times(kinds, values)) == [13991, 13991, 14003, 14003, NO_TIME, 14051, 14051]
+
+
+def test_gap_without_base_time_has_no_time():
+    kinds, values = classify_times(['s.t.', '+0:12', '3:53:11'])
+    assert list(absolute_times(kinds, values)) == [NO_TIME, NO_TIME, 13991]
+
+
+def test_apply_stage_times_sets_status():
+    records = [ResultRecord(i + 1, 'A', 'B') for i in range(4)]
+    invalid = apply_stage_times(records, ['3:53:11', '+0:05', 'DNS', '+??'])
+    assert [r.time_seconds for r in records] == [13991, 13996, None, None]
+    assert [r.status for r in records] == [Status.FINISHED, Status.FINISHED, Status.DNS, Status.DNF]
+    assert invalid == 1
+
+
+def _as_published(times):
+    """Absolute tijden zoals een uitslag ze publiceert: winnaar absoluut, dan gaps / s.t. / ,,"""
+    texts = []
+    for i, seconds in enumerate(times):
+        if i == 0:
+            texts.append(f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}")
+        elif seconds == times[i - 1]:
+            texts.append('s.t.' if i % 2 else ',,')
+        else:
+            gap = seconds - times[0]
+            texts.append(f"+{gap // 60}:{gap % 60:02d}")
+    return texts
+
+
+def test_large_stage_round_trip():
+    rng = random.Random(35)
+    times = [13991]
+    for _ in range(199_999):
+        times.append(times[-1] + (0 if rng.random() < 0.6 else rng.randint(1, 90)))
+    kinds, values = classify_times(_as_published(times))
+    assert list(absolute_times(kinds, values)) == times